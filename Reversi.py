@@ -1,26 +1,46 @@
+# The modules of every mode are imported in its branch (see the main block), so a mode loads only what it uses
 import command_handle
-from main import Reversi
-import tkinter as tk
 
 
-def run_reversi():
+def run_reversi(opponent=None, ponder=False, time_per_move=None, board_size=None):
+    """
+    Run the game, where the moves are made by clicking on the board.
+    :param opponent: The strategy of an AI opponent, which plays white (see Reversi.play_against). Defaults to None (the
+        human plays both players).
+    :param ponder: Whether the AI opponent thinks during the human's turn.
+    :param time_per_move: Time budget in seconds of every move of a searching AI opponent.
+    :param board_size: The board size. Defaults to the configured one (see Reversi).
+    """
+    import tkinter as tk  # The GUI is loaded only by the modes that show it, so the headless modes start fast
+    from main import Reversi
+
     root = tk.Tk()
-    game = Reversi(root)
+    game = Reversi(root, board_size)
+    if opponent is not None:
+        game.play_against(opponent, ponder, time_per_move)
     root.mainloop()
 
 
-def start_methodical_by_requirements(num_of_captures, num_of_discs=None, player1_mode=None, player2_mode=None, ahead=1):
+def start_methodical_by_requirements(num_of_captures, num_of_discs=None, player1_mode=None, player2_mode=None, ahead=1,
+                                     time_per_move=None, game_clock=None, board_size=None):
     """
     Start the Reversi game methodically based on specified requirements (using the start_methodical_moves method).
     :param num_of_captures: The number of screenshots to capture during the process.
     :param num_of_discs: The maximum number of discs to be placed on the board. Defaults to None.
     :param player1_mode: The maximum number of discs to be placed on the board. Defaults to None.
-    :param player2_mode: (str, optional): The mode of player 2 ('random', 'H1', 'H2', or None). Defaults to None.
+    :param player2_mode: (str, optional): The mode of player 2 ('random', 'H1', 'H2', 'H3', or None). Defaults to None.
     :param ahead: (int, optional): The number of steps ahead to consider in the decision-making process. Defaults to 1.
+    :param time_per_move: (float, optional): Time budget in seconds of every move of a searching player. Defaults to None.
+    :param game_clock: (float, optional): Total time in seconds of a searching player for the whole game. Defaults to None.
+    :param board_size: (int, optional): The board size. Defaults to the configured one (see Reversi).
     """
+    import tkinter as tk
+    from main import Reversi
+
     def random_after_gui():
-        game = Reversi(root)
-        game.start_methodical_moves(num_of_captures, num_of_discs, player1_mode, player2_mode, ahead)
+        game = Reversi(root, board_size)
+        game.start_methodical_moves(num_of_captures, num_of_discs, player1_mode, player2_mode, ahead, time_per_move,
+                                    game_clock)
 
     root = tk.Tk()
     root.after(100, random_after_gui)  # Call methodical_after_gui after a delay
@@ -32,41 +52,135 @@ if __name__ == "__main__":
 
     if args.run:
         print("Running the program...")
-        run_reversi()
+        run_reversi(board_size=args.size)
+
+    elif args.vs is not None:
+        print(f"Playing against the AI ({args.vs})")
+        run_reversi(args.vs, args.ponder, args.time, args.size)
 
     elif args.displayAllActions is not None:
         print(f"Displaying all actions with {args.displayAllActions} discs")
         n = args.displayAllActions
-        start_methodical_by_requirements(num_of_captures=n, num_of_discs=n)
+        start_methodical_by_requirements(num_of_captures=n, num_of_discs=n, board_size=args.size)
 
     elif args.methodical is not None:
         print(f"Methodical player with depth {args.methodical}")
-        start_methodical_by_requirements(num_of_captures=args.methodical)
+        start_methodical_by_requirements(num_of_captures=args.methodical, board_size=args.size)
 
     elif args.random is not None:
         print(f"Random player with moves {args.random}")
         n = args.random
-        start_methodical_by_requirements(num_of_captures=n, player1_mode='random', player2_mode='random')
+        start_methodical_by_requirements(num_of_captures=n, player1_mode='random', player2_mode='random',
+                                         board_size=args.size)
+
+    elif args.tournament is not None:
+        import tournament
+        strategy_a, strategy_b = args.tournament
+        print(f"Tournament of {args.games} games: {strategy_a} vs {strategy_b}")
+        summary = tournament.run_tournament(strategy_a, strategy_b, args.games, args.workers, args.openingPlies,
+                                            checkpoint_path=args.checkpoint, sprt=args.sprt, book_path=args.book,
+                                            records_path=args.records)
+        print(tournament.format_summary(strategy_a, strategy_b, summary))
+
+    elif args.simulate is not None:
+        import batch_games  # Needs NumPy, which only the batched simulation does
+        import tournament
+        strategy_a, strategy_b = args.simulate
+        print(f"Simulating {args.games} games: {strategy_a} vs {strategy_b}")
+        results = batch_games.simulate_match(strategy_a, strategy_b, args.games)
+        print(tournament.format_summary(strategy_a, strategy_b, tournament.summarize(results)))
+
+    elif args.analyse is not None:
+        import analysis
+        import bitboard
+        import config
+        moves = analysis.parse_moves(args.analyse)
+        size = args.size or config.load_config_value("board_size", bitboard.BOARD_SIZE)  # As the GUI
+        print(analysis.format_analysis(*analysis.analyse(moves, args.depth, size=size)))
+
+    elif args.solve is not None:
+        import endgame
+        mode = endgame.EXACT if args.solveMode == 'exact' else endgame.WIN_LOSS_DRAW
+        print(f"Solving {args.solve}x{args.solve} from the start position ({args.solveMode})")
+        if args.solve > 4:
+            print("Boards larger than 4x4 are out of reach of the solver, so this run is a stress test that won't end")
+        solution = endgame.solve_start(args.solve, mode)
+        result = solution['result']
+        outcome = "a draw" if result == 0 else f"a {'red' if result > 0 else 'white'} win"
+        print(f"Perfect play is {outcome}" + (f" by {abs(result)} discs" if mode == endgame.EXACT and result else "") +
+              f" (first move {solution['move']}, {solution['nodes']} nodes in {solution['seconds']:.1f} seconds)")
+
+    elif args.buildBook is not None:
+        import book
+        print(f"Building an opening book of {args.bookPlies} plies (depth {args.bookDepth}) to {args.buildBook}")
+        size = book.build_book(args.buildBook, args.bookPlies, args.bookDepth,
+                               progress=lambda ply, positions: print(f"Ply {ply}: {positions} positions"))
+        print(f"The opening book has {size} positions")
+
+    elif args.enumerate is not None:
+        import enumeration
+        counts = enumeration.enumerate_positions(args.enumerate, args.output, args.workers,
+                                                 progress=lambda discs, count: print(f"{discs} discs: {count} positions"))
+        print(f"{counts[-1]} distinct positions with {args.enumerate} discs were written to {args.output}")
+
+    elif args.perft is not None:
+        import perft
+        total, counts = perft.run_perft(args.perft, args.workers, args.cache)
+        if args.divide:
+            print(perft.format_divide(counts))
+        reference = perft.reference_count(args.perft)
+        print(f"Perft {args.perft}: {total}" + ("" if reference is None else
+                                                f" ({'OK' if total == reference else f'expected {reference}'})"))
+        if reference is not None and total != reference:
+            exit(1)
+
+    elif args.benchmark is not None:
+        import benchmark
+        results = benchmark.run_benchmarks(progress=lambda name: print(f"Measuring {name}..."))
+        benchmark.save_results(args.benchmark, results)
+        regressions = benchmark.compare(results, benchmark.load_results(args.baseline), args.threshold) \
+            if args.baseline else []
+        print(benchmark.format_results(results, regressions))
+        if regressions:
+            exit(1)
+
+    elif args.generate is not None:
+        import training  # Needs NumPy, which only the training does
+        count = training.generate_dataset(args.generate, args.source, args.games, args.workers, args.strategy,
+                                          empties=args.empties, records_path=args.records,
+                                          progress=lambda positions: print(f"{positions} positions", end='\r'))
+        print(f"{count} positions were written to {args.generate}")
+
+    elif args.fit is not None:
+        import heuristics
+        import training
+        weights_path = args.weights or heuristics.WEIGHTS_PATH
+        training.fit_weights(args.fit, weights_path, method=args.fitMethod, epochs=args.epochs)
+        print(f"The fitted weights were written to {weights_path}")
 
     elif args.ahead is not None:
         print("Simulation with the best heuristic function, consider 2 steps ahead.")
-        start_methodical_by_requirements(num_of_captures=0, player1_mode='H1', player2_mode='H1', ahead=2)
+        start_methodical_by_requirements(num_of_captures=0, player1_mode='H1', player2_mode='H1', ahead=2,
+                                         time_per_move=args.time, game_clock=args.clock, board_size=args.size)
 
     else:
-        heuristics = args.heuristics
-        if len(heuristics) == 0:
+        modes = args.heuristics
+        if len(modes) == 0:
             print("No heuristic provided. Exiting.")
 
-        elif len(heuristics) == 1:
-            print(f"Single heuristic provided. Both players will use {heuristics[0]}")
-            if heuristics[0] == 'H1':
-                start_methodical_by_requirements(num_of_captures=0, player1_mode='H1', player2_mode='H1')
+        elif len(modes) == 1:
+            print(f"Single heuristic provided. Both players will use {modes[0]}")
+            if modes[0] in ('H1', 'H3'):
+                start_methodical_by_requirements(num_of_captures=0, player1_mode=modes[0], player2_mode=modes[0],
+                                                 time_per_move=args.time, game_clock=args.clock, board_size=args.size)
             else:
-                start_methodical_by_requirements(num_of_captures=0, player1_mode='H2', player2_mode='H2')
+                start_methodical_by_requirements(num_of_captures=0, player1_mode='H2', player2_mode='H2',
+                                                 board_size=args.size)
 
-        elif len(heuristics) == 2:
-            print(f"Player 1 will use heuristic {heuristics[0]}, and player 2 will use {heuristics[1]}")
-            start_methodical_by_requirements(num_of_captures=0, player1_mode=heuristics[0], player2_mode=heuristics[1])
+        elif len(modes) == 2:
+            print(f"Player 1 will use heuristic {modes[0]}, and player 2 will use {modes[1]}")
+            start_methodical_by_requirements(num_of_captures=0, player1_mode=modes[0], player2_mode=modes[1],
+                                             time_per_move=args.time, game_clock=args.clock, board_size=args.size)
 
         else:
             print("Too many heuristics provided. Exiting.")
@@ -0,0 +1,145 @@
+"""
+Background thinking of the AI players of the GUI.
+
+The decisions of the searching players run in a worker thread, so the Tk event loop keeps handling the window (and
+the Stop button) while the AI searches. Tk may only be used from its own thread, so the worker puts the results on a
+queue, which the Tk thread polls with `after`, and the callbacks of the decisions run in the Tk thread.
+
+A decision can be cancelled: its cancel event is set, which stops the search (see search.SearchCancelled), and its
+result is dropped. Cheap decisions (which don't search) can run in the Tk thread instead, on the next tick of the
+event loop, with the same interface.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from search import SearchCancelled
+
+_POLL_INTERVAL_MS = 10
+
+
+class Job:
+    """
+    A decision that was submitted to the AIWorker.
+    - Attributes:
+        - on_done: Called with the result in the Tk thread when the decision is completed (can be replaced until then,
+          e.g. to adopt a pondering decision as the actual one).
+        - done: Whether the decision was completed (and on_done was called).
+        - result: The result of the decision, once it's done.
+    """
+    def __init__(self, on_done):
+        self.on_done = on_done
+        self.done = False
+        self.result = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """
+        Stops the decision (if it's still running) and drops its result, so on_done won't be called.
+        """
+        self.cancel_event.set()
+
+
+class AIWorker:
+    """
+    Runs the decisions of the AI players one at a time, in a worker thread, and posts their results to the Tk thread.
+    """
+    def __init__(self, master, poll_interval_ms=_POLL_INTERVAL_MS):
+        self._master = master
+        self._poll_interval_ms = poll_interval_ms
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._results = queue.Queue()
+        self._jobs = set()  # The jobs that weren't completed or cancelled yet
+        self._polling = None
+
+    def submit(self, decide, on_done=None, background=True):
+        """
+        Schedules a decision. Decisions run in the order they were submitted.
+        :param decide: Called with the cancel event of the job (a threading.Event), and returns the result. It may
+            raise search.SearchCancelled once the event is set.
+        :param on_done: Called with the result in the Tk thread (unless the job is cancelled).
+        :param background: Whether to run the decision in the worker thread, or in the Tk thread (for cheap decisions).
+        :return: The Job.
+        """
+        job = Job(on_done)
+        self._jobs.add(job)
+        if background:
+            self._executor.submit(self._run, job, decide)
+            if self._polling is None:
+                self._polling = self._master.after(self._poll_interval_ms, self._poll)
+        else:
+            self._master.after(0, self._run_now, job, decide)
+        return job
+
+    def cancel(self, job):
+        """
+        Cancels a decision (if it wasn't completed yet), so polling stops once no other decision is running.
+        """
+        job.cancel()
+        self._jobs.discard(job)
+
+    def cancel_all(self):
+        """
+        Cancels all the decisions that weren't completed yet.
+        """
+        for job in self._jobs:
+            job.cancel()
+        self._jobs.clear()
+
+    def close(self):
+        """
+        Cancels all the decisions, without waiting for the worker thread (a search stops at its next check of the
+        cancel event).
+        """
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+        if self._polling is not None:
+            self._master.after_cancel(self._polling)
+            self._polling = None
+
+    def _run(self, job, decide):
+        """
+        Runs a decision in the worker thread.
+        """
+        result, error = None, None
+        if not job.cancelled:
+            try:
+                result = decide(job.cancel_event)
+            except SearchCancelled:
+                pass
+            except Exception as exception:  # Raised in the Tk thread (see _poll)
+                error = exception
+        self._results.put((job, result, error))
+
+    def _run_now(self, job, decide):
+        if not job.cancelled:
+            self._complete(job, decide(job.cancel_event), None)
+
+    def _poll(self):
+        """
+        Delivers the results of the completed decisions in the Tk thread, and keeps polling while decisions are
+        running.
+        """
+        self._polling = None
+        try:
+            while True:
+                try:
+                    job, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if not job.cancelled:
+                    self._complete(job, result, error)
+        finally:
+            if self._jobs and self._polling is None:
+                self._polling = self._master.after(self._poll_interval_ms, self._poll)
+
+    def _complete(self, job, result, error):
+        self._jobs.discard(job)
+        if error is not None:
+            raise error
+        job.done, job.result = True, result
+        if job.on_done is not None:
+            job.on_done(result)
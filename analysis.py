@@ -0,0 +1,105 @@
+"""
+Headless analysis of a position: the score of every move, by the alpha-beta search or, near the end of the game, by
+the endgame solver.
+
+The position is given by the moves that reach it from the start position, in the usual notation: the column letter
+and the row number of every move (e.g. 'f4f5c6', where 'f5' is the cell (4, 5)), as in the perft divide output.
+Passes aren't written: a player who has no valid moves passes by itself.
+"""
+import bitboard
+import endgame
+import heuristics
+from game_state import GameState, player_number
+from position import Position
+from transposition_table import TranspositionTable
+
+DEFAULT_DEPTH = 6
+_TABLE_SIZE_MB = 16
+
+
+def cell_name(row, col):
+    """
+    Returns the notation of a cell (e.g. 'f5' for (4, 5)).
+    """
+    return chr(ord('a') + col) + str(row + 1)
+
+
+def parse_moves(text):
+    """
+    Parses a sequence of moves (e.g. 'f4f5c6', case-insensitive and with optional spaces).
+    :return: List of (row, col) cells.
+    """
+    text = "".join(text.lower().split())
+    moves = []
+    index = 0
+    while index < len(text):
+        letter = text[index]
+        end = index + 1
+        while end < len(text) and text[end].isdigit():
+            end += 1
+        if not 'a' <= letter <= 'z' or end == index + 1:
+            raise ValueError(f"Invalid move '{text[index:end]}' (expected a column letter and a row number, e.g. f5)")
+        moves.append((int(text[index + 1:end]) - 1, ord(letter) - ord('a')))
+        index = end
+    return moves
+
+
+def replay(moves, size=bitboard.BOARD_SIZE):
+    """
+    Plays moves from the start position, where a player who has no valid moves passes.
+    :return: The GameState that the moves reach.
+    """
+    state = GameState(size)
+    for ply, (row, col) in enumerate(moves):
+        if not state.get_valid_moves_mask() and not state.is_game_over():
+            state.pass_turn()
+        if not (0 <= row < size and 0 <= col < size) or state.is_valid_move(row, col) != 0:
+            raise ValueError(f"The move {ply + 1} ({cell_name(row, col)}) is illegal")
+        state.make_move(row, col)
+    if not state.get_valid_moves_mask() and not state.is_game_over():
+        state.pass_turn()
+    return state
+
+
+def analyse(moves, depth=DEFAULT_DEPTH, endgame_empties=heuristics.ENDGAME_EMPTIES, size=bitboard.BOARD_SIZE):
+    """
+    Scores every valid move of the position that the moves reach, from the point of view of the player to move.
+    :param depth: The depth of the search of every move.
+    :param endgame_empties: Positions with at most this number of empty squares are solved instead: the scores are
+        the final disc differentials with perfect play.
+    :return: The state, the method of the scores ('depth N' or 'solved'), and the list of the (move, score) pairs,
+        the best first (the first valid move first on ties).
+    """
+    state = replay(moves, size)
+    valid_moves = state.get_valid_moves()
+    board, player = state.to_array(), player_number(state.current_player)
+    table = TranspositionTable(_TABLE_SIZE_MB)
+
+    if endgame_empties is not None and state.geometry.squares - state.red_counter - state.white_counter <= \
+            endgame_empties:
+        method = 'solved'
+        position = Position.from_board(board, player, hashed=True)
+        solver = endgame.EndgameSolver(endgame.EXACT, table=table)
+        scores = []
+        for row, col in valid_moves:
+            square = position.geometry.square_index(row, col)
+            flips = position.make_move(square)
+            scores.append(-solver.solve(position))
+            position.unmake_move(square, flips)
+    else:
+        method = f"depth {depth}"
+        scores = heuristics.score_moves(board, valid_moves, depth, player, table)
+
+    ranked = sorted(zip(valid_moves, scores), key=lambda pair: -pair[1])  # A stable sort keeps the ties in order
+    return state, method, ranked
+
+
+def format_analysis(state, method, ranked):
+    """
+    Returns a human readable report of an analysis (see the analyse function).
+    """
+    if state.is_game_over():
+        return f"The game is over: red {state.red_counter}, white {state.white_counter}"
+    lines = [f"{state.current_player.name.capitalize()} to move, {method}:"]
+    lines.extend(f"{cell_name(row, col)}: {score:+g}" for (row, col), score in ranked)
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+"""
+Batched engine for mass simulation: thousands of games advance together, a ply at a time.
+
+The games are held as NumPy arrays of uint64 bitboards (see the bitboard module): the discs of the side to move and
+of its opponent in every game. The legal moves, the flips, the disc counts and the positional scores of the whole
+batch are computed by the same shifts and masks as the bitboard module, applied to the arrays, so the per-game
+Python work of a ply is gone.
+
+Strategies:
+- 'random': A uniformly random legal move.
+- 'H1': The move with the best mobility difference (as heuristics.choose_move_with_best_mobility).
+- 'H2': The move with the best positional score (as heuristics.choose_move_with_best_positional_heuristic).
+Ties are broken by the first move in row-major order, like the one-ply heuristics.
+"""
+import numpy as np
+import game_records
+import heuristics
+from game_state import GameState
+
+STRATEGIES = ('random', 'H1', 'H2')
+
+_BOARD_SIZE = 8
+_BATCH_SIZE = 1 << 14  # Number of games that are simulated together.
+_ONE = np.uint64(1)
+_INNER_COLUMNS_MASK = np.uint64(0x7E7E7E7E7E7E7E7E)
+_SHIFTS = tuple(np.uint64(shift) for shift in (1, 7, 8, 9))
+_VERTICAL_SHIFT = np.uint64(8)
+_RUN_LENGTH = 6  # At most 6 opponent discs can be in a row.
+
+if hasattr(np, 'bitwise_count'):  # NumPy 2.0+
+    popcount = np.bitwise_count
+else:
+    def popcount(masks):
+        """
+        Returns the number of set bits of every mask.
+        """
+        masks = masks - ((masks >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        masks = (masks & np.uint64(0x3333333333333333)) + ((masks >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        masks = (masks + (masks >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return (masks * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def legal_moves(own, opp):
+    """
+    Returns the bitmasks of the legal moves of the owners of `own` (see bitboard.legal_moves).
+    """
+    empty = ~(own | opp)
+    inner_opp = opp & _INNER_COLUMNS_MASK
+    moves = np.zeros_like(own)
+
+    for shift in _SHIFTS:
+        mask = opp if shift == _VERTICAL_SHIFT else inner_opp
+
+        run = (own << shift) & mask
+        for _ in range(_RUN_LENGTH - 1):
+            run |= (run << shift) & mask
+        moves |= (run << shift) & empty
+
+        run = (own >> shift) & mask
+        for _ in range(_RUN_LENGTH - 1):
+            run |= (run >> shift) & mask
+        moves |= (run >> shift) & empty
+
+    return moves
+
+
+def flip_masks(own, opp, moves):
+    """
+    Returns the bitmasks of the opponent discs that are flipped by the moves (a single bit per game, see
+    bitboard.flip_mask).
+    """
+    inner_opp = opp & _INNER_COLUMNS_MASK
+    flips = np.zeros_like(own)
+
+    for shift in _SHIFTS:
+        mask = opp if shift == _VERTICAL_SHIFT else inner_opp
+
+        run = (moves << shift) & mask
+        for _ in range(_RUN_LENGTH - 1):
+            run |= (run << shift) & mask
+        flips |= np.where((run << shift) & own, run, 0)  # Only a run that ends with an own disc is flipped
+
+        run = (moves >> shift) & mask
+        for _ in range(_RUN_LENGTH - 1):
+            run |= (run >> shift) & mask
+        flips |= np.where((run >> shift) & own, run, 0)
+
+    return flips
+
+
+def positional_scores(own, opp):
+    """
+    Returns the positional heuristic of the owners of `own` (see heuristics.positional_heuristic).
+    """
+    scores = np.zeros(len(own), dtype=np.int64)
+    for weight, mask in heuristics.positional_weight_masks():
+        mask = np.uint64(mask)
+        scores += weight * (popcount(own & mask).astype(np.int64) - popcount(opp & mask))
+    return scores
+
+
+def _lowest_bits(masks):
+    return masks & (~masks + _ONE)
+
+
+def _random_moves(own, opp, legal, rng):
+    """
+    Chooses a uniformly random legal move in every game: the k-th legal move, for a random k.
+    """
+    choices = (rng.random(len(legal)) * popcount(legal)).astype(np.int64)
+    for skipped in range(int(choices.max(initial=0))):
+        legal = np.where(choices > skipped, legal & (legal - _ONE), legal)  # Clears the lowest legal move
+    return _lowest_bits(legal)
+
+
+def _best_moves(own, opp, legal, score):
+    """
+    Chooses the legal move with the best score in every game (the first one in row-major order on ties).
+    :param score: Returns the scores of the moves from the point of view of the player who made them, given the
+        (own, opp) discs after the moves.
+    """
+    best_moves = np.zeros_like(legal)
+    best_scores = np.full(len(legal), np.iinfo(np.int64).min)
+    for square in range(_BOARD_SIZE * _BOARD_SIZE):
+        bit = np.uint64(1 << square)
+        games = np.flatnonzero(legal & bit)
+        if len(games) == 0:
+            continue
+        game_own, game_opp = own[games], opp[games]
+        flips = flip_masks(game_own, game_opp, np.full(len(games), bit))
+        scores = score(game_own | flips | bit, game_opp & ~flips)
+        better = scores > best_scores[games]
+        best_scores[games[better]] = scores[better]
+        best_moves[games[better]] = bit
+    return best_moves
+
+
+def _mobility_moves(own, opp, legal, rng):
+    return _best_moves(own, opp, legal, lambda own, opp: popcount(legal_moves(own, opp)).astype(np.int64) -
+                       popcount(legal_moves(opp, own)))
+
+
+def _positional_moves(own, opp, legal, rng):
+    return _best_moves(own, opp, legal, positional_scores)
+
+
+_CHOOSERS = {'random': _random_moves, 'H1': _mobility_moves, 'H2': _positional_moves}
+
+
+class GameBatch:
+    """
+    A batch of games, which are played together a ply at a time.
+    - Attributes:
+        - own, opp: Arrays of the discs of the side to move and of its opponent in every game.
+        - red_to_move: Boolean array of whether red is the side to move.
+        - passed: Boolean array of whether the last ply was a pass.
+        - done: Boolean array of whether the game is over.
+    """
+    def __init__(self, num_of_games):
+        red, white = GameState().get_discs()
+        self.own = np.full(num_of_games, red, dtype=np.uint64)
+        self.opp = np.full(num_of_games, white, dtype=np.uint64)
+        self.red_to_move = np.ones(num_of_games, dtype=bool)
+        self.passed = np.zeros(num_of_games, dtype=bool)
+        self.done = np.zeros(num_of_games, dtype=bool)
+
+    def step(self, red_strategy, white_strategy, rng):
+        """
+        Plays a ply in every game that isn't over: the move of the strategy of the side to move, or a pass.
+        :param rng: A numpy.random.Generator, for the random strategies.
+        """
+        games = np.flatnonzero(~self.done)
+        own, opp = self.own[games], self.opp[games]
+        legal = legal_moves(own, opp)
+
+        # A game is over when both players have to pass
+        cannot_move = legal == 0
+        over = cannot_move & self.passed[games]
+        self.done[games[over]] = True
+        self.passed[games] = cannot_move
+
+        moves = np.zeros_like(legal)
+        red_to_move = self.red_to_move[games]
+        for strategy, players in ((red_strategy, red_to_move), (white_strategy, ~red_to_move)):
+            movers = np.flatnonzero(players & ~cannot_move)
+            if len(movers):
+                moves[movers] = _CHOOSERS[strategy](own[movers], opp[movers], legal[movers], rng)
+
+        flips = flip_masks(own, opp, moves)
+        own, opp = own | flips | moves, opp & ~flips
+        playing = games[~over]  # The side to move is switched (also by a pass)
+        self.own[playing], self.opp[playing] = opp[~over], own[~over]
+        self.red_to_move[playing] = ~red_to_move[~over]
+
+    def play(self, red_strategy, white_strategy, rng):
+        """
+        Plays all the games to the end.
+        """
+        while not self.done.all():
+            self.step(red_strategy, white_strategy, rng)
+
+    def discs(self):
+        """
+        Returns the arrays of the (red, white) discs of every game.
+        """
+        return np.where(self.red_to_move, self.own, self.opp), np.where(self.red_to_move, self.opp, self.own)
+
+
+def simulate(num_of_games, red_strategy='random', white_strategy='random', seed=0, batch_size=_BATCH_SIZE):
+    """
+    Plays games between two strategies from the start position, in batches.
+    :return: The arrays of the numbers of red and white discs at the end of every game.
+    """
+    for strategy in (red_strategy, white_strategy):
+        if strategy not in _CHOOSERS:
+            raise ValueError(f"Unknown strategy '{strategy}' (expected one of {', '.join(STRATEGIES)})")
+    rng = np.random.default_rng(seed)
+    red_counts, white_counts = [], []
+    for start in range(0, num_of_games, batch_size):
+        batch = GameBatch(min(batch_size, num_of_games - start))
+        batch.play(red_strategy, white_strategy, rng)
+        red, white = batch.discs()
+        red_counts.append(popcount(red).astype(np.int64))
+        white_counts.append(popcount(white).astype(np.int64))
+    return np.concatenate(red_counts or [np.zeros(0, dtype=np.int64)]), \
+        np.concatenate(white_counts or [np.zeros(0, dtype=np.int64)])
+
+
+def simulate_match(strategy_a, strategy_b, num_of_games, seed=0, batch_size=_BATCH_SIZE):
+    """
+    Plays a match between two strategies, where each one plays red in half of the games.
+    :return: The results from the point of view of the first strategy: list of (score, disc differential) pairs (see
+        tournament.summarize).
+    """
+    half = (num_of_games + 1) // 2
+    a_red, b_white = simulate(half, strategy_a, strategy_b, seed, batch_size)
+    b_red, a_white = simulate(num_of_games - half, strategy_b, strategy_a, seed + 1, batch_size)
+    differentials = np.concatenate([a_red - b_white, a_white - b_red]).tolist()
+    return [(1.0 if diff > 0 else 0.5 if diff == 0 else 0.0, diff) for diff in differentials]
+
+
+def replay_records(records, plies=None):
+    """
+    Replays many game records together, a ply at a time (see the game_records module).
+    :param records: A sequence of the moves of every game (bytes, with game_records.PASS for a pass).
+    :param plies: The number of moves to replay in every game (at most its number of moves). Defaults to all of them.
+    :return: The arrays of the (red, white) discs of every game after its moves, and whether red is to move.
+    """
+    num_of_games = len(records)
+    lengths = np.fromiter((len(moves) for moves in records), dtype=np.int64, count=num_of_games)
+    ends = lengths if plies is None else np.minimum(lengths, plies)
+    moves = np.full((num_of_games, int(ends.max(initial=0))), game_records.PASS, dtype=np.uint64)
+    for game, game_moves in enumerate(records):
+        end = int(ends[game])
+        moves[game, :end] = np.frombuffer(bytes(game_moves[:end]), dtype=np.uint8)
+
+    batch = GameBatch(num_of_games)
+    for ply in range(moves.shape[1]):
+        games = np.flatnonzero(ends > ply)
+        own, opp, squares = batch.own[games], batch.opp[games], moves[games, ply]
+        placed = np.where(squares == game_records.PASS, 0, _ONE << (squares & np.uint64(63)))
+        flips = flip_masks(own, opp, placed)
+        batch.own[games], batch.opp[games] = opp & ~flips, own | flips | placed
+        batch.red_to_move[games] = ~batch.red_to_move[games]
+    return (*batch.discs(), batch.red_to_move)
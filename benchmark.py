@@ -0,0 +1,225 @@
+"""
+Benchmark suite of the move generation, the evaluation and the search.
+
+All the benchmarks run over a fixed corpus of positions (opening, midgame and endgame positions of seeded random
+games), so results of different runs are comparable:
+- get_valid_moves, simulate_move: Calls per second.
+- mobility_heuristic, positional_heuristic: Leaf evaluations per second.
+- minimax_decision: Seconds to search every position of a phase to each depth (time-to-depth), and the nodes per
+  second of these searches (the search throughput, whatever the number of nodes that the move ordering saves).
+
+The results are saved as JSON, and can be compared against a stored baseline to flag the metrics that regressed by
+more than a threshold.
+"""
+import json
+import platform
+import random
+import time
+import heuristics
+from game_state import GameState, player_number
+
+RATE_UNIT = 'calls/s'
+NODE_RATE_UNIT = 'nodes/s'
+TIME_UNIT = 's'
+
+_CORPUS_SEED = 20551
+_GAMES_PER_PHASE = 8
+# The range of the number of plies of the positions of every phase.
+_PHASE_PLIES = {'opening': (4, 10), 'midgame': (20, 36), 'endgame': (44, 50)}
+_MIN_TIME = 0.2  # Minimal duration in seconds of a single measurement of a rate.
+_REPEAT = 3  # Number of measurements of every metric (the best one is reported).
+
+
+def build_corpus(seed=_CORPUS_SEED, games_per_phase=_GAMES_PER_PHASE):
+    """
+    Builds the fixed corpus of positions: for every phase, one position of every seeded random game.
+    :return: Dictionary of phase names to lists of (board, player) pairs, where the player has valid moves.
+    """
+    rng = random.Random(seed)
+    corpus = {}
+    for phase, (min_plies, max_plies) in _PHASE_PLIES.items():
+        positions = []
+        while len(positions) < games_per_phase:
+            state = _play_random_plies(rng, rng.randint(min_plies, max_plies))
+            if state is not None:
+                positions.append((state.to_array(), player_number(state.current_player)))
+        corpus[phase] = positions
+    return corpus
+
+
+def _play_random_plies(rng, plies):
+    """
+    Returns the state after the number of random plies (passes included), or None if the game ended before it or the
+    player to move has to pass.
+    """
+    state = GameState()
+    for _ in range(plies):
+        if state.is_game_over():
+            return None
+        valid_moves = state.get_valid_moves()
+        if valid_moves:
+            state.make_move(*rng.choice(valid_moves))
+        else:
+            state.pass_turn()
+    return state if state.get_valid_moves_mask() else None
+
+
+def _measure_rate(function, calls_per_run):
+    """
+    Returns the best rate (calls per second) of a function, which makes `calls_per_run` calls every time it's run.
+    """
+    best = 0.0
+    for _ in range(_REPEAT):
+        runs = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < _MIN_TIME:
+            function()
+            runs += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, runs * calls_per_run / elapsed)
+    return best
+
+
+def _measure_time(function):
+    """
+    Returns the best duration in seconds of a function.
+    """
+    best = float('inf')
+    for _ in range(_REPEAT):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_move_generation(positions):
+    """
+    Measures the calls per second of get_valid_moves, and of simulate_move over every valid move of the positions.
+    """
+    moves = [(board, player, heuristics.get_valid_moves(board, player)) for board, player in positions]
+    num_of_moves = sum(len(valid_moves) for _, _, valid_moves in moves)
+
+    def generate():
+        for board, player in positions:
+            heuristics.get_valid_moves(board, player)
+
+    def simulate():
+        for board, player, valid_moves in moves:
+            for row, col in valid_moves:
+                heuristics.simulate_move(heuristics.copy_board(board), row, col, player)
+
+    return {'get_valid_moves': _measure_rate(generate, len(positions)),
+            'simulate_move': _measure_rate(simulate, num_of_moves)}
+
+
+def benchmark_evaluation(positions):
+    """
+    Measures the leaf evaluations per second of both heuristics.
+    """
+    def evaluate(heuristic):
+        def run():
+            for board, player in positions:
+                heuristic(board, player)
+        return run
+
+    return {'mobility_heuristic': _measure_rate(evaluate(heuristics.mobility_heuristic), len(positions)),
+            'positional_heuristic': _measure_rate(evaluate(heuristics.positional_heuristic), len(positions))}
+
+
+def benchmark_search(positions, depth):
+    """
+    Measures the time to search every position to the depth with minimax_decision (without the endgame solver,
+    so every phase measures the same heuristic search).
+    :return: The seconds of the searches, and their nodes per second.
+    """
+    nodes = [0]
+
+    def run():
+        nodes[0] = 0
+        for board, player in positions:
+            search_info = {}
+            heuristics.minimax_decision(board, heuristics.get_valid_moves(board, player), depth, player,
+                                        endgame_empties=None, telemetry=search_info)
+            nodes[0] += search_info['nodes']
+    seconds = _measure_time(run)
+    return seconds, nodes[0] / seconds
+
+
+def run_benchmarks(max_depth=6, progress=None):
+    """
+    Runs the whole suite over the fixed corpus.
+    :param max_depth: The deepest minimax_decision search to measure.
+    :param progress: An optional callback, progress(metric_name), called before every metric is measured.
+    :return: The results: metadata and the metrics, as a dictionary of names to {'value', 'unit'} dictionaries.
+    """
+    corpus = build_corpus()
+    all_positions = [position for positions in corpus.values() for position in positions]
+    metrics = {}
+
+    def add(name, value, unit):
+        metrics[name] = {'value': value, 'unit': unit}
+
+    if progress is not None:
+        progress('move generation')
+    for name, value in benchmark_move_generation(all_positions).items():
+        add(name, value, RATE_UNIT)
+
+    if progress is not None:
+        progress('evaluation')
+    for name, value in benchmark_evaluation(all_positions).items():
+        add(name, value, RATE_UNIT)
+
+    for phase, positions in corpus.items():
+        for depth in range(1, max_depth + 1):
+            name = f"minimax_decision.{phase}.depth{depth}"
+            if progress is not None:
+                progress(name)
+            seconds, nodes_per_second = benchmark_search(positions, depth)
+            add(name, seconds, TIME_UNIT)
+            add(f"{name}.nodes", nodes_per_second, NODE_RATE_UNIT)
+
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'time': time.time(),
+            'corpus_size': len(all_positions), 'metrics': metrics}
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compares the metrics of two runs.
+    :param threshold: The relative slowdown (e.g. 0.1 - 10%) above which a metric is a regression.
+    :return: List of (name, baseline value, current value, relative slowdown) of the regressed metrics.
+    """
+    regressions = []
+    for name, metric in results['metrics'].items():
+        base_metric = baseline['metrics'].get(name)
+        if base_metric is None or base_metric['unit'] != metric['unit'] or not base_metric['value']:
+            continue
+        base_value, value = base_metric['value'], metric['value']
+        if metric['unit'] == TIME_UNIT:
+            slowdown = value / base_value - 1
+        else:
+            slowdown = base_value / value - 1 if value else float('inf')
+        if slowdown > threshold:
+            regressions.append((name, base_value, value, slowdown))
+    return regressions
+
+
+def save_results(path, results):
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def load_results(path):
+    with open(path, "r") as results_file:
+        return json.load(results_file)
+
+
+def format_results(results, regressions=()):
+    """
+    Returns a human readable report of the results, and of the regressions if there are any.
+    """
+    lines = [f"{name:<40}{metric['value']:>14.4f} {metric['unit']}" if metric['unit'] == TIME_UNIT else
+             f"{name:<40}{metric['value']:>14.0f} {metric['unit']}" for name, metric in results['metrics'].items()]
+    for name, base_value, value, slowdown in regressions:
+        lines.append(f"REGRESSION {name}: {base_value:.4g} -> {value:.4g} ({slowdown:+.1%} slower)")
+    return "\n".join(lines)
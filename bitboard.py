@@ -0,0 +1,438 @@
+"""
+Bitboard engine for Reversi.
+
+A position is represented by two 64-bit integers, one per player, where bit (row * 8 + col) is set when the player
+owns that cell. Legal-move generation, flip computation and disc counting are done with shift-and-mask operations
+on whole rows/columns/diagonals at once, instead of walking the board cell by cell.
+
+The module-level functions are for the standard 8x8 board. Other board sizes (even sizes from 4 to 10) have the same
+operations, with the masks of their size, in their Geometry (see the geometry function).
+"""
+_BOARD_SIZE = 8
+
+FULL_MASK = (1 << (_BOARD_SIZE * _BOARD_SIZE)) - 1
+_INNER_COLUMNS_MASK = 0x7E7E7E7E7E7E7E7E  # All the cells, except of the first and last columns.
+
+# Shift amounts of the 4 lines (horizontal, anti-diagonal, vertical, diagonal), each is used in both directions.
+# Horizontal and diagonal lines must not wrap around the board edges, therefore the opponent discs that are taken
+# into account along them are restricted to the inner columns.
+_SHIFTS = (1, 7, 8, 9)
+
+# Maps a (delta_row, delta_col) direction to its signed shift amount.
+DIRECTION_SHIFTS = {
+    (-1, -1): -9, (-1, 0): -8, (-1, 1): -7,
+    (0, -1): -1, (0, 1): 1,
+    (1, -1): 7, (1, 0): 8, (1, 1): 9
+}
+
+
+if hasattr(int, 'bit_count'):  # Python 3.10+
+    popcount = int.bit_count
+else:
+    def popcount(mask):
+        """
+        Returns the number of set bits (discs) in the mask.
+        """
+        return bin(mask).count('1')
+
+
+def square_index(row, col):
+    """
+    Returns the bit index of a cell.
+    """
+    return row * _BOARD_SIZE + col
+
+
+def square_to_cell(square):
+    """
+    Returns the (row, col) of a bit index.
+    """
+    return divmod(square, _BOARD_SIZE)
+
+
+def iter_squares(mask):
+    """
+    Yields the indexes of the set bits in the mask, in ascending (row-major) order.
+    """
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def mask_to_cells(mask):
+    """
+    Returns a list of (row, col) tuples for the set bits in the mask, in row-major order.
+    """
+    return [divmod(square, _BOARD_SIZE) for square in iter_squares(mask)]
+
+
+def cells_to_mask(cells):
+    """
+    Returns the bitmask of a list of (row, col) tuples (an empty mask for None).
+    """
+    mask = 0
+    for row, col in cells or ():
+        mask |= 1 << square_index(row, col)
+    return mask
+
+
+def from_board(board):
+    """
+    Converts a 2D array board (0 - empty, 1 - red, 2 - white) into a (red, white) pair of bitboards.
+    """
+    red = white = 0
+    bit = 1
+    for board_row in board:
+        for cell in board_row:
+            if cell == 1:
+                red |= bit
+            elif cell == 2:
+                white |= bit
+            bit <<= 1
+    return red, white
+
+
+def to_board(red, white):
+    """
+    Converts a (red, white) pair of bitboards into a 2D array board (0 - empty, 1 - red, 2 - white).
+    """
+    board = []
+    bit = 1
+    for _ in range(_BOARD_SIZE):
+        board_row = []
+        for _ in range(_BOARD_SIZE):
+            board_row.append(1 if red & bit else 2 if white & bit else 0)
+            bit <<= 1
+        board.append(board_row)
+    return board
+
+
+def split_board(board, player):
+    """
+    Converts a 2D array board into a (player, opponent) pair of bitboards.
+    """
+    red, white = from_board(board)
+    return (red, white) if player == 1 else (white, red)
+
+
+def legal_moves(own, opp):
+    """
+    Returns a bitmask of the empty cells in which the owner of `own` can place a disc.
+    """
+    empty = ~(own | opp) & FULL_MASK
+    inner_opp = opp & _INNER_COLUMNS_MASK
+    moves = 0
+
+    for shift in _SHIFTS:
+        mask = opp if shift == 8 else inner_opp
+
+        # Flood towards the higher bits, at most 6 opponent discs can be in a row.
+        run = (own << shift) & mask
+        run |= (run << shift) & mask
+        run |= (run << shift) & mask
+        run |= (run << shift) & mask
+        run |= (run << shift) & mask
+        run |= (run << shift) & mask
+        moves |= (run << shift) & empty
+
+        # Flood towards the lower bits.
+        run = (own >> shift) & mask
+        run |= (run >> shift) & mask
+        run |= (run >> shift) & mask
+        run |= (run >> shift) & mask
+        run |= (run >> shift) & mask
+        run |= (run >> shift) & mask
+        moves |= (run >> shift) & empty
+
+    return moves
+
+
+def flip_mask(own, opp, square, shifts=None):
+    """
+    Returns a bitmask of the opponent discs that are flipped when the owner of `own` places a disc at `square`.
+    :param shifts: Signed shift amounts of the directions to check (see DIRECTION_SHIFTS). Defaults to all of them.
+    """
+    inner_opp = opp & _INNER_COLUMNS_MASK
+    move = 1 << square
+    flips = 0
+
+    for shift in shifts or (1, 7, 8, 9, -1, -7, -8, -9):
+        mask = opp if shift in (8, -8) else inner_opp
+        line = 0
+        if shift > 0:
+            cursor = (move << shift) & mask
+            while cursor:
+                line |= cursor
+                cursor = (cursor << shift) & mask
+            if line and (line << shift) & own:
+                flips |= line
+        else:
+            cursor = (move >> -shift) & mask
+            while cursor:
+                line |= cursor
+                cursor = (cursor >> -shift) & mask
+            if line and (line >> -shift) & own:
+                flips |= line
+
+    return flips
+
+
+def apply_move(own, opp, square):
+    """
+    Places a disc of the owner of `own` at `square` and returns the new (own, opp) pair.
+    """
+    move = 1 << square
+    flips = flip_mask(own, opp, square)
+    return own | move | flips, opp & ~(move | flips)
+
+
+# --- Symmetries ----
+def flip_vertical(mask):
+    """
+    Mirrors the board upside down (row r <--> row 7 - r).
+    """
+    return int.from_bytes(mask.to_bytes(8, 'little'), 'big')
+
+
+def flip_horizontal(mask):
+    """
+    Mirrors the board left to right (col c <--> col 7 - c).
+    """
+    mask = ((mask >> 1) & 0x5555555555555555) | ((mask & 0x5555555555555555) << 1)
+    mask = ((mask >> 2) & 0x3333333333333333) | ((mask & 0x3333333333333333) << 2)
+    return ((mask >> 4) & 0x0F0F0F0F0F0F0F0F) | ((mask & 0x0F0F0F0F0F0F0F0F) << 4)
+
+
+def flip_diagonal(mask):
+    """
+    Mirrors the board along its main diagonal (row <--> col).
+    """
+    temp = 0x0F0F0F0F00000000 & (mask ^ (mask << 28))
+    mask ^= temp ^ (temp >> 28)
+    temp = 0x3333000033330000 & (mask ^ (mask << 14))
+    mask ^= temp ^ (temp >> 14)
+    temp = 0x5500550055005500 & (mask ^ (mask << 7))
+    return mask ^ temp ^ (temp >> 7)
+
+
+def transform(mask, symmetry):
+    """
+    Applies one of the 8 symmetries of the board (0 - identity, 1 to 7 - the others) to the mask.
+    The symmetry is a combination of bits: 1 - flip horizontally, 2 - flip vertically, 4 - flip along the diagonal
+    (applied in this order).
+    """
+    if symmetry & 1:
+        mask = flip_horizontal(mask)
+    if symmetry & 2:
+        mask = flip_vertical(mask)
+    if symmetry & 4:
+        mask = flip_diagonal(mask)
+    return mask
+
+
+def inverse_symmetry(symmetry):
+    """
+    Returns the symmetry that reverts the given one.
+    """
+    # The flips commute, except that a flip along the diagonal swaps the horizontal and vertical flips.
+    if symmetry & 4 and symmetry & 3 in (1, 2):
+        return symmetry ^ 3
+    return symmetry
+
+
+def canonical(own, opp):
+    """
+    Returns the symmetry-normalised form of a position: the smallest (own, opp) pair among its 8 symmetries, and the
+    symmetry which produces it.
+    """
+    best = (own, opp)
+    best_symmetry = 0
+    for symmetry in range(1, 8):
+        candidate = (transform(own, symmetry), transform(opp, symmetry))
+        if candidate < best:
+            best, best_symmetry = candidate, symmetry
+    return best[0], best[1], best_symmetry
+
+
+# --- Board sizes ----
+BOARD_SIZE = _BOARD_SIZE  # The standard board size, and the default one.
+MIN_BOARD_SIZE = 4
+MAX_BOARD_SIZE = 10
+
+_geometries = {}  # The Geometry of every board size that was used (see the geometry function).
+
+
+class Geometry:
+    """
+    The squares of a board size, with its precomputed masks and its move generation.
+    A board of size n uses the bits 0 to n * n - 1, where bit (row * n + col) is the cell (row, col). The move
+    generation is specialised for the size: 8x8 boards use the module-level functions (which are unrolled for the
+    size), and other sizes use closures over the shifts and masks of the size.
+    - Attributes:
+        - size: The number of rows (and of columns).
+        - squares: The number of squares.
+        - full_mask: The mask of all the squares.
+        - corners_mask, c_squares_mask, x_squares_mask, edges_mask: The corners, the edge squares next to them, the
+          squares diagonally next to them, and the other edge squares.
+        - quadrant_masks: The masks of the 4 quadrants of the board.
+        - direction_shifts: Maps a (delta_row, delta_col) direction to its signed shift amount.
+        - legal_moves, flip_mask, apply_move: The functions of the module-level names, for the size.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.squares = size * size
+        self.full_mask = (1 << self.squares) - 1
+        self.direction_shifts = {(delta_row, delta_col): delta_row * size + delta_col
+                                 for delta_row in (-1, 0, 1) for delta_col in (-1, 0, 1) if delta_row or delta_col}
+
+        last = size - 1
+        cells = [(row, col) for row in range(size) for col in range(size)]
+        corners = {(0, 0), (0, last), (last, 0), (last, last)}
+        c_squares = {(row, col) for row, col in cells
+                     if any(abs(row - corner_row) + abs(col - corner_col) == 1 for corner_row, corner_col in corners)}
+        x_squares = {(row, col) for row, col in cells
+                     if any(abs(row - corner_row) == abs(col - corner_col) == 1 for corner_row, corner_col in corners)}
+        edges = {(row, col) for row, col in cells if row in (0, last) or col in (0, last)} - corners - c_squares
+        self.corners_mask = self.cells_to_mask(corners)
+        self.c_squares_mask = self.cells_to_mask(c_squares)
+        self.x_squares_mask = self.cells_to_mask(x_squares)
+        self.edges_mask = self.cells_to_mask(edges)
+        half = size // 2
+        self.quadrant_masks = tuple(self.cells_to_mask((row, col) for row, col in cells
+                                                       if (row >= half, col >= half) == quadrant)
+                                    for quadrant in ((False, False), (False, True), (True, False), (True, True)))
+
+        if size == _BOARD_SIZE:
+            self.legal_moves, self.flip_mask, self.apply_move = legal_moves, flip_mask, apply_move
+        else:
+            self.legal_moves, self.flip_mask, self.apply_move = _move_functions(size, self.full_mask,
+                                                                                self._inner_columns_mask())
+
+    def _inner_columns_mask(self):
+        return self.cells_to_mask((row, col) for row in range(self.size) for col in range(1, self.size - 1))
+
+    def square_index(self, row, col):
+        return row * self.size + col
+
+    def square_to_cell(self, square):
+        return divmod(square, self.size)
+
+    def mask_to_cells(self, mask):
+        """
+        Returns a list of (row, col) tuples for the set bits in the mask, in row-major order.
+        """
+        return [divmod(square, self.size) for square in iter_squares(mask)]
+
+    def cells_to_mask(self, cells):
+        """
+        Returns the bitmask of (row, col) tuples (an empty mask for None).
+        """
+        mask = 0
+        for row, col in cells or ():
+            mask |= 1 << (row * self.size + col)
+        return mask
+
+    def start_discs(self):
+        """
+        Returns the (red, white) discs of the start position: the 4 center cells, where red has the main diagonal.
+        """
+        center = self.size // 2
+        return self.cells_to_mask([(center - 1, center - 1), (center, center)]), \
+            self.cells_to_mask([(center - 1, center), (center, center - 1)])
+
+    def from_board(self, board):
+        """
+        Converts a 2D array board (0 - empty, 1 - red, 2 - white) into a (red, white) pair of bitboards.
+        """
+        red = white = 0
+        bit = 1
+        for board_row in board:
+            for cell in board_row:
+                if cell == 1:
+                    red |= bit
+                elif cell == 2:
+                    white |= bit
+                bit <<= 1
+        return red, white
+
+    def to_board(self, red, white):
+        """
+        Converts a (red, white) pair of bitboards into a 2D array board (0 - empty, 1 - red, 2 - white).
+        """
+        return [[1 if red >> square & 1 else 2 if white >> square & 1 else 0
+                 for square in range(row * self.size, (row + 1) * self.size)] for row in range(self.size)]
+
+    def split_board(self, board, player):
+        """
+        Converts a 2D array board into a (player, opponent) pair of bitboards.
+        """
+        red, white = self.from_board(board)
+        return (red, white) if player == 1 else (white, red)
+
+
+def geometry(size=_BOARD_SIZE):
+    """
+    Returns the Geometry of a board size, an even number from MIN_BOARD_SIZE to MAX_BOARD_SIZE (built on first use).
+    """
+    if size not in _geometries:
+        if size % 2 or not MIN_BOARD_SIZE <= size <= MAX_BOARD_SIZE:
+            raise ValueError(f"The board size must be an even number from {MIN_BOARD_SIZE} to {MAX_BOARD_SIZE}")
+        _geometries[size] = Geometry(size)
+    return _geometries[size]
+
+
+def _move_functions(size, full_mask, inner_columns_mask):
+    """
+    Builds the legal_moves, flip_mask and apply_move functions of a board size other than 8x8 (see the module-level
+    functions), over the shifts and masks of the size.
+    """
+    line_shifts = (1, size - 1, size, size + 1)
+    all_shifts = line_shifts + tuple(-shift for shift in line_shifts)
+    extra_steps = size - 3  # Steps of a flood after the first one: at most size - 2 opponent discs can be in a row
+
+    def size_legal_moves(own, opp):
+        empty = ~(own | opp) & full_mask
+        inner_opp = opp & inner_columns_mask
+        moves = 0
+        for shift in line_shifts:
+            mask = opp if shift == size else inner_opp
+            run = (own << shift) & mask
+            for _ in range(extra_steps):
+                run |= (run << shift) & mask
+            moves |= (run << shift) & empty
+            run = (own >> shift) & mask
+            for _ in range(extra_steps):
+                run |= (run >> shift) & mask
+            moves |= (run >> shift) & empty
+        return moves
+
+    def size_flip_mask(own, opp, square, shifts=None):
+        inner_opp = opp & inner_columns_mask
+        move = 1 << square
+        flips = 0
+        for shift in shifts or all_shifts:
+            mask = opp if shift in (size, -size) else inner_opp
+            line = 0
+            if shift > 0:
+                cursor = (move << shift) & mask
+                while cursor:
+                    line |= cursor
+                    cursor = (cursor << shift) & mask
+                if line and (line << shift) & own:
+                    flips |= line
+            else:
+                cursor = (move >> -shift) & mask
+                while cursor:
+                    line |= cursor
+                    cursor = (cursor >> -shift) & mask
+                if line and (line >> -shift) & own:
+                    flips |= line
+        return flips
+
+    def size_apply_move(own, opp, square):
+        move = 1 << square
+        flips = size_flip_mask(own, opp, square)
+        return own | move | flips, opp & ~(move | flips)
+
+    return size_legal_moves, size_flip_mask, size_apply_move
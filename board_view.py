@@ -0,0 +1,108 @@
+"""
+The board of the GUI, drawn on a single Tkinter canvas.
+
+Every cell is a rectangle item of the canvas. Showing a game state doesn't draw it right away: the state is kept as
+pending, and the board is redrawn once per event-loop tick, with the latest pending state, and only the cells whose
+colour has changed since the last frame are updated. The frames are capped to a configurable rate, so a fast game
+(e.g. AI against AI) isn't slowed down by drawing its intermediate positions.
+"""
+import time
+import tkinter as tk
+import bitboard
+import colors
+from game_state import GameState
+
+_CELL_SIZE = 50  # In pixels
+DEFAULT_FRAME_RATE = 60
+
+
+class BoardCanvas:
+    """
+    The board of the GUI.
+    - Attributes:
+        - canvas: The Tkinter canvas.
+        - frames: Number of frames that were drawn.
+        - size: The board size (the number of rows and of columns).
+    """
+    def __init__(self, master, on_click, frame_rate=DEFAULT_FRAME_RATE, cell_size=_CELL_SIZE,
+                 size=bitboard.BOARD_SIZE):
+        """
+        :param on_click: Called with the (row, col) of a cell that was clicked.
+        :param frame_rate: The maximum number of frames per second (0 or None - a frame on every tick).
+        """
+        pixels = size * cell_size
+        self.canvas = tk.Canvas(master, width=pixels, height=pixels, highlightthickness=0, bg=colors.GRID_COLOR)
+        self.frames = 0
+        self.size = size
+        self._on_click = on_click
+        self._cell_size = cell_size
+        self._frame_interval = 1 / frame_rate if frame_rate else 0
+        self._last_frame = -self._frame_interval
+        self._pending = None  # The state of the next frame
+        self._scheduled = None  # The id and kind ('idle' or 'timer') of the scheduled frame
+
+        self._cells = [[self.canvas.create_rectangle(col * cell_size, row * cell_size, (col + 1) * cell_size,
+                                                     (row + 1) * cell_size, fill=colors.BASIC_COLOR,
+                                                     outline=colors.GRID_COLOR, width=2)
+                        for col in range(size)] for row in range(size)]
+        self._colors = [[colors.BASIC_COLOR] * size for _ in range(size)]
+        self.canvas.bind("<Button-1>", self._click)
+
+    def pack(self, **options):
+        self.canvas.pack(**options)
+
+    def show(self, state: GameState):
+        """
+        Schedules a frame of the game state (the state is copied, so it can change meanwhile). When several states
+        are shown before the frame is drawn, only the last one is drawn.
+        """
+        self._pending = state.copy()
+        wait = self._last_frame + self._frame_interval - time.monotonic()
+        if wait <= 0:
+            # On the next idle tick (which is also run by update_idletasks, while a blocking game loop runs)
+            if self._scheduled is not None and self._scheduled[1] == 'timer':
+                self.canvas.after_cancel(self._scheduled[0])
+                self._scheduled = None
+            if self._scheduled is None:
+                self._scheduled = (self.canvas.after_idle(self._draw), 'idle')
+        elif self._scheduled is None:
+            self._scheduled = (self.canvas.after(int(wait * 1000) + 1, self._draw), 'timer')
+
+    def flush(self):
+        """
+        Draws the pending frame right away (if there is one).
+        """
+        if self._scheduled is not None:
+            self.canvas.after_cancel(self._scheduled[0])
+        self._draw()
+
+    def _draw(self):
+        self._scheduled = None
+        state, self._pending = self._pending, None
+        if state is None:
+            return
+
+        valid_moves = state.get_valid_moves_mask()
+        for row in range(self.size):
+            for col in range(self.size):
+                cell = state.get_cell(row, col)
+                if cell == 1:
+                    color = colors.RED_COLOR
+                elif cell == 2:
+                    color = colors.WHITE_COLOR
+                elif valid_moves >> (row * self.size + col) & 1:
+                    color = colors.MARK_COLOR
+                else:
+                    color = colors.BASIC_COLOR
+
+                if self._colors[row][col] != color:
+                    self.canvas.itemconfigure(self._cells[row][col], fill=color)
+                    self._colors[row][col] = color
+
+        self.frames += 1
+        self._last_frame = time.monotonic()
+
+    def _click(self, event):
+        row, col = event.y // self._cell_size, event.x // self._cell_size
+        if 0 <= row < self.size and 0 <= col < self.size:
+            self._on_click(row, col)
@@ -0,0 +1,164 @@
+"""
+Opening book: precomputed moves for the first plies of the game.
+
+The book is built offline by a deep alpha-beta search of the positions near the start (see build_book), and stored
+as a binary table which is memory-mapped when it's opened, so opening it takes no time and a lookup is a binary search
+of O(log n) records.
+
+File format (little-endian): a header (magic, number of records), followed by fixed-size records sorted by
+(own, opp):
+- own, opp (uint64): The discs of the side to move and of its opponent, in the canonical form of the position (the
+  smallest of its 8 symmetries, see bitboard.canonical), so the symmetric positions share a single record.
+- square (uint8): The bit index of the best move, in the canonical form.
+- depth (uint8): The depth of the search that chose the move.
+- score (int16): The score of the move, from the point of view of the side to move.
+"""
+import mmap
+import os
+import struct
+import bitboard
+import heuristics
+from game_state import GameState
+from transposition_table import TranspositionTable
+
+_MAGIC = b'RVBOOK01'
+_HEADER = struct.Struct('<8sQ')
+_RECORD = struct.Struct('<QQBBh')
+_KEY = struct.Struct('<QQ')
+_SCORE_LIMIT = 2 ** 15 - 1
+_TABLE_SIZE_MB = 64
+
+
+class OpeningBook:
+    """
+    A read-only opening book file, memory-mapped (see the module's documentation for the format).
+    - Attributes:
+        - path: The path of the book file.
+        - size: Number of positions in the book.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # An empty file can't be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book")
+
+        magic, self.size = _HEADER.unpack_from(self._map, 0) if len(self._map) >= _HEADER.size else (None, 0)
+        if magic != _MAGIC or len(self._map) != _HEADER.size + self.size * _RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def probe(self, own, opp):
+        """
+        Looks up a position given from the point of view of the side to move.
+        :return: The (square, depth, score) of the book move, or None if the position isn't in the book.
+        """
+        canonical_own, canonical_opp, symmetry = bitboard.canonical(own, opp)
+        key = (canonical_own, canonical_opp)
+
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER.size + middle * _RECORD.size
+            record_key = _KEY.unpack_from(self._map, offset)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                _, _, square, depth, score = _RECORD.unpack_from(self._map, offset)
+                move = bitboard.transform(1 << square, bitboard.inverse_symmetry(symmetry))
+                return move.bit_length() - 1, depth, score
+        return None
+
+    def choose_move(self, board, valid_moves, player):
+        """
+        Returns the book move (row, col) of the player, or None when the position is out of the book.
+        """
+        entry = self.probe(*bitboard.split_board(board, player))
+        if entry is None:
+            return None
+        move = bitboard.square_to_cell(entry[0])
+        return move if move in valid_moves else None
+
+
+def open_book(path):
+    """
+    Opens the opening book at the path, or returns None when there is no path or no such file.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+def write_book(path, entries):
+    """
+    Writes an opening book file atomically.
+    :param entries: Dictionary of canonical (own, opp) positions to their (square, depth, score) book moves.
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as book_file:
+        book_file.write(_HEADER.pack(_MAGIC, len(entries)))
+        for (own, opp), (square, depth, score) in sorted(entries.items()):
+            score = max(-_SCORE_LIMIT, min(_SCORE_LIMIT, score))
+            book_file.write(_RECORD.pack(own, opp, square, depth, score))
+    os.replace(temp_path, path)
+
+
+def build_book(path, plies=12, depth=6, width=2, full_width_plies=2, progress=None):
+    """
+    Builds an opening book by searching every position of the opening tree to the given depth.
+
+    The tree is expanded from the start position: during the first `full_width_plies` plies every move is followed,
+    and afterwards only the `width` best moves of every position, which covers the lines that are likely to be played
+    without the exponential growth of the full tree. Symmetric positions are searched once.
+    :param plies: The number of plies that the book covers.
+    :param depth: The depth of the search of every position.
+    :param progress: An optional callback, progress(ply, positions), called when a ply is completed.
+    :return: The number of positions in the book.
+    """
+    frontier = [bitboard.canonical(*GameState().get_discs())[:2]]
+    table = TranspositionTable(_TABLE_SIZE_MB)
+    entries = {}
+
+    for ply in range(plies):
+        next_frontier = set()
+        for own, opp in frontier:
+            valid_moves = bitboard.mask_to_cells(bitboard.legal_moves(own, opp))
+            if not valid_moves:
+                continue  # A pass in the opening is rare enough to leave it to the search.
+
+            # The side to move plays the red discs of the board (the evaluation is the same for both colours)
+            scores = heuristics.score_moves(bitboard.to_board(own, opp), valid_moves, depth, 1, table)
+            # The best moves first, and on equal scores, the first one in row-major order (like minimax_decision).
+            ranked = sorted(range(len(valid_moves)), key=lambda index: -scores[index])
+            best = ranked[0]
+            entries[(own, opp)] = (bitboard.square_index(*valid_moves[best]), depth, scores[best])
+
+            for index in ranked if ply < full_width_plies else ranked[:width]:
+                child_own, child_opp = bitboard.apply_move(own, opp, bitboard.square_index(*valid_moves[index]))
+                child = bitboard.canonical(child_opp, child_own)[:2]
+                if child not in entries:
+                    next_frontier.add(child)
+
+        frontier = sorted(next_frontier)
+        if progress is not None:
+            progress(ply + 1, len(entries))
+
+    write_book(path, entries)
+    return len(entries)
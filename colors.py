@@ -0,0 +1,9 @@
+"""
+The colours of the game, which are shared by the GUI (the board view and its buttons) and the PNG renderer.
+"""
+RED_COLOR = "#E78775"
+WHITE_COLOR = "#F6F5F2"
+BASIC_COLOR = "#B0A695"  # An empty cell.
+MARK_COLOR = "#E6FF94"  # An empty cell which is a valid move of the player to move.
+GRID_COLOR = "#776B5D"
+BUTTONS_COLOR = "#F3EEEA"
@@ -14,6 +14,66 @@ def parse_arguments():
     group.add_argument('-displayAllActions', type=int, help="Display all actions with a specific number of discs")
     group.add_argument('-methodical', type=int, help="Methodical player with depth")
     group.add_argument('-random', type=int, help="Random player with moves")
-    parser.add_argument('-heuristics', nargs='*', choices=['H1', 'H2'], help="Heuristics for players (e.g., H1 H2)")
+    parser.add_argument('-heuristics', nargs='*', choices=['H1', 'H2', 'H3'], help="Heuristics for players (e.g., H1 H2)")
     group.add_argument('-ahead', type=int, help="Simulation with the best heuristic function, consider 2 steps ahead. ")
+    group.add_argument('-tournament', nargs=2, metavar=('A', 'B'),
+                       help="Headless tournament between two strategies ('random', 'H1', 'H2', 'H3', minimaxN or patternN, e.g. minimax3)")
+    group.add_argument('-simulate', nargs=2, metavar=('A', 'B'),
+                       help="Fast batched games between two one-ply strategies ('random', 'H1' or 'H2'), where each one "
+                            "plays red in half of the -games (headless)")
+    group.add_argument('-vs', metavar='STRATEGY',
+                       help="Play against the AI, which plays white ('random', 'H1', 'H2', 'H3', minimaxN or patternN, e.g. minimax4)")
+    parser.add_argument('-ponder', action='store_true',
+                        help="Let the AI opponent think on its expected reply during the human's turn")
+    group.add_argument('-buildBook', metavar='PATH', help="Build an opening book file by a deep search of the openings")
+    parser.add_argument('-bookPlies', type=int, default=12, help="Number of plies that the opening book covers")
+    parser.add_argument('-bookDepth', type=int, default=6, help="Search depth of every opening book position")
+    parser.add_argument('-records', metavar='PATH', help="Binary file to append the records of the tournament games to (or to read "
+                                                        "the games of -generate from)")
+    parser.add_argument('-book', metavar='PATH', help="Opening book file for the tournament players")
+    group.add_argument('-enumerate', type=int, metavar='N',
+                       help="Enumerate all the distinct positions with exactly N discs (headless)")
+    parser.add_argument('-output', default='positions.bin', help="Binary file of the enumerated positions")
+    group.add_argument('-perft', type=int, metavar='DEPTH',
+                       help="Count the leaves of the game tree to the depth from the start position")
+    parser.add_argument('-divide', action='store_true', help="Print the perft count of every root move")
+    parser.add_argument('-cache', action='store_true', help="Cache the perft counts of subtrees by position")
+    group.add_argument('-benchmark', metavar='OUTPUT', help="Run the benchmark suite and save the results to a JSON file")
+    parser.add_argument('-baseline', help="JSON results of a previous benchmark run to compare against")
+    parser.add_argument('-threshold', type=float, default=0.1,
+                        help="Relative slowdown from the baseline which is reported as a regression (e.g. 0.1 - 10%%)")
+    group.add_argument('-generate', metavar='DATASET',
+                       help="Stream labeled positions to a dataset file, for fitting the evaluation weights (headless)")
+    parser.add_argument('-source', choices=['selfplay', 'solved', 'records'], default='selfplay',
+                        help="The positions of -generate: self-play games (-games of -strategy), solved positions "
+                             "(-games positions with -empties empty squares) or the games of the -records file")
+    parser.add_argument('-strategy', default='H2', help="The strategy of the self-play games of -generate")
+    parser.add_argument('-empties', type=int, default=10, help="Number of empty squares of the solved positions")
+    group.add_argument('-fit', metavar='DATASET', help="Fit the evaluation weights to a dataset file (headless)")
+    parser.add_argument('-fitMethod', choices=['lstsq', 'gd'], default='lstsq',
+                        help="Least squares or gradient descent for the positional weights (the pattern tables are "
+                             "always fitted by gradient descent)")
+    parser.add_argument('-epochs', type=int, help="Number of passes of the gradient descents over the dataset")
+    parser.add_argument('-weights',
+                        help="The weights file that -fit writes to (defaults to weights.bin next to reversi.py, which is "
+                             "loaded at startup)")
+    group.add_argument('-analyse', nargs='?', const='', metavar='MOVES',
+                       help="Score every move of the position that the moves reach, e.g. f4f5c6 (the start position "
+                            "without moves, headless)")
+    parser.add_argument('-depth', type=int, default=6, help="Search depth of every move of -analyse")
+    group.add_argument('-solve', type=int, metavar='SIZE',
+                       help="Solve a small board from its start position, e.g. 4 (headless). Larger boards don't finish")
+    parser.add_argument('-solveMode', choices=['wld', 'exact'], default='wld',
+                        help="Only the win/loss/draw outcome of -solve, or the exact final disc differential")
+    parser.add_argument('-size', type=int,
+                        help="Board size of the game: an even number from 4 to 10 (defaults to board_size in "
+                             "config.json, or 8)")
+    parser.add_argument('-games', type=int, default=1000, help="Number of tournament games")
+    parser.add_argument('-workers', type=int, help="Number of tournament/perft/enumeration/generation worker processes (defaults to the number of CPUs)")
+    parser.add_argument('-openingPlies', type=int, default=4, help="Number of plies of the balanced tournament openings")
+    parser.add_argument('-checkpoint', help="JSON file to save the tournament results to, and to resume from")
+    parser.add_argument('-sprt', nargs=2, type=float, metavar=('ELO0', 'ELO1'),
+                        help="Stop the tournament as soon as the SPRT accepts one of the Elo differences")
+    parser.add_argument('-time', type=float, help="Time budget in seconds of every move of an H1 player (searches as deep as it allows)")
+    parser.add_argument('-clock', type=float, help="Total time in seconds of an H1 player for the whole game")
     return parser.parse_args()
\ No newline at end of file
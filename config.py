@@ -0,0 +1,17 @@
+"""
+The configuration file (config.json in the working directory), which is read by the GUI and by the headless modes.
+"""
+import json
+
+CONFIG_PATH = "config.json"
+
+
+def load_config_value(key, default):
+    """
+    Returns a value of the configuration file, or the default when the file or the key doesn't exist.
+    """
+    try:
+        with open(CONFIG_PATH, "r") as config_file:
+            return json.load(config_file).get(key, default)
+    except FileNotFoundError:
+        return default
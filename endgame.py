@@ -0,0 +1,234 @@
+"""
+Exact endgame solver.
+
+Near the end of the game the remaining tree is small enough to be searched to the end, so instead of a heuristic
+score, positions are scored by the final disc differential (the empty squares count for the winner). Unlike the
+heuristic search, passes are played: the game ends only when none of the players can move.
+
+Two modes are supported:
+- EXACT: The exact final disc differential.
+- WIN_LOSS_DRAW: Only the outcome (1 - win, 0 - draw, -1 - loss), which is much faster since the search window is
+  narrow.
+
+Moves are ordered by parity (moves in regions with an odd number of empty squares first, so the last move in every
+region is ours), and, while there are still many empty squares, fastest-first (moves that leave the opponent with
+the fewest replies first, where the corners come before and the X-squares after the other moves of about the same
+number of replies).
+
+Small boards can be solved from their start position (see solve_start), with a transposition table that merges the
+transpositions of the long lines. 4x4 is solved instantly; even a weak solution of 6x6 (its win/loss/draw outcome) is
+out of reach of this solver, whose search from the 6x6 start position doesn't finish in any practical time.
+"""
+import time
+import bitboard
+from position import Position
+from search import SearchCancelled
+from transposition_table import TranspositionTable
+
+EXACT = 'exact'
+WIN_LOSS_DRAW = 'wld'
+
+_INFINITY = float('inf')
+_FASTEST_FIRST_EMPTIES = 7  # Below this number of empty squares, only the parity ordering is worth its cost.
+_CANCEL_CHECK_INTERVAL = 1024  # Number of nodes between two checks of the cancel event.
+_TABLE_MIN_EMPTIES = 6  # Positions with fewer empty squares are cheaper to search than to store in the table.
+_SOLVE_TABLE_SIZE_MB = 256
+
+
+def final_score(own_count, opp_count, squares=bitboard.FULL_MASK.bit_length()):
+    """
+    Returns the final disc differential of the side to move, where the empty squares count for the winner.
+    :param squares: The number of squares of the board.
+    """
+    empties = squares - own_count - opp_count
+    if own_count > opp_count:
+        return own_count - opp_count + empties
+    if own_count < opp_count:
+        return own_count - opp_count - empties
+    return 0
+
+
+class EndgameSolver:
+    """
+    Alpha-beta search to the end of the game, over a mutable Position (see the position module).
+    - Attributes:
+        - mode: EXACT or WIN_LOSS_DRAW.
+        - nodes: Number of nodes that were visited.
+        - leaves: Number of final positions that were scored.
+        - table: An optional TranspositionTable of the solved positions (which must be hashed, see Position).
+    """
+    def __init__(self, mode=EXACT, cancel=None, table=None):
+        """
+        :param cancel: An optional threading.Event: once it's set, the search stops by raising search.SearchCancelled.
+        :param table: An optional TranspositionTable, which is used by positions with many empty squares. Its scores
+            are final disc differentials, so it shouldn't be shared with the heuristic search.
+        """
+        if mode not in (EXACT, WIN_LOSS_DRAW):
+            raise ValueError(f"Unknown endgame mode '{mode}' (expected '{EXACT}' or '{WIN_LOSS_DRAW}')")
+        self.mode = mode
+        self.nodes = 0
+        self.leaves = 0
+        self.table = table
+        self._cancel = cancel
+
+    def solve(self, position):
+        """
+        Returns the result of the side to move with perfect play: the disc differential, or the outcome (1/0/-1).
+        """
+        if self.mode == EXACT:
+            return self._solve(position, -_INFINITY, _INFINITY, False)
+        return _sign(self._solve(position, -1, 1, False))
+
+    def decide(self, position, root_squares):
+        """
+        Choose the best move of the side to move. The position is restored when it returns.
+        When several moves share the best result, the one which appears first in `root_squares` is chosen (moves
+        that come before the current best one are searched with a window that is one point lower, to find ties).
+        :param root_squares: The bit indexes of the moves to consider, in the caller's order.
+        :return: The best square (None if there are no moves), and its result (see the solve method).
+        """
+        exact = self.mode == EXACT
+        beta = _INFINITY if exact else 1
+        priority = {square: index for index, square in enumerate(root_squares)}
+
+        best_square = None
+        best_index = len(root_squares)
+        best_score = -_INFINITY
+        for square in self._order_moves(position, sum(1 << square for square in root_squares)):
+            index = priority[square]
+            alpha = best_score - 1 if index < best_index else best_score
+            if alpha >= beta:
+                continue  # A win was already found, and a later move can't do better.
+
+            flips = position.make_move(square)
+            score = -self._solve(position, -beta, -alpha, False)
+            position.unmake_move(square, flips)
+            if not exact:
+                score = _sign(score)
+
+            if score > best_score or (score == best_score and index < best_index):
+                best_square, best_index, best_score = square, index, score
+
+        return best_square, best_score
+
+    def _solve(self, position, alpha, beta, passed):
+        """
+        Fail-soft negamax to the end of the game. Returns the disc differential of the side to move.
+        :param passed: Whether the previous player passed (so if the side to move can't move either, the game ends).
+        """
+        self.nodes += 1
+        if self._cancel is not None and not self.nodes % _CANCEL_CHECK_INTERVAL and self._cancel.is_set():
+            raise SearchCancelled()
+        moves = position.legal_moves()
+        if not moves:
+            if passed:
+                self.leaves += 1
+                return final_score(position.own_count, position.opp_count, position.geometry.squares)
+            position.make_pass()
+            score = -self._solve(position, -beta, -alpha, True)
+            position.make_pass()
+            return score
+
+        table = self.table
+        table_square = None
+        if table is not None and position.geometry.squares - position.own_count - position.opp_count >= \
+                _TABLE_MIN_EMPTIES:
+            entry = table.probe(position.key)
+            if entry is not None:
+                _, _, bound, entry_score, table_square = entry
+                if bound == TranspositionTable.EXACT:
+                    return entry_score
+                if bound == TranspositionTable.LOWER_BOUND:
+                    if entry_score >= beta:
+                        return entry_score
+                elif entry_score <= alpha:
+                    return entry_score
+        else:
+            table = None
+
+        original_alpha = alpha
+        best_score = -_INFINITY
+        best_square = None
+        for square in self._order_moves(position, moves, table_square):
+            flips = position.make_move(square)
+            score = -self._solve(position, -beta, -alpha, False)
+            position.unmake_move(square, flips)
+
+            if score > best_score:
+                best_score = score
+                best_square = square
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if table is not None:
+            # The depth of an entry is the number of empty squares, so the bigger subtrees are kept on collisions
+            if best_score <= original_alpha:
+                bound = TranspositionTable.UPPER_BOUND
+            elif best_score >= beta:
+                bound = TranspositionTable.LOWER_BOUND
+            else:
+                bound = TranspositionTable.EXACT
+            table.store(position.key, position.geometry.squares - position.own_count - position.opp_count, bound,
+                        best_score, best_square)
+        return best_score
+
+    @staticmethod
+    def _order_moves(position, moves, first_square=None):
+        """
+        Orders the moves by parity, and when there are enough empty squares, fastest-first.
+        :param first_square: A move to search first (e.g. the best move that the transposition table stored).
+        :return: List of bit indexes.
+        """
+        if first_square is not None and moves >> first_square & 1:
+            return [first_square] + EndgameSolver._order_moves(position, moves ^ (1 << first_square))
+
+        empty = ~(position.own | position.opp) & position.geometry.full_mask
+        odd_moves = 0
+        for quadrant in position.geometry.quadrant_masks:  # The regions of the parity ordering
+            if bitboard.popcount(empty & quadrant) & 1:
+                odd_moves |= moves & quadrant
+
+        if bitboard.popcount(empty) < _FASTEST_FIRST_EMPTIES:
+            return list(bitboard.iter_squares(odd_moves)) + list(bitboard.iter_squares(moves & ~odd_moves))
+
+        corners, x_squares = position.geometry.corners_mask, position.geometry.x_squares_mask
+        scored = []
+        for square in bitboard.iter_squares(moves):
+            flips = position.make_move(square)
+            replies = bitboard.popcount(position.legal_moves())
+            position.unmake_move(square, flips)
+            # Fewest replies first (a corner counts as a reply less, and an X-square as a reply more), and on equal
+            # ranks, the odd regions first.
+            rank = replies * 3 + (0 if corners >> square & 1 else 2 if x_squares >> square & 1 else 1)
+            scored.append((rank * 2 + (0 if odd_moves >> square & 1 else 1), square))
+        scored.sort()
+        return [square for _, square in scored]
+
+
+def _sign(score):
+    return (score > 0) - (score < 0)
+
+
+def solve_start(size, mode=WIN_LOSS_DRAW, table_size_mb=_SOLVE_TABLE_SIZE_MB, cancel=None):
+    """
+    Solves a board size from its start position, where red moves first: the result of red with perfect play.
+    The 4 first moves of the start position are symmetric to each other, so only one of them is searched.
+    :param mode: EXACT or WIN_LOSS_DRAW (a weak solution, which is much faster).
+    :param table_size_mb: The size of the transposition table of the solver (None - no table).
+    :param cancel: An optional threading.Event, which stops the solver by raising search.SearchCancelled.
+    :return: Dictionary with the result (see EndgameSolver.solve), the first move (row, col) of a perfect line, the
+        numbers of nodes and leaves, and the elapsed time in seconds.
+    """
+    geometry = bitboard.geometry(size)
+    red, white = geometry.start_discs()
+    position = Position(red, white, 1, hashed=table_size_mb is not None, size=size)
+    solver = EndgameSolver(mode, cancel, TranspositionTable(table_size_mb) if table_size_mb is not None else None)
+
+    start = time.monotonic()
+    first_square = next(bitboard.iter_squares(position.legal_moves()))
+    position.make_move(first_square)
+    result = -solver.solve(position)
+    return {'result': result, 'move': geometry.square_to_cell(first_square), 'nodes': solver.nodes,
+            'leaves': solver.leaves, 'seconds': time.monotonic() - start}
@@ -0,0 +1,195 @@
+"""
+Enumeration of all the distinct positions that are reachable with exactly N discs on the board.
+
+Every move adds a single disc, so the positions with N discs are generated level by level from the start position
+(4 discs): the positions of level N are the children of the positions of level N - 1 (when the side to move has to
+pass, its opponent's moves are played instead; positions where the game is over have no children).
+
+A position is stored from the point of view of the side to move, as the pair of bitboards (own, opp) in its canonical
+form (the smallest of its 8 symmetries, see bitboard.canonical), so symmetric positions are counted once, together
+with the side to move (1 - red, 2 - white). The side to move is a part of the position: after a pass, the same discs
+can be reached with either player to move, and a position and its colour-swapped twin have the same (own, opp) pair.
+
+Memory is bounded: the parents are streamed from the file of the previous level in chunks, which are expanded across
+a process pool. Every worker keeps the children in a set, and spills it as a sorted run file whenever it grows past a
+threshold. The sorted runs are then merged (and deduplicated) into the file of the level.
+
+File format (little-endian): a header (magic, number of discs, number of positions), followed by the sorted
+(own, opp, player) positions as (uint64, uint64, uint8) records.
+"""
+import heapq
+import itertools
+import multiprocessing
+import os
+import struct
+import tempfile
+import bitboard
+from game_state import GameState
+
+_MAGIC = b'RVPOS002'
+_HEADER = struct.Struct('<8sQQ')
+_RECORD = struct.Struct('<QQB')
+_START_DISCS = 4
+_SPILL_THRESHOLD = 1000000  # Number of positions that a worker keeps in memory before spilling them to a run file.
+_CHUNK_SIZE = 50000  # Number of parent positions in every task of the process pool.
+_READ_RECORDS = 4096  # Number of records that are read from a file at a time.
+
+
+def write_positions(path, num_of_discs, positions):
+    """
+    Writes a positions file from an iterator of sorted (own, opp, player) positions.
+    :return: The number of positions that were written.
+    """
+    with open(path, 'wb') as positions_file:
+        positions_file.write(_HEADER.pack(_MAGIC, num_of_discs, 0))
+        count = _write_records(positions_file, positions)
+        positions_file.seek(0)  # The count is known only at the end
+        positions_file.write(_HEADER.pack(_MAGIC, num_of_discs, count))
+    return count
+
+
+def read_header(path):
+    """
+    Returns the (number of discs, number of positions) of a positions file.
+    """
+    with open(path, 'rb') as positions_file:
+        magic, num_of_discs, count = _HEADER.unpack(positions_file.read(_HEADER.size))
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a positions file")
+    return num_of_discs, count
+
+
+def iter_positions(path):
+    """
+    Streams the (own, opp, player) positions of a positions file.
+    """
+    read_header(path)
+    with open(path, 'rb') as positions_file:
+        positions_file.seek(_HEADER.size)
+        yield from _read_records(positions_file)
+
+
+def _write_records(records_file, records):
+    pack = _RECORD.pack
+    count = 0
+    for batch in iter(lambda: list(itertools.islice(records, _READ_RECORDS)), []):
+        records_file.write(b''.join(pack(*position) for position in batch))
+        count += len(batch)
+    return count
+
+
+def _read_records(records_file):
+    while True:
+        data = records_file.read(_RECORD.size * _READ_RECORDS)
+        if not data:
+            return
+        yield from _RECORD.iter_unpack(data)
+
+
+def _iter_run(path):
+    with open(path, 'rb') as run_file:
+        yield from _read_records(run_file)
+
+
+def children(own, opp, player):
+    """
+    Returns the canonical forms of the positions that follow a position with one more disc on the board.
+    """
+    moves = bitboard.legal_moves(own, opp)
+    if not moves:
+        own, opp, player = opp, own, 3 - player  # The side to move passes.
+        moves = bitboard.legal_moves(own, opp)
+
+    result = []
+    for square in bitboard.iter_squares(moves):
+        new_own, new_opp = bitboard.apply_move(own, opp, square)
+        result.append((*bitboard.canonical(new_opp, new_own)[:2], 3 - player))
+    return result
+
+
+def _expand_chunk(task):
+    """
+    Expands a chunk of parent positions in a worker process.
+    :return: The paths of the sorted run files of the children.
+    """
+    parents, run_prefix, spill_threshold = task
+    runs = []
+    found = set()
+
+    def spill():
+        path = f"{run_prefix}-{len(runs)}.run"
+        with open(path, 'wb') as run_file:
+            _write_records(run_file, iter(sorted(found)))
+        runs.append(path)
+        found.clear()
+
+    for parent in parents:
+        found.update(children(*parent))
+        if len(found) >= spill_threshold:
+            spill()
+    if found:
+        spill()
+    return runs
+
+
+def _merge_runs(runs):
+    """
+    Merges sorted run files into a single sorted stream, without duplicates.
+    """
+    previous = None
+    for position in heapq.merge(*(_iter_run(path) for path in runs)):
+        if position != previous:
+            yield position
+            previous = position
+
+
+def _next_level(parents_path, level_path, num_of_discs, temp_dir, pool, workers, spill_threshold, chunk_size):
+    """
+    Writes the positions file of the next level, and returns its number of positions.
+    """
+    parents = iter_positions(parents_path)
+    chunks = enumerate(iter(lambda: list(itertools.islice(parents, chunk_size)), []))
+    runs = []
+    # A chunk per worker at a time, so only a bounded number of parents is read ahead of the workers
+    for batch in iter(lambda: list(itertools.islice(chunks, workers)), []):
+        tasks = [(chunk, os.path.join(temp_dir, f"{num_of_discs}-{index}"), spill_threshold) for index, chunk in batch]
+        runs.extend(path for chunk_runs in pool.map(_expand_chunk, tasks) for path in chunk_runs)
+
+    count = write_positions(level_path, num_of_discs, _merge_runs(runs))
+    for path in runs:
+        os.remove(path)
+    return count
+
+
+def enumerate_positions(num_of_discs, output_path, workers=None, spill_threshold=_SPILL_THRESHOLD,
+                        chunk_size=_CHUNK_SIZE, progress=None):
+    """
+    Enumerates all the distinct positions with exactly `num_of_discs` discs, and writes them to a positions file.
+    :param workers: The number of processes. Defaults to the number of CPUs.
+    :param spill_threshold: The number of positions that a worker keeps in memory before spilling them to disk.
+    :param progress: An optional callback, progress(num_of_discs, count), called when a level is completed.
+    :return: List of the numbers of distinct positions of every level, from 4 discs to `num_of_discs`.
+    """
+    if not _START_DISCS <= num_of_discs <= bitboard.FULL_MASK.bit_length():
+        raise ValueError(f"The number of discs must be between {_START_DISCS} and {bitboard.FULL_MASK.bit_length()}")
+
+    workers = workers or os.cpu_count()
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir, multiprocessing.Pool(workers) as pool:
+        level_path = os.path.join(temp_dir, f"{_START_DISCS}.pos")
+        write_positions(level_path, _START_DISCS, iter([(*bitboard.canonical(*GameState().get_discs())[:2], 1)]))
+        counts = [1]
+        if progress is not None:
+            progress(_START_DISCS, 1)
+
+        for discs in range(_START_DISCS + 1, num_of_discs + 1):
+            next_path = os.path.join(temp_dir, f"{discs}.pos")
+            counts.append(_next_level(level_path, next_path, discs, temp_dir, pool, workers, spill_threshold,
+                                      chunk_size))
+            os.remove(level_path)
+            level_path = next_path
+            if progress is not None:
+                progress(discs, counts[-1])
+
+        os.replace(level_path, output_path)
+    return counts
@@ -0,0 +1,183 @@
+"""
+Compact binary game records, with a streaming writer and reader and a fast bulk replay.
+
+File format: a header (magic), followed by the games one after the other. Every game is a header (number of moves,
+final disc differential of red minus white) followed by a single byte per move: the bit index of the move's square
+(see the bitboard module), or PASS. A whole game takes about 62 bytes, so hundreds of thousands of games fit in a few
+tens of MB, and are read sequentially with a small buffer.
+
+Red moves first, and the passes are recorded, so the player of every move is known from its index. Replaying a
+record rebuilds any of its positions from the moves alone, over bitboards. A record is replayed at a few hundred
+thousand moves per second in pure Python; many records are replayed together, at millions of moves per second, by
+batch_games.replay_records (which requires NumPy).
+"""
+import struct
+import bitboard
+from game_state import GameState
+
+PASS = 64
+
+_MAGIC = b'RVGAME01'
+_GAME_HEADER = struct.Struct('<Bb')
+_BUFFER_SIZE = 1 << 16
+_CACHE_PLIES = 16
+_CACHE_ENTRIES = 1 << 20
+
+_START = GameState().get_discs()  # The (red, white) discs of the start position
+
+
+def replay(moves, plies=None):
+    """
+    Replays the moves of a record from the start position.
+    :param moves: The moves (bytes, or any sequence of bit indexes and PASS).
+    :param plies: The number of moves to replay. Defaults to all of them.
+    :return: The (red, white, player) of the position, where the player (1 - red, 2 - white) is the side to move.
+    """
+    end = len(moves) if plies is None else plies
+    red, white = _replay_from(_START[0], _START[1], moves, 0, end)
+    return red, white, 1 + end % 2
+
+
+def _replay_from(red, white, moves, start, end, cache=None):
+    """
+    Replays moves[start:end] from a position with the player of move `start` to move.
+    :param cache: An optional dictionary of positions by the moves that lead to them, which is filled with the
+        positions after every move (up to a limited number of moves).
+    :return: The (red, white) discs.
+    """
+    flip_mask = bitboard.flip_mask
+    if start % 2:
+        own, opp = white, red
+    else:
+        own, opp = red, white
+
+    for ply in range(start, end):
+        square = moves[ply]
+        if square != PASS:
+            flips = flip_mask(own, opp, square)
+            own |= flips | (1 << square)
+            opp &= ~flips
+        own, opp = opp, own
+        if cache is not None and ply < _CACHE_PLIES and len(cache) < _CACHE_ENTRIES:
+            cache[bytes(moves[:ply + 1])] = (opp, own) if ply % 2 == 0 else (own, opp)
+
+    return (opp, own) if end % 2 else (own, opp)
+
+
+class BulkReplayer:
+    """
+    Replays many records, reusing the positions of the opening moves that records have in common (e.g. games that
+    start from the same balanced openings or book lines), which are cached up to a limited number of moves.
+    """
+    def __init__(self):
+        self._cache = {}
+
+    def replay(self, moves, plies=None):
+        """
+        Same as the replay function, with the cache of the common openings.
+        """
+        end = len(moves) if plies is None else plies
+        moves = bytes(moves)
+        start = min(end, _CACHE_PLIES)
+        position = None
+        while start > 0 and position is None:
+            position = self._cache.get(moves[:start])
+            if position is None:
+                start -= 1
+
+        red, white = position if position is not None else _START
+        red, white = _replay_from(red, white, moves, start, end, self._cache)
+        return red, white, 1 + end % 2
+
+
+def final_result(moves):
+    """
+    Returns the final disc differential (red minus white) of a record.
+    """
+    red, white, _ = replay(moves)
+    return bitboard.popcount(red) - bitboard.popcount(white)
+
+
+class GameRecordWriter:
+    """
+    Writes game records to a file, one after the other (see the module's documentation for the format).
+    - Attributes:
+        - games: Number of games that were written.
+    """
+    def __init__(self, path, append=False):
+        self.games = 0
+        exists = append and _has_magic(path)
+        self._file = open(path, "ab" if exists else "wb", buffering=_BUFFER_SIZE)
+        if not exists:
+            self._file.write(_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, moves, result=None):
+        """
+        Writes a single game.
+        :param moves: The bit indexes of the moves, with PASS for a pass.
+        :param result: The final disc differential of red minus white. Computed by replaying the game if it's not
+            given.
+        """
+        moves = bytes(moves)
+        if result is None:
+            result = final_result(moves)
+        self._file.write(_GAME_HEADER.pack(len(moves), result))
+        self._file.write(moves)
+        self.games += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def tell(self):
+        """
+        Returns the size of the file with the games that were written so far (including the buffered ones).
+        """
+        return self._file.tell()
+
+    def truncate(self, size):
+        """
+        Drops the end of the file from the given size (e.g. the games that were written after a checkpoint), if it's
+        longer.
+        """
+        self._file.flush()
+        if self._file.tell() > size:
+            self._file.truncate(size)
+            self._file.seek(size)
+
+    def close(self):
+        self._file.close()
+
+
+def read_games(path):
+    """
+    Streams the games of a records file.
+    :return: Iterator of (moves, result) pairs, where the moves are bytes (see the module's documentation).
+    """
+    with open(path, "rb", buffering=_BUFFER_SIZE) as records_file:
+        if records_file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a game records file")
+        while True:
+            header = records_file.read(_GAME_HEADER.size)
+            if not header:
+                return
+            if len(header) < _GAME_HEADER.size:
+                raise ValueError(f"{path} ends in the middle of a game")
+            num_of_moves, result = _GAME_HEADER.unpack(header)
+            moves = records_file.read(num_of_moves)
+            if len(moves) < num_of_moves:
+                raise ValueError(f"{path} ends in the middle of a game")
+            yield moves, result
+
+
+def _has_magic(path):
+    try:
+        with open(path, "rb") as records_file:
+            return records_file.read(len(_MAGIC)) == _MAGIC
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,157 @@
+"""
+Headless model of a Reversi game: the discs on the board, the side to move, the counters and the valid moves.
+It doesn't depend on any GUI, so the same rules back the Tkinter game (which only renders the state), the heuristics
+and batch simulations. The board can have any of the sizes of the bitboard module (see bitboard.geometry).
+"""
+import bitboard
+from moves_tracker import Operator
+
+
+def player_number(operator: Operator):
+    """
+    Returns the number which represents the player in a 2D array board (1 - red, 2 - white).
+    """
+    return 1 if operator == Operator.RED else 2
+
+
+def opponent_of(operator: Operator):
+    """
+    Returns the opponent of the player.
+    """
+    return Operator.WHITE if operator == Operator.RED else Operator.RED
+
+
+class GameState:
+    """
+    The state of a Reversi game, over a pair of bitboards.
+    - Attributes:
+        - red, white: Bitboards of the discs of each player (see the bitboard module).
+        - current_player: The player to move (Operator.RED or Operator.WHITE).
+        - geometry: The bitboard.Geometry of the board size.
+    """
+    def __init__(self, size=bitboard.BOARD_SIZE):
+        self.geometry = bitboard.geometry(size)
+        self.red, self.white = self.geometry.start_discs()
+        self.current_player = Operator.RED
+
+    @classmethod
+    def from_discs(cls, red, white, current_player: Operator, size=bitboard.BOARD_SIZE):
+        """
+        Creates the state of the given bitboards and player to move.
+        """
+        state = cls.__new__(cls)
+        state.red, state.white, state.current_player = red, white, current_player
+        state.geometry = bitboard.geometry(size)
+        return state
+
+    @property
+    def size(self):
+        return self.geometry.size
+
+    @property
+    def red_counter(self):
+        return bitboard.popcount(self.red)
+
+    @property
+    def white_counter(self):
+        return bitboard.popcount(self.white)
+
+    def copy(self):
+        """
+        Returns an independent copy of the state.
+        """
+        return GameState.from_discs(self.red, self.white, self.current_player, self.geometry.size)
+
+    def get_cell(self, row, col):
+        """
+        Returns the content of a cell: 0 - empty, 1 - red disc, 2 - white disc.
+        """
+        bit = 1 << self.geometry.square_index(row, col)
+        return 1 if self.red & bit else 2 if self.white & bit else 0
+
+    def get_discs(self, operator: Operator = None):
+        """
+        Returns the (own, opp) bitboards from the point of view of a player (defaults to the player to move).
+        """
+        operator = operator or self.current_player
+        return (self.red, self.white) if operator == Operator.RED else (self.white, self.red)
+
+    def get_valid_moves_mask(self, operator: Operator = None):
+        """
+        Returns the bitmask of the valid moves of a player (defaults to the player to move).
+        """
+        return self.geometry.legal_moves(*self.get_discs(operator))
+
+    def get_valid_moves(self, operator: Operator = None):
+        """
+        Returns the list of the valid moves (row, col) of a player (defaults to the player to move), in row-major order.
+        """
+        return self.geometry.mask_to_cells(self.get_valid_moves_mask(operator))
+
+    def is_valid_move(self, row, col):
+        """
+        Checks if the player to move can place a disc in the cell.
+        :return: Status: 0 - valid, 1 - invalid since the cell is already occupied, 2 - invalid.
+        """
+        if self.get_cell(row, col) != 0:
+            return 1
+        return 0 if self.get_valid_moves_mask() >> self.geometry.square_index(row, col) & 1 else 2
+
+    def make_move(self, row, col):
+        """
+        Places a disc of the player to move, flips the captured discs in every direction and passes the turn.
+        :return: List of the flipped cells (row, col).
+        """
+        if self.is_valid_move(row, col) != 0:
+            raise ValueError(f"Invalid move {(row, col)} for {self.current_player}")
+
+        own, opp = self.get_discs()
+        square = self.geometry.square_index(row, col)
+        flips = self.geometry.flip_mask(own, opp, square)
+        self._set_discs(self.current_player, own | (1 << square) | flips, opp & ~flips)
+        self.current_player = opponent_of(self.current_player)
+        return self.geometry.mask_to_cells(flips)
+
+    def pass_turn(self):
+        """
+        Passes the turn to the opponent (allowed only when the player to move has no valid moves).
+        """
+        if self.get_valid_moves_mask():
+            raise ValueError(f"{self.current_player} has valid moves and can't pass")
+        self.current_player = opponent_of(self.current_player)
+
+    def is_game_over(self):
+        """
+        Checks if none of the players can move.
+        """
+        return not self.get_valid_moves_mask(Operator.RED) and not self.get_valid_moves_mask(Operator.WHITE)
+
+    def undo_move(self, cell, flipped_list, operator: Operator):
+        """
+        Reverts a move that was made by the operator: removes its disc and flips back the captured discs.
+        """
+        own, opp = self.get_discs(operator)
+        flips = self.geometry.cells_to_mask(flipped_list)
+        self._set_discs(operator, own & ~flips & ~(1 << self.geometry.square_index(*cell)), opp | flips)
+        self.current_player = operator
+
+    def redo_move(self, cell, flipped_list, operator: Operator):
+        """
+        Reapplies a move that was made by the operator (and reverted by undo_move).
+        """
+        own, opp = self.get_discs(operator)
+        flips = self.geometry.cells_to_mask(flipped_list)
+        self._set_discs(operator, own | flips | (1 << self.geometry.square_index(*cell)), opp & ~flips)
+        self.current_player = opponent_of(operator)
+
+    def to_array(self):
+        """
+        Returns the board as a 2D array: 0 - empty, 1 - red disc, 2 - white disc.
+        """
+        return self.geometry.to_board(self.red, self.white)
+
+    def _set_discs(self, operator: Operator, own, opp):
+        if operator == Operator.RED:
+            self.red, self.white = own, opp
+        else:
+            self.white, self.red = own, opp
@@ -1,4 +1,20 @@
-_BOARD_SIZE = 8
+import os
+import struct
+import warnings
+import bitboard
+import endgame
+import parallel_search
+import patterns
+import search
+from position import Position
+
+ENDGAME_EMPTIES = 12  # Positions with at most this number of empty squares are solved to the end of the game.
+# The leaf evaluations of the searches: the positional heuristic, or the pattern tables (see the patterns module).
+POSITIONAL = 'positional'
+PATTERNS = 'patterns'
+# The file of the fitted evaluation weights (see the training module), which is loaded at startup if it exists. It's
+# next to the program, whatever the working directory is.
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights.bin')
 _POSITIONAL_WEIGHTS = [
     [100, -20, 10, 5, 5, 10, -20, 100],
     [-20, -50, -2, -2, -2, -2, -50, -20],
@@ -15,10 +31,9 @@ def mobility_heuristic(board, player):
     """
     Evaluate the mobility heuristic for a player on the board.
     """
-    opponent = 3 - player  # Assuming players are represented as 1 and 2
-    player_moves = len(get_valid_moves(board, player))
-    opponent_moves = len(get_valid_moves(board, opponent))
-    return player_moves - opponent_moves
+    geometry = bitboard.geometry(len(board))
+    own, opp = geometry.split_board(board, player)
+    return _mobility_score(own, opp, geometry)
 
 
 def positional_heuristic(board, player):
@@ -26,127 +41,263 @@ def positional_heuristic(board, player):
     It sums up the scores of the player's pieces and subtracts the scores of the opponent's pieces,
     to provide an overall assessment of the board state.
     """
-    score = 0
-    for i in range(_BOARD_SIZE):
-        for j in range(_BOARD_SIZE):
-            if board[i][j] == player:
-                score += _POSITIONAL_WEIGHTS[i][j]
-            elif board[i][j] == 3 - player:  # Assuming 1 for player, 2 for opponent
-                score -= _POSITIONAL_WEIGHTS[i][j]
-    return score
+    own, opp = bitboard.geometry(len(board)).split_board(board, player)
+    return _positional_score(own, opp, len(board))
+
+
+def pattern_heuristic(board, player):
+    """
+    Evaluate the board by the pattern tables (see the patterns module), from the point of view of the player.
+    """
+    _check_pattern_size(len(board))
+    own, opp = bitboard.split_board(board, player)
+    return patterns.evaluate(own, opp)
 
 
-def choose_move_with_best_mobility(board, valid_moves, player):
+def choose_move_with_best_mobility(board, valid_moves, player, telemetry=None):
     """
     Choose the move with the best mobility for a player.
+    :param telemetry: An optional dictionary, which is filled with the statistics of the decision (see _report).
     """
     best_move = None
     best_mobility_score = -float('inf')
-    opponent = 3 - player
+    position = Position.from_board(board, player)
 
     for move in valid_moves:
-        row, col = move
-        temp_board = copy_board(board)  # Create a copy of the board
-        temp_board = simulate_move(temp_board, row, col, player)  # Simulate the move for the current player
-        player_mobility = len(get_valid_moves(temp_board, player))
-        opponent_mobility = len(get_valid_moves(temp_board, opponent))
-        mobility_score = player_mobility - opponent_mobility
+        # Make the move for the current player, and take it back after the evaluation
+        square = position.geometry.square_index(move[0], move[1])
+        flips = position.make_move(square)
+        mobility_score = -position.mobility()
+        position.unmake_move(square, flips)
 
         if mobility_score > best_mobility_score:
             best_mobility_score = mobility_score
             best_move = move
 
+    _report(telemetry, 'mobility', 1, len(valid_moves) + 1, len(valid_moves), best_mobility_score, [best_move])
     return best_move
 
 
-def choose_move_with_best_positional_heuristic(board, valid_moves, player):
+def choose_move_with_best_positional_heuristic(board, valid_moves, player, telemetry=None):
     """
     Choose the next move based on the positional heuristic.
+    :param telemetry: An optional dictionary, which is filled with the statistics of the decision (see _report).
     """
     best_move = None
     best_score = float('-inf')
+    position = Position.from_board(board, player, weights=_square_weights(len(board)))
 
     for move in valid_moves:
-        row, col = move
-        temp_board = copy_board(board)  # Create a copy of the board
-        temp_board = simulate_move(temp_board, row, col, player)  # Simulate the move for the current player
+        # Make the move for the current player
+        square = position.geometry.square_index(move[0], move[1])
+        flips = position.make_move(square)
 
-        # Calculate the positional heuristic score for the resulting board
-        score = positional_heuristic(temp_board, player)
+        # The positional heuristic score for the resulting board (from the point of view of the opponent, who is
+        # the side to move now) is updated by the move itself. Then take the move back
+        score = -position.score
+        position.unmake_move(square, flips)
 
         # Update the best move if the current move has a higher positional heuristic score
         if score > best_score:
             best_score = score
             best_move = move
 
+    _report(telemetry, 'positional', 1, len(valid_moves) + 1, len(valid_moves), best_score, [best_move])
     return best_move
 
 
-def minimax_decision(board, valid_moves, depth, current_player):
+def choose_move_with_best_pattern_score(board, valid_moves, player, telemetry=None):
     """
-    Perform a minimax decision to choose the best move.
+    Choose the next move based on the pattern evaluation (see the patterns module).
+    :param telemetry: An optional dictionary, which is filled with the statistics of the decision (see _report).
     """
     best_move = None
     best_score = float('-inf')
+    _check_pattern_size(len(board))
+    position = Position.from_board(board, player)
 
     for move in valid_moves:
-        # Simulate the move for the current player
-        temp_board = copy_board(board)
-        temp_board = simulate_move(temp_board, move[0], move[1], current_player)
-
-        # Calculate the opponent's best move using minimax with one less depth
-        opponent_moves = get_valid_moves(temp_board, 3 - current_player)
-        score, _ = minimax(opponent_moves, depth - 1, False, temp_board, current_player)
+        square = bitboard.square_index(move[0], move[1])
+        flips = position.make_move(square)
+        score = -patterns.evaluate_position(position)  # The opponent is the side to move now
+        position.unmake_move(square, flips)
 
-        # Evaluate the current move's score
         if score > best_score:
             best_score = score
             best_move = move
 
+    _report(telemetry, 'patterns', 1, len(valid_moves) + 1, len(valid_moves), best_score, [best_move])
     return best_move
 
 
+def minimax_decision(board, valid_moves, depth, current_player, table=None, endgame_empties=ENDGAME_EMPTIES,
+                     endgame_mode=endgame.EXACT, telemetry=None, parallel=None, cancel=None, evaluation=POSITIONAL):
+    """
+    Perform a minimax decision to choose the best move.
+    The search uses alpha-beta pruning. Without a table, it returns the same move as a plain minimax (see the minimax
+    function); with a table that is kept between searches (e.g. along a game), entries of deeper searches may change
+    the scores and the tie-breaks.
+    When there are at most `endgame_empties` empty squares, the game is solved to the end instead (see the endgame
+    module), in the given endgame mode.
+    :param table: An optional TranspositionTable to reuse the results of positions that were already searched.
+    :param telemetry: An optional dictionary, which is filled with the statistics of the decision (see _report).
+    :param parallel: An optional RootParallelSearch (see create_parallel_search), which searches the root moves across
+        processes instead (and returns the same move as the serial search without a table).
+    :param cancel: An optional threading.Event, which stops the search by raising search.SearchCancelled once it's set
+        (a parallel search isn't interrupted, so that the workers' shared bound stays consistent).
+    :param evaluation: The leaf evaluation, POSITIONAL or PATTERNS (a parallel search has its own, see
+        create_parallel_search).
+    """
+    evaluate, weights = _evaluation(evaluation, len(board))
+    position = Position.from_board(board, current_player, hashed=table is not None, weights=weights)
+    root_squares = [position.geometry.square_index(row, col) for row, col in valid_moves]
+    table_counters = _table_counters(table)
+    if _is_endgame(position, endgame_empties):
+        solver = endgame.EndgameSolver(endgame_mode, cancel)
+        best_square, score = solver.decide(position, root_squares)
+        _report_endgame(telemetry, solver, position, best_square, score)
+    elif parallel is not None:
+        nodes = parallel.nodes
+        best_square, score = parallel.decide(position, root_squares, depth)
+        pv = [] if best_square is None else [position.geometry.square_to_cell(best_square)]
+        _report(telemetry, f"alphabeta-parallel{parallel.workers}", depth, parallel.nodes - nodes, None, score, pv)
+    else:
+        searcher = search.AlphaBetaSearch(evaluate, table, cancel)
+        best_square, score = searcher.decide(position, root_squares, depth)
+        _report_search(telemetry, searcher, position, best_square, score, depth, table_counters)
+    return None if best_square is None else valid_moves[root_squares.index(best_square)]
+
+
+def iterative_deepening_decision(board, valid_moves, time_budget, current_player, table=None, max_depth=None,
+                                 endgame_empties=ENDGAME_EMPTIES, endgame_mode=endgame.EXACT, telemetry=None,
+                                 cancel=None, evaluation=POSITIONAL):
+    """
+    Choose the best move by searching deeper and deeper until the time budget (in seconds) is over.
+    Returns the move of the deepest search that was completed (see the minimax_decision function), or the move of the
+    endgame solver when there are at most `endgame_empties` empty squares.
+    :param table: An optional TranspositionTable, which also passes the move ordering from one depth to the next.
+    :param telemetry: An optional dictionary, which is filled with the statistics of the decision (see _report).
+    :param cancel: An optional threading.Event, which stops the search by raising search.SearchCancelled once it's set.
+    :param evaluation: The leaf evaluation, POSITIONAL or PATTERNS.
+    """
+    evaluate, weights = _evaluation(evaluation, len(board))
+    position = Position.from_board(board, current_player, hashed=table is not None, weights=weights)
+    root_squares = [position.geometry.square_index(row, col) for row, col in valid_moves]
+    table_counters = _table_counters(table)
+    if _is_endgame(position, endgame_empties):
+        solver = endgame.EndgameSolver(endgame_mode, cancel)
+        best_square, score = solver.decide(position, root_squares)
+        _report_endgame(telemetry, solver, position, best_square, score)
+    else:
+        searcher = search.AlphaBetaSearch(evaluate, table, cancel)
+        best_square, score, completed_depth = searcher.iterative_deepening(position, root_squares, time_budget,
+                                                                           max_depth)
+        _report_search(telemetry, searcher, position, best_square, score, completed_depth, table_counters)
+    return None if best_square is None else valid_moves[root_squares.index(best_square)]
+
+
+def create_parallel_search(workers=None, table_size_mb=None, evaluation=POSITIONAL, size=bitboard.BOARD_SIZE):
+    """
+    Creates a pool of processes for root-parallel minimax decisions (see the parallel_search module). It should be
+    closed when it's no longer needed.
+    :param workers: The number of processes. Defaults to the number of CPUs.
+    :param table_size_mb: The size of the transposition table of every process (None - no table).
+    :param evaluation: The leaf evaluation, POSITIONAL or PATTERNS.
+    :param size: The board size of the decisions.
+    """
+    return parallel_search.RootParallelSearch(*_evaluation(evaluation, size), workers, table_size_mb, size)
+
+
+def score_moves(board, valid_moves, depth, current_player, table=None):
+    """
+    Scores every valid move by an alpha-beta search of `depth` plies (e.g. for building an opening book).
+    :return: List of the scores of the moves from the point of view of the current player, in the order of valid_moves.
+    """
+    position = Position.from_board(board, current_player, hashed=table is not None, weights=_square_weights(len(board)))
+    root_squares = [position.geometry.square_index(row, col) for row, col in valid_moves]
+    return search.AlphaBetaSearch(_evaluate_position, table).score_moves(position, root_squares, depth)
+
+
+def _report(telemetry, algorithm, depth, nodes, leaves, score, pv, cache_hits=None, cache_misses=None):
+    """
+    Fills the telemetry dictionary of a decision, if there is one (see the telemetry module):
+    the algorithm, the depth reached, the numbers of nodes and leaf evaluations, the best score, the principal
+    variation (list of (row, col) moves), and the transposition table hits and misses (None without a table).
+    """
+    if telemetry is not None:
+        telemetry.update(algorithm=algorithm, depth=depth, nodes=nodes, leaves=leaves, score=score, pv=pv,
+                         cache_hits=cache_hits, cache_misses=cache_misses)
+
+
+def _report_search(telemetry, searcher, position, best_square, score, depth, table_counters):
+    if telemetry is None:
+        return
+    table = searcher.table
+    hits, misses = (table.hits - table_counters[0], table.misses - table_counters[1]) if table is not None \
+        else (None, None)
+    pv = searcher.principal_variation(position, best_square, depth)
+    _report(telemetry, 'alphabeta', depth, searcher.nodes, searcher.leaves, score,
+            [position.geometry.square_to_cell(square) for square in pv], hits, misses)
+
+
+def _report_endgame(telemetry, solver, position, best_square, score):
+    if telemetry is None:
+        return
+    empties = position.geometry.squares - position.own_count - position.opp_count
+    pv = [] if best_square is None else [position.geometry.square_to_cell(best_square)]
+    _report(telemetry, f"endgame-{solver.mode}", empties, solver.nodes, solver.leaves, score, pv)
+
+
+def _table_counters(table):
+    """
+    Returns the (hits, misses) counters of a transposition table, to compute the ones of a single decision.
+    """
+    return (table.hits, table.misses) if table is not None else (0, 0)
+
+
+def _is_endgame(position, endgame_empties):
+    """
+    Checks if the position has few enough empty squares to be solved by the endgame solver.
+    """
+    return endgame_empties is not None and \
+        position.geometry.squares - position.own_count - position.opp_count <= endgame_empties
+
+
 def minimax(valid_moves, depth, maximizing_player, board, player):
     """
     Perform the minimax algorithm to determine the best move.
     """
-    if depth == 0 or not valid_moves:
-        return positional_heuristic(board, player), None  # Evaluate the leaf node
-
-    if maximizing_player:
-        max_value = float('-inf')
-        best_move = None
-        for move in valid_moves:
-            # Make the move for the current player
-            temp_board = copy_board(board)
-            temp_board = simulate_move(temp_board, move[0], move[1], player)
+    position = Position.from_board(board, player if maximizing_player else 3 - player,
+                                   weights=_square_weights(len(board)))
+    squares = [position.geometry.square_index(row, col) for row, col in valid_moves]
+    value, best_square = _minimax(position, squares, depth, maximizing_player, player)
+    return value, None if best_square is None else valid_moves[squares.index(best_square)]
 
-            # Calculate the opponent's best move using minimax with one less depth
-            opponent_moves = get_valid_moves(temp_board, 3 - player)
-            value, _ = minimax(opponent_moves, depth - 1, False, temp_board, 3 - player)
 
-            if value > max_value:
-                max_value = value
-                best_move = move
+def _minimax(position, valid_squares, depth, maximizing_player, player):
+    """
+    The minimax algorithm over a mutable position, in which moves are made and taken back in place.
+    Moves are given and returned as bit indexes.
+    """
+    if depth == 0 or not valid_squares:
+        return position.score if position.player == player else -position.score, None  # Evaluate the leaf node
 
-        return max_value, best_move
-    else:
-        min_value = float('inf')
-        best_move = None
-        for move in valid_moves:
-            # Make the move for the opponent
-            temp_board = copy_board(board)
-            temp_board = simulate_move(temp_board, move[0], move[1], 3 - player)
+    best_value = float('-inf') if maximizing_player else float('inf')
+    best_move = None
+    for square in valid_squares:
+        # Make the move for the side to move (the current player when maximizing, otherwise the opponent)
+        flips = position.make_move(square)
 
-            # Calculate the current player's best move using minimax with one less depth
-            player_moves = get_valid_moves(temp_board, player)
-            value, _ = minimax(player_moves, depth - 1, True, temp_board, player)
+        # Calculate the other side's best move using minimax with one less depth
+        next_moves = list(bitboard.iter_squares(position.legal_moves()))
+        value, _ = _minimax(position, next_moves, depth - 1, not maximizing_player, player)
+        position.unmake_move(square, flips)
 
-            if value < min_value:
-                min_value = value
-                best_move = move
+        if (value > best_value) if maximizing_player else (value < best_value):
+            best_value = value
+            best_move = square
 
-        return min_value, best_move
+    return best_value, best_move
 
 
 # --- Helpers ----
@@ -157,73 +308,253 @@ def copy_board(board):
     return [row[:] for row in board]
 
 
-def is_within_bounds(row, col):
+def is_within_bounds(row, col, size=bitboard.BOARD_SIZE):
     """
     Check if a position is within the bounds of the board.
     """
-    return 0 <= row < _BOARD_SIZE and 0 <= col < _BOARD_SIZE
+    return 0 <= row < size and 0 <= col < size
 
 
 def is_valid_move(board, player, row, col, directions):
     """
     Check if a move is valid for a player at a certain position.
     """
-    opponent = 3 - player  # Assuming players are represented as 1 and 2
-
-    for dr, dc in directions:
-        r, c = row + dr, col + dc
-        if is_within_bounds(r, c) and board[r][c] == opponent:
-            while is_within_bounds(r, c) and board[r][c] == opponent:
-                r += dr
-                c += dc
-            if is_within_bounds(r, c) and board[r][c] == player:
-                return True
-
-    return False
+    geometry = bitboard.geometry(len(board))
+    own, opp = geometry.split_board(board, player)
+    shifts = [geometry.direction_shifts[direction] for direction in directions]
+    return geometry.flip_mask(own, opp, geometry.square_index(row, col), shifts) != 0
 
 
 def get_valid_moves(board, player):
     """
     Returns the valid moves for the current player.
     """
-    opponent = 3 - player  # Assuming players are represented as 1 and 2
-    valid_moves = []
-
-    directions = [
-        (-1, -1), (-1, 0), (-1, 1),
-        (0, -1), (0, 1),
-        (1, -1), (1, 0), (1, 1)
-    ]
-
-    for row in range(_BOARD_SIZE):
-        for col in range(_BOARD_SIZE):
-            if board[row][col] == 0:  # Check only empty cells
-                if is_valid_move(board, player, row, col, directions):
-                    valid_moves.append((row, col))
-
-    return valid_moves
+    geometry = bitboard.geometry(len(board))
+    own, opp = geometry.split_board(board, player)
+    return geometry.mask_to_cells(geometry.legal_moves(own, opp))
 
 
 def simulate_move(board, row, col, player):
     """
     Simulate the effect of a move on the board.
     """
-    directions = [
-        (-1, -1), (-1, 0), (-1, 1),
-        (0, -1), (0, 1),
-        (1, -1), (1, 0), (1, 1)
-    ]
+    geometry = bitboard.geometry(len(board))
+    own, opp = geometry.split_board(board, player)
+    flips = geometry.flip_mask(own, opp, geometry.square_index(row, col))
+
     board[row][col] = player
-    for dr, dc in directions:
-        r, c = row + dr, col + dc
-        if is_within_bounds(r, c) and board[r][c] == 3 - player:
-            tiles_to_flip = []
-            while is_within_bounds(r, c) and board[r][c] == 3 - player:
-                tiles_to_flip.append((r, c))
-                r += dr
-                c += dc
-            if is_within_bounds(r, c) and board[r][c] == player:
-                for rr, cc in tiles_to_flip:
-                    board[rr][cc] = player
-
-    return board
\ No newline at end of file
+    for rr, cc in geometry.mask_to_cells(flips):
+        board[rr][cc] = player
+
+    return board
+
+
+# --- Bitboard helpers ----
+def _size_weights(size):
+    """
+    Returns the positional weights of a board size by (row, col): every square takes the weight of the 8x8 square at
+    the same distances from the nearest edges, where all the squares from the 4th ring inwards are like the 8x8 center.
+    """
+    def standard_index(index):
+        distance = min(index, size - 1 - index, 3)
+        return distance if index < size // 2 else bitboard.BOARD_SIZE - 1 - distance
+
+    return [[_POSITIONAL_WEIGHTS[standard_index(row)][standard_index(col)] for col in range(size)]
+            for row in range(size)]
+
+
+def _build_positional_tables():
+    """
+    Precomputes the positional tables of every board size: the squares grouped by weight (so a positional score takes
+    one popcount per distinct weight), and the weights by bit index (for positions that maintain their positional
+    score incrementally).
+    :return: Dictionary of board size: (tuple of (weight, mask) pairs of the nonzero weights, tuple of the weights).
+    """
+    tables = {}
+    for size in range(bitboard.MIN_BOARD_SIZE, bitboard.MAX_BOARD_SIZE + 1, 2):
+        geometry = bitboard.geometry(size)
+        weights = _size_weights(size)
+        masks = {}
+        for row in range(size):
+            for col in range(size):
+                weight = weights[row][col]
+                if weight != 0:
+                    masks[weight] = masks.get(weight, 0) | (1 << geometry.square_index(row, col))
+        tables[size] = (tuple(masks.items()), tuple(weight for weights_row in weights for weight in weights_row))
+    return tables
+
+
+_POSITIONAL_TABLES = _build_positional_tables()
+
+
+def _square_weights(size):
+    """
+    Returns the positional weights of a board size by bit index.
+    """
+    bitboard.geometry(size)  # Validates the size
+    return _POSITIONAL_TABLES[size][1]
+
+
+def positional_weight_masks(size=bitboard.BOARD_SIZE):
+    """
+    Returns the (weight, bitmask of its squares) pairs of the positional heuristic, for the distinct nonzero weights.
+    """
+    bitboard.geometry(size)
+    return _POSITIONAL_TABLES[size][0]
+
+
+def _positional_score(own, opp, size=bitboard.BOARD_SIZE):
+    """
+    The positional heuristic of the owner of `own`, computed over bitboards.
+    """
+    score = 0
+    for weight, mask in _POSITIONAL_TABLES[size][0]:
+        score += weight * (bitboard.popcount(own & mask) - bitboard.popcount(opp & mask))
+    return score
+
+
+def _evaluate_position(position):
+    """
+    The positional heuristic of the side to move, which the position maintains incrementally.
+    """
+    return position.score
+
+
+def _check_pattern_size(size):
+    """
+    Raises a ValueError unless the board size has pattern tables (which are fitted to the standard board only).
+    """
+    if size != bitboard.BOARD_SIZE:
+        raise ValueError(f"The pattern evaluation is only for {bitboard.BOARD_SIZE}x{bitboard.BOARD_SIZE} boards")
+
+
+def _evaluation(evaluation, size):
+    """
+    Returns the leaf evaluation function of an evaluation, and the weights per square that it needs the positions (of
+    the board size) to maintain.
+    """
+    if evaluation == POSITIONAL:
+        return _evaluate_position, _square_weights(size)
+    if evaluation == PATTERNS:
+        _check_pattern_size(size)
+        return patterns.evaluate_position, None
+    raise ValueError(f"Unknown evaluation '{evaluation}'")
+
+
+def _mobility_score(own, opp, geometry=bitboard.geometry()):
+    """
+    The mobility heuristic of the owner of `own`, computed over bitboards.
+    """
+    legal_moves = geometry.legal_moves
+    return bitboard.popcount(legal_moves(own, opp)) - bitboard.popcount(legal_moves(opp, own))
+
+
+# --- Fitted weights ----
+# File format (little-endian): a header (magic, whether there are positional weights, whether there are pattern
+# tables), followed by the 64 positional weights by bit index (int32), and then by the pattern tables of every phase
+# in the order of patterns.PATTERNS (int32, 3 ** (number of squares) weights per table).
+_WEIGHTS_MAGIC = b'RVWGHT01'
+_WEIGHTS_HEADER = struct.Struct('<8sBB')
+_WEIGHTS_BOARD_SIZE = bitboard.BOARD_SIZE  # The weights are fitted to the standard board.
+
+
+def positional_weights():
+    """
+    Returns the 8x8 weights of the positional heuristic by (row, col) that are in use (see set_positional_weights).
+    """
+    return _POSITIONAL_WEIGHTS
+
+
+def set_positional_weights(weights):
+    """
+    Replaces the weights of the positional heuristic (e.g. by fitted ones).
+    :param weights: The 8x8 weights by (row, col), which the weights of the other board sizes are derived from.
+    """
+    global _POSITIONAL_WEIGHTS, _POSITIONAL_TABLES
+    size = _WEIGHTS_BOARD_SIZE
+    if len(weights) != size or any(len(weights_row) != size for weights_row in weights):
+        raise ValueError(f"Expected {size}x{size} positional weights")
+    _POSITIONAL_WEIGHTS = [list(weights_row) for weights_row in weights]
+    _POSITIONAL_TABLES = _build_positional_tables()
+
+
+def read_weights(path):
+    """
+    Reads a weights file (see the format above).
+    :return: The (positional weights, pattern tables), where either may be None if the file doesn't have them: the
+        8x8 weights by (row, col), and for every phase the list of the tables of the patterns (see
+        patterns.set_weights).
+    """
+    with open(path, 'rb') as weights_file:
+        data = weights_file.read()
+    if len(data) < _WEIGHTS_HEADER.size:
+        raise ValueError(f"{path} is not a weights file")
+    magic, has_positional, has_patterns = _WEIGHTS_HEADER.unpack_from(data)
+    table_sizes = [3 ** len(squares) for _, squares, _ in patterns.PATTERNS]
+    size = _WEIGHTS_HEADER.size + 4 * ((_WEIGHTS_BOARD_SIZE * _WEIGHTS_BOARD_SIZE if has_positional else 0) +
+                                       (patterns.PHASES * sum(table_sizes) if has_patterns else 0))
+    if magic != _WEIGHTS_MAGIC or len(data) != size:
+        raise ValueError(f"{path} is not a weights file")
+
+    offset = _WEIGHTS_HEADER.size
+    positional, pattern_tables = None, None
+    if has_positional:
+        values = struct.unpack_from(f'<{_WEIGHTS_BOARD_SIZE * _WEIGHTS_BOARD_SIZE}i', data, offset)
+        offset += 4 * len(values)
+        positional = [list(values[row * _WEIGHTS_BOARD_SIZE:(row + 1) * _WEIGHTS_BOARD_SIZE])
+                      for row in range(_WEIGHTS_BOARD_SIZE)]
+    if has_patterns:
+        pattern_tables = []
+        for _ in range(patterns.PHASES):
+            tables = []
+            for table_size in table_sizes:
+                tables.append(struct.unpack_from(f'<{table_size}i', data, offset))
+                offset += 4 * table_size
+            pattern_tables.append(tables)
+    return positional, pattern_tables
+
+
+def write_weights(path, positional=None, pattern_tables=None):
+    """
+    Writes a weights file atomically (see the format above).
+    :param positional: Optional 8x8 positional weights by (row, col).
+    :param pattern_tables: Optional pattern tables of every phase (see patterns.set_weights).
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as weights_file:
+        weights_file.write(_WEIGHTS_HEADER.pack(_WEIGHTS_MAGIC, positional is not None, pattern_tables is not None))
+        if positional is not None:
+            weights_file.write(struct.pack(f'<{_WEIGHTS_BOARD_SIZE * _WEIGHTS_BOARD_SIZE}i',
+                                           *(weight for weights_row in positional for weight in weights_row)))
+        for tables in pattern_tables or []:
+            for table in tables:
+                weights_file.write(struct.pack(f'<{len(table)}i', *table))
+    os.replace(temp_path, path)
+
+
+def load_weights(path):
+    """
+    Replaces the weights of the evaluations by the ones of a weights file, when the file exists.
+    :return: Whether the file exists.
+    """
+    if not path or not os.path.exists(path):
+        return False
+    positional, pattern_tables = read_weights(path)
+    if positional is not None:
+        set_positional_weights(positional)
+    if pattern_tables is not None:
+        patterns.set_weights(pattern_tables)
+    return True
+
+
+def _load_startup_weights():
+    """
+    Loads the weights file at startup. A file that can't be read is reported, and the built-in weights are kept.
+    """
+    try:
+        load_weights(WEIGHTS_PATH)
+    except (OSError, ValueError) as error:
+        warnings.warn(f"The weights file {WEIGHTS_PATH} wasn't loaded, the built-in weights are used: {error}")
+
+
+_load_startup_weights()
@@ -3,74 +3,77 @@ This module implements the Reversi game with GUI using Tkinter. It includes func
 managing the game state, handling undo/redo operations, capturing screenshots of game states,
 and executing methodical moves based on specified heuristics.
 
-Note: Put attention to update the `_FOLDER_PATH` variable, to specify the folder where the screenshots should be saved.
+Note: Put attention to update the `folder_path` value in config.json, to specify the folder where the screenshots should
+be saved. Screenshots are rendered off-screen (see the renderer module), so they don't need a visible window.
 """
-import os
 import random
+import time
 import tkinter as tk
 from tkinter import messagebox
 from moves_tracker import Operator, MovesTracker
-import pyautogui
+from game_state import GameState, player_number
 import heuristics
-import json
+import ai_worker
+import bitboard
+import board_view
+import book
+import colors
+import config
+import endgame
+import search
+import telemetry
+import tournament
+from transposition_table import TranspositionTable
 
-_RED_COLOR = "#E78775"
-_WHITE_COLOR = "#F6F5F2"
-_BASIC_COLOR = "#B0A695"
-_BUTTONS_COLOR = "#F3EEEA"
-_MARK_COLOR = "#E6FF94"
-
-_BOARD_SIZE = 8
 DEFAULT_FOLDER_PATH = "./ReversiGame"
+DEFAULT_TABLE_SIZE_MB = 16
+# The leaf evaluation of the searches of every searching mode.
+_SEARCH_EVALUATIONS = {'H1': heuristics.POSITIONAL, 'H3': heuristics.PATTERNS}
+_STRATEGY_MODES = {'minimax': 'H1', 'pattern': 'H3'}  # The modes of the searching strategies (see the tournament module)
 
 
 class Reversi:
-    DIRECTIONS = [
-        (0, -1),  # Up
-        (1, -1),  # Up-Right
-        (1, 0),  # Right
-        (1, 1),  # Down-Right
-        (0, 1),  # Down
-        (-1, 1),  # Down-Left
-        (-1, 0),  # Left
-        (-1, -1),  # Up-Left
-    ]
-
-    def __init__(self, master):
-        # Initializing counters and a moves tracker
-        self.moves_tracker = MovesTracker()
-        self.white_counter = 2
-        self.red_counter = 2
+    def __init__(self, master, board_size=None):
+        # Initializing the game state and a moves tracker, of the given board size (defaults to the configured one)
+        self.board_size = board_size or self.load_config_value("board_size", bitboard.BOARD_SIZE)
+        self.moves_tracker = MovesTracker(self.board_size)
+        self.game_state = GameState(self.board_size)
         self.result_content, self.described_action, self.subtitle, self.result_subtitle, self.title = "", "", None, None, None
-        self.board_frame, self.save_btn, self.prev_step_btn, self.next_step_btn = None, None, None, None
+        self.board_frame, self.save_btn, self.prev_step_btn, self.next_step_btn, self.stop_btn = None, None, None, None, None
         self.folder_path = self.load_folder_path()  # Load the required path from the configuration file.
+        self.step_writer = None  # Writes the screenshots in the background (created by the first screenshot)
+
+        # The AI players: their decisions run in a worker thread (see the ai_worker module)
+        self.ai_worker = ai_worker.AIWorker(master)
+        self.ai_settings, self.methodical_run, self.ai_job = None, None, None
+        self.parallel_searches = {}  # The process pools of the searching modes (see get_parallel_search)
+        self.opponent, self.ponder, self.ponder_job, self.ponder_move, self.expected_reply = None, False, None, None, None
+        self.ponder_hit_time = None  # When the human played the move that the AI pondered on (see on_human_move)
 
         # Initializing the gui and creating the board
         self.initialize_gui(master)
-        self.board = [[None for _ in range(_BOARD_SIZE)] for _ in range(_BOARD_SIZE)]
+        self.board = None
         self.create_board()
         self.initialize_board()
 
         # Start the game
-        self.current_player = Operator.RED
-        self.moves_tracker.add_item(None, None, self.current_player, self.get_valid_moves())
-        self.mark(self.moves_tracker.get_current_valid_moves(), _MARK_COLOR)
+        self.moves_tracker.add_item(None, None, self.game_state.current_player, self.game_state.get_valid_moves())
+        self.render_board()
 
     # Load folder path from configuration file or use default
     def load_folder_path(self):
-        try:
-            with open("config.json", "r") as config_file:
-                config = json.load(config_file)
-                folder_path = config.get("folder_path", DEFAULT_FOLDER_PATH)
-        except FileNotFoundError:
-            folder_path = DEFAULT_FOLDER_PATH
-        return folder_path
+        return self.load_config_value("folder_path", DEFAULT_FOLDER_PATH)
+
+    # Load a value from the configuration file or use default
+    def load_config_value(self, key, default):
+        return config.load_config_value(key, default)
 
     def initialize_gui(self, master):
         # Defining basic details
         self.master = master
         self.master.title("Reversi Game")
         self.master.geometry("600x700")
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
 
         # Frame for the title and subtitle that describes the situation
         title_frame = tk.Frame(self.master)
@@ -92,91 +95,68 @@ class Reversi:
         result_subtitle_frame = tk.Frame(self.master)
         result_subtitle_frame.pack(side="top", fill="x", pady=(20, 0))
 
-        self.result_content = "Red: {} disks\t|\t White: {} disk|\t Total: {} disks".format(self.red_counter,
-                                                                                            self.white_counter,
-                                                                                            self.white_counter + self.red_counter)
         self.result_subtitle = tk.Label(result_subtitle_frame, text=self.result_content, font=("Lato", 13))
         self.result_subtitle.pack(pady=(5, 5))
+        self.set_result_content()
 
         # Frame for the undo and redo buttons
         navigation_frame = tk.Frame(self.master)
         navigation_frame.pack(side="bottom", pady=(5, 20))
 
-        self.save_btn = tk.Button(navigation_frame, text="Save Steps", bg=_BUTTONS_COLOR, command=self.save_all_steps)
+        self.save_btn = tk.Button(navigation_frame, text="Save Steps", bg=colors.BUTTONS_COLOR,
+                                  command=self.save_all_steps)
         self.save_btn.pack(side="left", padx=(20, 10))
 
-        self.prev_step_btn = tk.Button(navigation_frame, text="Previous Step", bg=_BUTTONS_COLOR,
+        self.prev_step_btn = tk.Button(navigation_frame, text="Previous Step", bg=colors.BUTTONS_COLOR,
                                        command=self.undo_step)
         self.prev_step_btn.config(state="disabled")
         self.prev_step_btn.pack(side="left", padx=(20, 10))
 
-        self.next_step_btn = tk.Button(navigation_frame, text="Next Step", bg=_BUTTONS_COLOR, command=self.redo_step)
+        self.next_step_btn = tk.Button(navigation_frame, text="Next Step", bg=colors.BUTTONS_COLOR,
+                                       command=self.redo_step)
         self.next_step_btn.config(state="disabled")
         self.next_step_btn.pack(side="left")
 
+        self.stop_btn = tk.Button(navigation_frame, text="Stop AI", bg=colors.BUTTONS_COLOR, command=self.stop_ai)
+        self.stop_btn.pack(side="left", padx=(20, 0))
+
     def create_board(self):
-        for row in range(_BOARD_SIZE):
-            for col in range(_BOARD_SIZE):
-                button = tk.Button(self.board_frame, bg=_BASIC_COLOR, width=4, height=2,
-                                   command=lambda r=row, c=col: self.make_move(r, c))
-                button.grid(row=row, column=col)
-                self.board[row][col] = button
+        # A single canvas, whose frames are capped to the configured rate (see the board_view module)
+        self.board = board_view.BoardCanvas(self.board_frame, self.on_board_click,
+                                            self.load_config_value("frame_rate", board_view.DEFAULT_FRAME_RATE),
+                                            size=self.board_size)
+        self.board.pack()
 
     # Creating dynamically board according to the required board size
     def initialize_board(self):
-        center = _BOARD_SIZE // 2
+        center = self.board_size // 2
 
         initial_positions = [
-            (center - 1, center - 1, _RED_COLOR),
-            (center - 1, center, _WHITE_COLOR),
-            (center, center - 1, _WHITE_COLOR),
-            (center, center, _RED_COLOR),
+            (center - 1, center - 1),
+            (center - 1, center),
+            (center, center - 1),
+            (center, center),
         ]
 
-        for row, col, color in initial_positions:
-            self.board[row][col].config(bg=color)
+        for row, col in initial_positions:
             self.moves_tracker.add_item((row, col), None, Operator.INITIAL, None)
 
-    def mark(self, cells_list, color):
+    def render_board(self):
         """
-        Apply the specified color to the given list of cells on the board.
+        Render the game state on the board: the discs of both players, and the valid moves of the player to move.
+        The board is redrawn on the next frame, where only the cells whose color has changed are updated.
         """
-        if not cells_list:
-            return
-
-        for cell in cells_list:
-            self.board[cell[0]][cell[1]]['bg'] = color
-
-    def flip(self, cells_list):
-        """
-        Flip the colors of the specified cells on the board (Red <--> White)
-        Parameters:
-        cells_list (list of tuples): A list of (row, col) tuples representing the cells to be reversed.
-        """
-        if not cells_list:
-            return
-
-        flip_into_color = _RED_COLOR if self.board[cells_list[0][0]][cells_list[0][1]]['bg'] == _WHITE_COLOR else _WHITE_COLOR
-
-        for cell in cells_list:
-            self.board[cell[0]][cell[1]]['bg'] = flip_into_color
-
-        if flip_into_color == _RED_COLOR:
-            self.red_counter += len(cells_list)
-            self.white_counter -= len(cells_list)
-        else:
-            self.white_counter += len(cells_list)
-            self.red_counter -= len(cells_list)
-
+        self.board.show(self.game_state)
         self.set_result_content()
 
     def set_result_content(self):
         """
         Update the game result content based on the current state of the board.
         """
-        self.result_content = "Red: {} disks\t|\t White: {} disk|\t Total: {} disks".format(self.red_counter,
-                                                                                            self.white_counter,
-                                                                                            self.white_counter + self.red_counter)
+        red_counter, white_counter = self.game_state.red_counter, self.game_state.white_counter
+        self.result_content = "Red: {} disks\t|\t White: {} disk|\t Total: {} disks".format(red_counter,
+                                                                                            white_counter,
+                                                                                            white_counter + red_counter)
         self.result_subtitle.config(text=self.result_content)
 
     def undo_step(self):
@@ -186,22 +166,15 @@ class Reversi:
         This method updates the board, manages the enable/disable state of the undo/redo buttons,
         and updates the subtitles accordingly.
         """
+        self.cancel_ai()  # The AI decisions were about the last step
         self.next_step_btn.config(state="normal")  # Enable next step button
-        current_valid_moves, prev_valid_moves, flipped_list, is_last, sub_desc, operator = self.moves_tracker.undo()
-        self.mark(current_valid_moves, _BASIC_COLOR)  # Cancel the marks of the current valid moves
-        self.mark(prev_valid_moves, _MARK_COLOR)  # Mark the previous valid moves
-
-        # Manage the Counters
-        if operator == Operator.RED:
-            self.red_counter -= 1
-        else:
-            self.white_counter -= 1
+        _, _, flipped_list, is_last, sub_desc, operator, cell = self.moves_tracker.undo()
+        self.game_state.undo_move(cell, flipped_list, operator)
+        self.render_board()
 
         if is_last:
             self.prev_step_btn.config(state="disabled")
 
-        self.flip(flipped_list)  # Flip back the list
-
         self.subtitle.config(text=sub_desc)
 
     def redo_step(self):
@@ -211,21 +184,32 @@ class Reversi:
         This method updates the board, manages the enable/disable state of the undo/redo buttons,
         and updates the subtitles accordingly.
         """
+        self.cancel_ai()
         self.prev_step_btn.config(state="normal")
-        cur_valid_moves, cell, req_color, flipped_list, newer_valid_moves, is_last, sub_desc = self.moves_tracker.redo()
-        self.mark(cur_valid_moves, _BASIC_COLOR)
-        self.board[cell[0]][cell[1]]['bg'] = _RED_COLOR if req_color == Operator.RED else _WHITE_COLOR
-        if req_color == Operator.RED:
-            self.red_counter += 1
-        else:
-            self.white_counter += 1
-
-        self.mark(newer_valid_moves, _MARK_COLOR)
-        self.flip(flipped_list)
+        _, cell, req_color, flipped_list, _, is_last, sub_desc = self.moves_tracker.redo()
+        self.game_state.redo_move(cell, flipped_list, req_color)
+        self.game_state.current_player = self.moves_tracker.main_stack[-1].operator  # The same player after a pass
+        self.render_board()
         self.subtitle.config(text=sub_desc)
 
         if is_last:
             self.next_step_btn.config(state="disabled")
+        self.continue_game()
+
+    def go_to_step(self, step):
+        """
+        Display any step of the history in a single jump (instead of undoing or redoing the moves one by one), and
+        update the UI accordingly.
+        """
+        self.cancel_ai()
+        red, white, current_player = self.moves_tracker.seek(step)
+        self.game_state = GameState.from_discs(red, white, current_player, self.board_size)
+        self.render_board()
+        self.subtitle.config(text=self.moves_tracker.describe_last_move())
+
+        self.prev_step_btn.config(state="normal" if step > 0 else "disabled")
+        self.next_step_btn.config(state="normal" if step < self.moves_tracker.total_steps else "disabled")
+        self.continue_game()
 
     def make_move(self, row, col):
         """
@@ -234,234 +218,403 @@ class Reversi:
         This method:
         1. Ensures the board is active for a new move.
         2. Validates the move, showing warnings if invalid.
-        3. If valid, updates counters, flips discs, records the move, and updates the UI.
+        3. If valid, applies the move on the game state (which flips the discs), records the move, and updates the UI.
         4. Prints heuristic scores for mobility and positional evaluations.
-        5. Switches the current player and marks valid moves for the next turn.
+        5. Marks valid moves for the next turn.
         """
         if not self.moves_tracker.is_board_active():
             messagebox.showwarning("Invalid move", "Before performing a new action, go back to the last state. ")
             return
 
-        status, direction = self.is_valid_move(row, col)
+        status = self.game_state.is_valid_move(row, col)
         if status == 0:
-            if self.current_player == Operator.RED:
-                self.red_counter += 1
-            else:
-                self.white_counter += 1
-            discs_to_flip = self.get_list_to_flip(row, col, direction)
-            self.flip(discs_to_flip)
+            player = self.game_state.current_player
+            discs_to_flip = self.game_state.make_move(row, col)
             self.moves_tracker.set_move((row, col), discs_to_flip)
 
             desc = self.moves_tracker.describe_last_move()
             self.subtitle.config(text=desc)
             self.prev_step_btn.config(state="normal")
-            self.mark(self.moves_tracker.get_current_valid_moves(), _BASIC_COLOR)
-            self.board[row][col]['bg'] = _RED_COLOR if self.current_player == Operator.RED else _WHITE_COLOR
 
             # Calculate and print the mobility heuristic score
             board_x = self.convert_board_to_array()
-            mobility_score = heuristics.mobility_heuristic(board_x, 1 if self.current_player == Operator.RED else 2)
-            print(f"Mobility heuristic score after move by {'RED' if self.current_player == Operator.RED else 'WHITE'}: {mobility_score}")
+            mobility_score = heuristics.mobility_heuristic(board_x, player_number(player))
+            print(f"Mobility heuristic score after move by {'RED' if player == Operator.RED else 'WHITE'}: {mobility_score}")
 
             # Calculate and print the positional heuristic score
-            positional_score = heuristics.positional_heuristic(self.convert_board_to_array(), 1 if self.current_player == Operator.RED else 2)
-            print(f"Positional heuristic score after move by {'RED' if self.current_player == Operator.RED else 'WHITE'}: {positional_score}")
+            positional_score = heuristics.positional_heuristic(board_x, player_number(player))
+            print(f"Positional heuristic score after move by {'RED' if player == Operator.RED else 'WHITE'}: {positional_score}")
 
-            self.current_player = Operator.WHITE if self.current_player == Operator.RED else Operator.RED
-            self.moves_tracker.add_item(None, None, self.current_player, self.get_valid_moves())
-            self.mark(self.moves_tracker.get_current_valid_moves(), _MARK_COLOR)
+            self.moves_tracker.add_item(None, None, self.game_state.current_player, self.game_state.get_valid_moves())
+            self.render_board()
         else:
             if status == 1:
                 messagebox.showwarning("Invalid Move", "The cell is already occupied")
             elif status == 2:
                 messagebox.showwarning("Invalid Move", "OOPS!")
 
-    # Returns status (0-VALID,1-INVALID:occupied,2-INVALID), direction (x,y)
-    def is_valid_move(self, row, col):
-        # Checking if the cell isn't already occupied
-        if self.board[row][col]['bg'] in (_RED_COLOR, _WHITE_COLOR):
-            return 1, None
-
-        current_color = _WHITE_COLOR if self.current_player == Operator.WHITE else _RED_COLOR
-        opponent_color = _WHITE_COLOR if self.current_player == Operator.RED else _RED_COLOR
-
-        # Iterate through all possible directions
-        for dr, dc in self.DIRECTIONS:
-            r, c = row + dr, col + dc
-
-            # Check if the first cell in the direction - (r,c) is within bounds
-            if not (0 <= r < _BOARD_SIZE and 0 <= c < _BOARD_SIZE):
-                continue
-
-            # Check if the first cell in the direction contains an opponent's disc
-            if self.board[r][c]['bg'] == opponent_color:
-                # Move in the current direction to check for a valid sequence
-                while 0 <= r < _BOARD_SIZE and 0 <= c < _BOARD_SIZE:
-                    r += dr
-                    c += dc
-
-                    # If out of bounds, break the loop (and will move on to check the next direction)
-                    if not (0 <= r < _BOARD_SIZE and 0 <= c < _BOARD_SIZE):
-                        break
-
-                    # If an empty cell is encountered, break the loop (and will move on to check the next direction)
-                    if self.board[r][c]['bg'] == _BASIC_COLOR:
-                        break
+    def capture_screenshot(self, folder_path):
+        """
+        Renders the current state of the board off-screen, and saves it (in the background) to the specified path.
+        """
+        self.get_step_writer().submit(folder_path, self.game_state)
 
-                    # If a disc of the current player is encountered, the move is valid
-                    if self.board[r][c]['bg'] == current_color:
-                        return 0, (dr, dc)
-        return 2, None
+    def save_all_steps(self):
+        """
+        Saves screenshots of all the steps up to the displayed one in a designated folder, by rendering every step
+        from the moves history (without undoing and redoing the moves on the board).
+        """
+        import renderer
+        renderer.save_history(self.moves_tracker, self.folder_path, self.moves_tracker.displayed_step,
+                              self.get_step_writer())
 
-    def get_list_to_flip(self, row, col, direction):
-        flipped_list = list()
-        opponenet_color = _WHITE_COLOR if self.current_player == Operator.RED else _RED_COLOR
+    def get_step_writer(self):
+        """
+        Returns the writer of the screenshots. The renderer is loaded on the first screenshot, so a game without
+        screenshots doesn't load it.
+        """
+        if self.step_writer is None:
+            import renderer
+            self.step_writer = renderer.StepWriter()
+        return self.step_writer
 
-        # Move on in this direction and flip every disc you see
-        r, c = row + direction[0], col + direction[1]
+    def start_methodical_moves(self, num_of_captures, num_of_discs=None, player1_mode=None, player2_mode=None, steps_ahead=1,
+                               time_per_move=None, game_clock=None):
+        """
+        Start the process of making moves methodically according to the specified requirements.
+        The moves are made one by one from the Tk event loop (the searches run in the AI worker thread), so the window
+        keeps responding, and the Stop button ends the process.
 
-        while 0 <= r < _BOARD_SIZE and 0 <= c < _BOARD_SIZE:
-            if self.board[r][c]['bg'] == opponenet_color:
-                flipped_list.append((r, c))
+        Args:
+            num_of_captures (int): The number of screenshots to capture during the process.
+            num_of_discs (int, optional): The maximum number of discs to be placed on the board. Defaults to None (until the end)
+            player1_mode (str, optional): The mode of player 1 ('random', 'H1', 'H2', 'H3', or None). Defaults to None (chooses the first valid move)
+            player2_mode (str, optional): The mode of player 2 ('random', 'H1', 'H2', 'H3', or None). Defaults to None (chooses the first valid move)
+            steps_ahead (int, optional): The number of steps ahead to consider in the decision-making process. Defaults to 1.
+            time_per_move (float, optional): Time budget in seconds of every 'H1'/'H3' move. When it's given, the search goes
+                as deep as the budget allows (iterative deepening) instead of the fixed steps_ahead. Defaults to None.
+            game_clock (float, optional): Total time in seconds of each 'H1'/'H3' player for the whole game, which is
+                allocated between its moves. Ignored when time_per_move is given. Defaults to None.
+        """
+        self.ai_settings = self.load_ai_settings(player1_mode, player2_mode, steps_ahead, time_per_move, game_clock)
 
-                r += direction[0]
-                c += direction[1]
-            else:
-                break
+        if num_of_discs is not None:
+            max_discs = min(self.game_state.geometry.squares, num_of_discs)
+        else:
+            max_discs = self.game_state.geometry.squares
+        self.methodical_run = {'num_of_captures': num_of_captures, 'captured_counter': 0, 'max_discs': max_discs}
 
-        return flipped_list
+        self.capture_screenshot(f"{self.folder_path}/step_0.png")
+        self.methodical_run['captured_counter'] += 1
+        self.next_methodical_move()
 
-    # Returns a list of cells that indicate the valid moves
-    def get_valid_moves(self):
+    def next_methodical_move(self):
         """
-            Get a list of valid moves for the current player.
-            Notes:
-            - This method iterates through each cell on the game board and checks if it's a valid move.
+        Request the decision of the next move of the methodical process (which is made when the decision is done).
         """
-        valid_moves_list = list()
-
-        for row in range(0, _BOARD_SIZE):
-            for col in range(0, _BOARD_SIZE):
-                status, _ = self.is_valid_move(row, col)
-                if status == 0:
-                    valid_moves_list.append((row, col))
+        run = self.methodical_run
+        if run is None:  # The process was stopped
+            return
+        if self.game_state.red_counter + self.game_state.white_counter == run['max_discs']:
+            self.methodical_run = None
+            return
 
-        return valid_moves_list
+        if self.pass_if_blocked():
+            self.request_ai_move(self.play_methodical_move)
+        else:  # The game is over, so the run has arrived to inaccessible state.
+            self.methodical_run = None
+            if run['captured_counter'] < run['num_of_captures']:
+                messagebox.showwarning("Inaccessible state",
+                                       "The depth of the tree in the selected branch is less than n.")
+
+    def play_methodical_move(self, decision):
+        self.play_ai_move(decision)
+
+        # Capture the screenshot of the current step
+        run = self.methodical_run
+        if run is not None and run['captured_counter'] <= run['num_of_captures']:
+            self.capture_screenshot(f"{self.folder_path}/step_{run['captured_counter']}.png")
+            run['captured_counter'] += 1
+        self.next_methodical_move()
+
+    def play_against(self, strategy, ponder=False, time_per_move=None):
+        """
+        Let a human (red) play against the AI (white), by clicking on the board.
+        :param strategy: The strategy of the AI: 'random', 'H1', 'H2', 'H3', minimaxN (the positional alpha-beta search
+            to depth N, e.g. 'minimax4') or patternN (the same with the pattern evaluation).
+        :param ponder: Whether the AI thinks during the human's turn, on the reply that it expects: when the human
+            plays that reply, the AI answers instantly (or as soon as its search is done).
+        :param time_per_move: Time budget in seconds of every move of a searching AI (see start_methodical_moves).
+        """
+        name, depth = tournament.parse_strategy(strategy)
+        mode, steps_ahead = (_STRATEGY_MODES[name], depth) if depth is not None else (name, 1)
+        self.ai_settings = self.load_ai_settings(None, mode, steps_ahead, time_per_move, None)
+        self.opponent, self.ponder = Operator.WHITE, ponder
+        self.continue_game()
 
-    def capture_screenshot(self, folder_path):
+    def load_ai_settings(self, player1_mode, player2_mode, steps_ahead=1, time_per_move=None, game_clock=None):
         """
-        Captures a screenshot of the current window and saves it to the specified folder path.
+        Prepare the settings of the AI decisions of a game (see the decide method), from the arguments and the
+        configuration file.
         """
-        x = self.master.winfo_rootx()
-        y = self.master.winfo_rooty()
-        w = self.master.winfo_width()
-        h = self.master.winfo_height()
-        pyautogui.screenshot(folder_path, region=(x, y, w, h))
+        standard_board = self.board_size == bitboard.BOARD_SIZE
+        if 'H3' in (player1_mode, player2_mode) and not standard_board:
+            raise ValueError(f"H3 is only for {bitboard.BOARD_SIZE}x{bitboard.BOARD_SIZE} boards (its pattern tables "
+                             f"are fitted to them)")
+        self.close_telemetry_sink()  # The sink of the previous game, whose settings are replaced
+        searching_modes = {mode for mode in (player1_mode, player2_mode) if mode in _SEARCH_EVALUATIONS}
+        # The fixed-depth searches can be spread across processes
+        search_workers = self.load_config_value("search_workers", 1)
+        parallel = {mode: self.get_parallel_search(mode, search_workers)
+                    for mode in searching_modes} if search_workers > 1 and steps_ahead > 1 else {}
+        table_size_mb = self.load_config_value("transposition_table_mb", DEFAULT_TABLE_SIZE_MB)
+        return {
+            'modes': {Operator.RED: player1_mode, Operator.WHITE: player2_mode},
+            'steps_ahead': steps_ahead,
+            'time_per_move': time_per_move,
+            'game_clock': game_clock,
+            'remaining_time': {Operator.RED: game_clock, Operator.WHITE: game_clock},
+            # Positions that were searched for one move are likely to be reached again in the next ones (a table per
+            # evaluation, since their scores can't be mixed)
+            'tables': {mode: TranspositionTable(table_size_mb) for mode in searching_modes},
+            'endgame_empties': self.load_config_value("endgame_empties", heuristics.ENDGAME_EMPTIES),
+            'endgame_mode': self.load_config_value("endgame_mode", endgame.EXACT),
+            # The book is of the standard board
+            'opening_book': book.open_book(self.load_config_value("opening_book", None)) if standard_board else None,
+            'telemetry_sink': telemetry.open_sink(self.load_config_value("telemetry_path", None)),
+            'parallel': parallel,
+        }
+
+    def close_telemetry_sink(self):
+        """
+        Closes the telemetry sink of the current AI settings (if there is one).
+        """
+        if self.ai_settings is not None and self.ai_settings['telemetry_sink'] is not None:
+            self.ai_settings['telemetry_sink'].close()
+            self.ai_settings['telemetry_sink'] = None
 
-    def save_all_steps(self):
+    def get_parallel_search(self, mode, workers):
         """
-        Saves screenshots of all the steps of an operation in a designated folder.
+        Returns the process pool of a searching mode (see heuristics.create_parallel_search). The pool is reused by the
+        next games, unless the number of workers changes, and is closed with the window.
         """
-        os.makedirs(self.folder_path, exist_ok=True)
+        parallel = self.parallel_searches.get(mode)
+        if parallel is not None and parallel.workers != workers:
+            parallel.close()
+            parallel = None
+        if parallel is None:
+            parallel = self.parallel_searches[mode] = heuristics.create_parallel_search(
+                workers, evaluation=_SEARCH_EVALUATIONS[mode], size=self.board_size)
+        return parallel
+
+    def is_searching_mode(self, mode):
+        """
+        Whether the decisions of a mode search ahead (so they run in the AI worker thread).
+        """
+        settings = self.ai_settings
+        return mode in _SEARCH_EVALUATIONS and (settings['steps_ahead'] > 1 or settings['time_per_move'] is not None
+                                 or settings['game_clock'] is not None)
 
-        current_step = self.moves_tracker.displayed_step
+    def request_ai_move(self, on_done, state=None):
+        """
+        Request the decision of the player to move in a game state (defaults to the current one) from the AI worker.
+        :param on_done: Called with the decision (see the decide method) in the Tk thread.
+        :return: The Job of the decision.
+        """
+        state = (state or self.game_state).copy()
+        mode = self.ai_settings['modes'][state.current_player]
+        return self.ai_worker.submit(lambda cancel: self.decide(state, cancel), on_done, self.is_searching_mode(mode))
 
-        step = current_step
-        while step > 1:
-            self.undo_step()
-            step -= 1
-            self.master.update_idletasks()  # Wait for GUI to update
+    def decide(self, state, cancel=None):
+        """
+        Choose the move of the player to move, according to its mode. It may run in the AI worker thread, so it only
+        reads the given state (and not the displayed game state).
+        :param cancel: An optional threading.Event, which stops the search once it's set (see search.SearchCancelled).
+        :return: The chosen move, the player and its mode, the statistics of the decision (None, unless they are
+            needed for the telemetry or the pondering) and the time it took.
+        """
+        settings = self.ai_settings
+        player = state.current_player
+        current_mode = settings['modes'][player]
+        valid_moves = state.get_valid_moves()
+        board = state.to_array()
+        table, parallel = settings['tables'].get(current_mode), settings['parallel'].get(current_mode)
+        opening_book, evaluation = settings['opening_book'], _SEARCH_EVALUATIONS.get(current_mode)
+        endgame_empties, endgame_mode = settings['endgame_empties'], settings['endgame_mode']
+        time_per_move, game_clock = settings['time_per_move'], settings['game_clock']
+        remaining_time = settings['remaining_time']
+
+        # The statistics of the AI decision, which are written to the telemetry sink (if there is one)
+        start_time = time.monotonic()
+        search_info = {} if settings['telemetry_sink'] is not None or self.ponder else None
+
+        # The searching players play the book moves instantly, as long as the game is in the book
+        book_move = None
+        if opening_book is not None and current_mode in ('H1', 'H2', 'H3'):
+            book_move = opening_book.choose_move(board, valid_moves, player_number(player))
+
+        if book_move is not None:
+            chosen_move = book_move
+            if search_info is not None:
+                search_info['algorithm'] = 'book'
+        elif current_mode == 'random':
+            if state.red_counter + state.white_counter == 4:
+                chosen_move = valid_moves[0]  # In the initial state, the 4 possible actions are symmetric.
+                print(valid_moves)
+            else:
+                chosen_move = random.choice(valid_moves)
+        elif self.is_searching_mode(current_mode):
+            if time_per_move is not None or game_clock is not None:
+                budget = time_per_move if time_per_move is not None else search.allocate_move_time(
+                    remaining_time[player], state.geometry.squares - state.red_counter - state.white_counter)
+                chosen_move = heuristics.iterative_deepening_decision(board, valid_moves, budget, player_number(player), table,
+                                                                       endgame_empties=endgame_empties, endgame_mode=endgame_mode, telemetry=search_info,
+                                                                       cancel=cancel, evaluation=evaluation)
+            else:
+                chosen_move = heuristics.minimax_decision(board, valid_moves, settings['steps_ahead'], player_number(player), table,
+                                                           endgame_empties, endgame_mode, search_info, parallel, cancel, evaluation)
+        elif current_mode == 'H1':
+            chosen_move = heuristics.choose_move_with_best_mobility(board, valid_moves, player_number(player), search_info)
+        elif current_mode == 'H3':
+            chosen_move = heuristics.choose_move_with_best_pattern_score(board, valid_moves, player_number(player), search_info)
+        elif current_mode == 'H2':
+            chosen_move = heuristics.choose_move_with_best_positional_heuristic(board, valid_moves, player_number(player), search_info)
+        else:
+            chosen_move = valid_moves[0]
 
-        # Take a screenshot of the initial state
-        self.capture_screenshot(f"{self.folder_path}/step_0.png")
+        return chosen_move, player, current_mode, search_info, time.monotonic() - start_time
 
-        # Take screenshots while reverting back to the current step
-        step = 1
-        while step <= current_step - 1:
-            self.redo_step()
-            self.master.update_idletasks()  # Wait for GUI to update
-            self.capture_screenshot(f"{self.folder_path}/step_{step}.png")
-            step += 1
+    def play_ai_move(self, decision):
+        """
+        Make the move of an AI decision on the board (and write its telemetry record).
+        """
+        chosen_move, player, current_mode, search_info, elapsed = decision
+        self.ai_job = None
+        settings = self.ai_settings
+        hit_time, self.ponder_hit_time = self.ponder_hit_time, None
+        if settings['game_clock'] is not None and settings['time_per_move'] is None and \
+                self.is_searching_mode(current_mode):
+            # Only the AI's own thinking is charged: a pondering decision is charged from the human's move
+            settings['remaining_time'][player] -= elapsed if hit_time is None else \
+                min(elapsed, time.monotonic() - hit_time)
+        telemetry_sink = settings['telemetry_sink']
+        if telemetry_sink is not None and current_mode in ('H1', 'H2', 'H3'):
+            telemetry_sink.emit(telemetry.decision_record(self.moves_tracker.total_steps, player_number(player),
+                                                          current_mode, chosen_move, elapsed, search_info))
+        self.expected_reply = self.expected_reply_of(decision)
+        self.make_move(chosen_move[0], chosen_move[1])
+
+    def expected_reply_of(self, decision):
+        """
+        Returns the reply to an AI move that the AI expects (the next move of its principal variation), or None.
+        """
+        chosen_move, _, _, search_info, _ = decision
+        pv = (search_info or {}).get('pv') or []
+        return tuple(pv[1]) if len(pv) > 1 and tuple(pv[0]) == tuple(chosen_move) else None
 
-    def start_methodical_moves(self, num_of_captures, num_of_discs=None, player1_mode=None, player2_mode=None, steps_ahead=1):
+    def continue_game(self):
         """
-        Start the process of making moves methodically according to the specified requirements.
+        Let the AI opponent (if there is one) continue the game on the displayed step: make its move when it's its
+        turn, or ponder on the expected reply during the human's turn.
+        """
+        if self.opponent is None or not self.moves_tracker.is_board_active() or self.ai_job is not None \
+                or not self.pass_if_blocked():
+            return
+        if self.game_state.current_player == self.opponent:
+            self.ai_job = self.request_ai_move(self.on_opponent_move)
+        elif self.ponder:
+            self.start_pondering()
 
-        Args:
-            num_of_captures (int): The number of screenshots to capture during the process.
-            num_of_discs (int, optional): The maximum number of discs to be placed on the board. Defaults to None (until the end)
-            player1_mode (str, optional): The mode of player 1 ('random', 'H1', 'H2', or None). Defaults to None (chooses the first valid move)
-            player2_mode (str, optional): The mode of player 2 ('random', 'H1', 'H2', or None). Defaults to None (chooses the first valid move)
-            steps_ahead (int, optional): The number of steps ahead to consider in the decision-making process. Defaults to 1.
+    def pass_if_blocked(self):
         """
-        captured_counter = 0
+        Pass the turn of the player to move when it has no valid moves but its opponent has (like the tournament games).
+        :return: Whether the game continues (False when none of the players can move).
+        """
+        if self.game_state.get_valid_moves_mask():
+            return True
+        if self.game_state.is_game_over():
+            return False
+        self.game_state.pass_turn()
+        self.moves_tracker.set_pass(self.game_state.current_player, self.game_state.get_valid_moves())
+        self.render_board()
+        return True
+
+    def on_opponent_move(self, decision):
+        self.play_ai_move(decision)
+        self.continue_game()
+
+    def start_pondering(self):
+        """
+        Search the AI's reply to the human's expected move in the background (the expected move is the next one in the
+        principal variation of the AI's last search, or the best positional move when there is none).
+        """
+        valid_moves = self.moves_tracker.get_current_valid_moves()
+        expected = self.expected_reply if self.expected_reply in valid_moves else \
+            heuristics.choose_move_with_best_positional_heuristic(self.convert_board_to_array(), valid_moves,
+                                                                   player_number(self.game_state.current_player))
+        state = self.game_state.copy()
+        state.make_move(*expected)
+        if state.current_player == self.opponent and state.get_valid_moves():
+            self.ponder_move, self.ponder_job = expected, self.request_ai_move(None, state)
+
+    def on_human_move(self, row, col):
+        """
+        Continue the game after a move of the human: on a ponder hit, the pondering decision becomes the AI's move.
+        """
+        job, self.ponder_job = self.ponder_job, None
+        if job is not None and self.ponder_move == (row, col) and self.game_state.current_player == self.opponent:
+            self.ai_job, self.ponder_hit_time = job, time.monotonic()
+            if job.done:
+                self.on_opponent_move(job.result)
+            else:
+                job.on_done = self.on_opponent_move
+            return
+        if job is not None:
+            self.ai_worker.cancel(job)
+        self.continue_game()
 
-        self.master.update_idletasks()
-        self.capture_screenshot(f"{self.folder_path}/step_0.png")
-        self.master.update_idletasks()
-        captured_counter += 1
+    def on_board_click(self, row, col):
+        """
+        Make the move of the human on a clicked cell (ignored while the AI plays).
+        """
+        if self.methodical_run is not None or self.ai_job is not None or \
+                (self.opponent is not None and self.game_state.current_player == self.opponent):
+            return
+        total_steps = self.moves_tracker.total_steps
+        self.make_move(row, col)
+        if self.moves_tracker.total_steps != total_steps:
+            self.on_human_move(row, col)
 
-        if num_of_discs is not None:
-            max_discs = min(_BOARD_SIZE * _BOARD_SIZE, num_of_discs)
-        else:
-            max_discs = _BOARD_SIZE * _BOARD_SIZE
+    def cancel_ai(self):
+        """
+        Cancel the decisions of the AI that are running (or pondering), e.g. when the displayed step changes. A
+        methodical process ends, while the AI opponent continues when the last step is displayed again.
+        """
+        self.ai_worker.cancel_all()
+        self.ai_job, self.ponder_job, self.methodical_run, self.ponder_hit_time = None, None, None, None
 
-        while True:
-            if self.red_counter + self.white_counter == max_discs:
-                return
-            else:
-                valid_moves = self.moves_tracker.get_current_valid_moves()
-                current_mode = player1_mode if self.current_player == Operator.RED else player2_mode
-
-                if valid_moves:
-                    if current_mode == 'random':
-                        if self.moves_tracker.total_steps == 0:
-                            chosen_move = valid_moves[0]  # In the initial state, the 4 possible actions are symmetric.
-                            print(valid_moves)
-                        else:
-                            chosen_move = random.choice(valid_moves)
-                    elif current_mode == 'H1':
-                        if steps_ahead > 1:
-                            chosen_move = heuristics.minimax_decision(self.convert_board_to_array(), valid_moves, steps_ahead, 1 if self.current_player == Operator.RED else 2)
-                        else:
-                            chosen_move = heuristics.choose_move_with_best_mobility(self.convert_board_to_array(), valid_moves, 1 if self.current_player == Operator.RED else 2)
-                    elif current_mode == 'H2':
-                        chosen_move = heuristics.choose_move_with_best_positional_heuristic(self.convert_board_to_array(), valid_moves, 1 if self.current_player == Operator.RED else 2)
-                    else:
-                        chosen_move = valid_moves[0]
-
-                    self.make_move(chosen_move[0], chosen_move[1])
-                    self.master.update_idletasks()
-
-                    # Capture the screenshot of the current step
-                    if captured_counter <= num_of_captures:
-                        self.capture_screenshot(f"{self.folder_path}/step_{captured_counter}.png")
-                        self.master.update_idletasks()
-                        captured_counter += 1
-                else:  # The run has arrived to inaccessible state.
-                    if captured_counter < num_of_captures:
-                        messagebox.showwarning("Inaccessible state",
-                                               "The depth of the tree in the selected branch is less than n.")
-                    return
+    def stop_ai(self):
+        """
+        Stop the AI: the methodical process ends, and the rest of the game against the AI is played by hand.
+        """
+        self.cancel_ai()
+        self.opponent = None
+
+    def close(self):
+        self.stop_ai()
+        self.ai_worker.close()
+        for parallel in self.parallel_searches.values():
+            parallel.close()  # A parallel decision that is still running is cancelled as well
+        self.parallel_searches.clear()
+        self.close_telemetry_sink()
+        self.master.destroy()
 
     def convert_board_to_array(self):
         """
         :return: Convert the current state of the game board into a 2D array representation.
         - Each cell in the array represents the color of the corresponding position on the game board:
-          - 0: Empty or marked as a valid move
+          - 0: Empty
           - 1: Red disc
           - 2: White disc
         """
-        board_array = []
-        for row in range(_BOARD_SIZE):
-            board_row = []
-            for col in range(_BOARD_SIZE):
-                color = self.board[row][col]['bg']
-                if color == _BASIC_COLOR or color == _MARK_COLOR:
-                    board_row.append(0)
-                elif color == _RED_COLOR:
-                    board_row.append(1)
-                elif color == _WHITE_COLOR:
-                    board_row.append(2)
-            board_array.append(board_row)
-        return board_array
+        return self.game_state.to_array()
@@ -1,4 +1,8 @@
 from enum import Enum
+import bitboard
+
+_CHECKPOINT_INTERVAL = 8  # Number of moves between two snapshots of the board (see MovesTracker.state_at).
+_INITIAL_ITEMS = 4  # The records of the initial discs, at the bottom of the main stack
 
 
 class Operator(Enum):
@@ -10,13 +14,34 @@ class Operator(Enum):
 class Item:
     """
     Item represents a step which done or in the process of being done.
+    The flipped cells and the valid moves are stored as bitmasks (see the bitboard module), and are exposed as lists of
+    cells (None when they aren't set).
     """
-    def __init__(self, cell, flipped_list, operator: Operator, valid_moves_list):
+    __slots__ = ('cell', 'flips', 'operator', 'valid_moves', 'geometry')
+
+    def __init__(self, cell, flipped_list, operator: Operator, valid_moves_list, geometry=None):
+        self.geometry = geometry or bitboard.geometry()
         self.cell = cell
         self.flipped_list = flipped_list
         self.valid_moves_list = valid_moves_list
         self.operator = operator
 
+    @property
+    def flipped_list(self):
+        return None if self.flips is None else self.geometry.mask_to_cells(self.flips)
+
+    @flipped_list.setter
+    def flipped_list(self, cells):
+        self.flips = None if cells is None else self.geometry.cells_to_mask(cells)
+
+    @property
+    def valid_moves_list(self):
+        return None if self.valid_moves is None else self.geometry.mask_to_cells(self.valid_moves)
+
+    @valid_moves_list.setter
+    def valid_moves_list(self, cells):
+        self.valid_moves = None if cells is None else self.geometry.cells_to_mask(cells)
+
 
 class MovesTracker:
     """
@@ -26,15 +51,20 @@ class MovesTracker:
         - redo_stack: Stack to store moves that have been undone.
         - total_steps: Total number of steps taken in the game.
         - displayed_step: Step currently displayed.
+        - geometry: The bitboard.Geometry of the board size.
+    Every few moves, a snapshot of the board is kept, so the board of any step is rebuilt from the snapshot before it
+    and the few moves after it (see state_at and seek).
     """
-    def __init__(self):
+    def __init__(self, size=bitboard.BOARD_SIZE):
         self.main_stack = list()
         self.redo_stack = list()
         self.total_steps = 0
         self.displayed_step = 0
+        self.geometry = bitboard.geometry(size)
+        self.checkpoints = [self.geometry.start_discs()]  # The (red, white) discs of every _CHECKPOINT_INTERVAL steps
 
     def add_item(self, cell, flipped_list, operator: Operator, valid_moves_list):
-        self.main_stack.append(Item(cell, flipped_list, operator, valid_moves_list))
+        self.main_stack.append(Item(cell, flipped_list, operator, valid_moves_list, self.geometry))
 
     def set_move(self, cell, flipped_list):
         """
@@ -46,6 +76,15 @@ class MovesTracker:
         if self.main_stack[-1].operator is not Operator.INITIAL:
             self.displayed_step += 1
             self.total_steps += 1
+            if self.total_steps % _CHECKPOINT_INTERVAL == 0:
+                self.checkpoints.append(self._discs_at(self.total_steps))
+
+    def set_pass(self, operator: Operator, valid_moves_list):
+        """
+        Records a pass of the player to move: the current step becomes the turn of its opponent (the operator).
+        """
+        self.main_stack[-1].operator = operator
+        self.main_stack[-1].valid_moves_list = valid_moves_list
 
     def get_current_valid_moves(self):
         """
@@ -61,6 +100,7 @@ class MovesTracker:
             - List of cells flipped by the second-to-last move.
             - Flag indicating if it's the last move.
             - Description of the move in order to update the title content.
+            - Operator and cell of the reverted move.
         """
         is_last = False
 
@@ -78,7 +118,7 @@ class MovesTracker:
             sub_desc = self.describe_move(self.main_stack[-2])
 
         return first_item.valid_moves_list, second_item.valid_moves_list, second_item.flipped_list, is_last, sub_desc,\
-            second_item.operator
+            second_item.operator, second_item.cell
 
     def redo(self):
         """
@@ -114,14 +154,15 @@ class MovesTracker:
         if item.cell is None:
             return "Actual State 0\t|\tDisplayed state 0\n"
 
+        operator = item.operator
         if self.displayed_step == 0:
             move_id = '-'
-            item.operator = Operator.INITIAL
+            operator = Operator.INITIAL  # Only for the description: the operator of the record is needed to redo it
         else:
-            move_id = item.cell[0] * 8 + item.cell[1]
+            move_id = self.geometry.square_index(*item.cell)
         return "Actual State {}\t|\tDisplayed state {}\nAction {}-{}".format(self.total_steps,
                                                                              self.displayed_step,
-                                                                             item.operator,
+                                                                             operator,
                                                                              move_id)
 
     def describe_last_move(self):
@@ -134,3 +175,69 @@ class MovesTracker:
         if self.total_steps == self.displayed_step:
             return True
         return False
+
+    def seek(self, step):
+        """
+        Moves the displayed step to any step of the history (like a series of undo/redo calls), in a single jump.
+        :return: The (red, white, current_player) of the board of the step (see the state_at method).
+        """
+        if not 0 <= step <= self.total_steps:
+            raise ValueError(f"Step {step} is out of the history (0 to {self.total_steps})")
+        while self.displayed_step > step:
+            self.redo_stack.append(self.main_stack.pop())
+            self.displayed_step -= 1
+        while self.displayed_step < step:
+            self.main_stack.append(self.redo_stack.pop())
+            self.displayed_step += 1
+        return self.state_at(step)
+
+    def state_at(self, step):
+        """
+        Rebuilds the board of a step from the last snapshot before it.
+        :return: The (red, white) bitboards, and the player to move (Operator.RED or Operator.WHITE).
+        """
+        red, white = self._discs_at(step)
+        return red, white, self._move_item(step + 1).operator
+
+    def iter_states(self, last_step=None):
+        """
+        Iterates over the boards of all the steps, from the initial board to the last step (defaults to the last step
+        of the history), one move at a time.
+        :return: Iterator of (red, white, current_player), as returned by state_at.
+        """
+        red, white = self.checkpoints[0]
+        last_step = self.total_steps if last_step is None else last_step
+        for step in range(last_step + 1):
+            if step > 0:
+                red, white = _apply_item(self._move_item(step), red, white)
+            yield red, white, self._move_item(step + 1).operator
+
+    def _discs_at(self, step):
+        """
+        Returns the (red, white) bitboards of a step, by replaying the moves after the last snapshot before it.
+        """
+        index = (step - 1) // _CHECKPOINT_INTERVAL if step > 0 else 0  # The snapshot of the step may not exist yet
+        red, white = self.checkpoints[index]
+        for move in range(index * _CHECKPOINT_INTERVAL + 1, step + 1):
+            red, white = _apply_item(self._move_item(move), red, white)
+        return red, white
+
+    def _move_item(self, move):
+        """
+        Returns the record of a move of the history (the first move is 1), whether it was undone or not. The record
+        after the last move is the current step, which has no move yet.
+        """
+        index = _INITIAL_ITEMS + move - 1  # The records of the initial discs come before the first move
+        if index < len(self.main_stack):
+            return self.main_stack[index]
+        return self.redo_stack[len(self.main_stack) + len(self.redo_stack) - 1 - index]
+
+
+def _apply_item(item: Item, red, white):
+    """
+    Applies the move of a record to the (red, white) bitboards.
+    """
+    placed = item.flips | (1 << item.geometry.square_index(*item.cell))
+    if item.operator == Operator.RED:
+        return red | placed, white & ~item.flips
+    return red & ~item.flips, white | placed
@@ -0,0 +1,144 @@
+"""
+Root-parallel alpha-beta search across a process pool.
+
+The moves of the root are distributed between the worker processes (best-ordered moves first). The workers share the
+best score found so far, and every root move is searched with a window just below it, so moves that are searched
+later are pruned as well as in the serial search.
+
+The result is deterministic, and the same as the serial AlphaBetaSearch.decide (without a transposition table, or
+with a fresh one): a move is searched with alpha one point below the shared best score, which is always the exact
+score of some move, so the score of every move that is at least as good as the best one is exact. Among the moves
+with the best exact score, the one that comes first in the caller's order is chosen, whatever the timing of the
+workers was.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+import bitboard
+from position import Position
+from search import AlphaBetaSearch, SearchCancelled, order_masks, order_moves
+from transposition_table import TranspositionTable
+
+_INFINITY = float('inf')
+_CLOSED_CHECK_SECONDS = 0.1  # How often a decision checks whether the search was closed while it waits for results.
+
+# The state of a worker process (see _init_worker).
+_worker = {}
+
+
+def _init_worker(shared_best, evaluate, weights, table_size_mb, size):
+    _worker['shared_best'] = shared_best
+    _worker['size'] = size
+    _worker['evaluate'] = evaluate
+    _worker['weights'] = weights
+    _worker['table'] = TranspositionTable(table_size_mb) if table_size_mb else None
+    _worker['decision'] = None
+
+
+def _search_root_move(task):
+    """
+    Searches a single root move in a worker process.
+    :return: The square, its score, whether the score is exact, and the number of nodes that were visited.
+    """
+    decision, own, opp, player, square, depth = task
+    table = _worker['table']
+    if table is not None and _worker['decision'] != decision:
+        table.clear()  # Entries of previous decisions may be deeper, and would make the result depend on the timing.
+    _worker['decision'] = decision
+
+    shared_best = _worker['shared_best']
+    alpha = shared_best.value - 1
+    searcher = AlphaBetaSearch(_worker['evaluate'], table)
+    position = Position(own, opp, player, hashed=table is not None, weights=_worker['weights'], size=_worker['size'])
+    score = searcher.score_move(position, square, depth, alpha)
+
+    exact = score > alpha
+    if exact:
+        with shared_best.get_lock():
+            if score > shared_best.value:
+                shared_best.value = score
+    return square, score, exact, searcher.nodes
+
+
+class RootParallelSearch:
+    """
+    A pool of worker processes that search the root moves in parallel. It's kept between decisions (e.g. along a
+    game), and should be closed at the end.
+    - Attributes:
+        - workers: Number of worker processes.
+        - nodes: Number of nodes that were visited by the workers.
+        - size: The board size of the positions that are searched.
+    """
+    def __init__(self, evaluate, weights=None, workers=None, table_size_mb=None, size=bitboard.BOARD_SIZE):
+        """
+        :param evaluate: The leaf evaluation function (see the search module). It must be a module-level function,
+            so that it can be sent to the worker processes.
+        :param weights: The weights per square of the positions (see the position module).
+        :param table_size_mb: The size of the transposition table of every worker (None - no table).
+        :param size: The board size of the positions that are searched.
+        """
+        self.workers = workers or os.cpu_count()
+        self.nodes = 0
+        self.size = size
+        self._shared_best = multiprocessing.Value('d', -_INFINITY)
+        self._decisions = itertools.count()
+        self._closed = threading.Event()
+        self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                          initargs=(self._shared_best, evaluate, weights, table_size_mb, size))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Terminates the worker processes. A decision that is running (e.g. in another thread) raises
+        search.SearchCancelled.
+        """
+        self._closed.set()
+        self._pool.terminate()
+        self._pool.join()
+
+    def decide(self, position, root_squares, depth):
+        """
+        Choose the best move of the side to move by searching `depth` plies, like AlphaBetaSearch.decide.
+        :return: The best square (None if there are no moves), and its score.
+        """
+        if position.geometry.size != self.size:
+            raise ValueError(f"The search is for {self.size}x{self.size} boards")
+        if not root_squares:
+            return None, -_INFINITY
+
+        priority = {square: index for index, square in enumerate(root_squares)}
+        decision = next(self._decisions)
+        with self._shared_best.get_lock():
+            self._shared_best.value = -_INFINITY
+
+        root_moves = 0
+        for square in root_squares:
+            root_moves |= 1 << square
+        tasks = [(decision, position.own, position.opp, position.player, square, depth)
+                 for square in order_moves(root_moves, masks=order_masks(position.geometry))]
+
+        best_square, best_score = None, -_INFINITY
+        results = self._pool.imap_unordered(_search_root_move, tasks)
+        for _ in tasks:
+            square, score, exact, nodes = self._next_result(results)
+            self.nodes += nodes
+            if exact and (score > best_score or (score == best_score and priority[square] < priority[best_square])):
+                best_square, best_score = square, score
+        return best_square, best_score
+
+    def _next_result(self, results):
+        """
+        Waits for the next result of a decision (the results of a terminated pool never arrive).
+        """
+        while True:
+            try:
+                return results.next(_CLOSED_CHECK_SECONDS)
+            except multiprocessing.TimeoutError:
+                if self._closed.is_set():
+                    raise SearchCancelled()
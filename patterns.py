@@ -0,0 +1,273 @@
+"""
+Pattern-table evaluation.
+
+The board is covered by patterns (edges with their X-squares, 3x3 and 2x5 corner blocks, the inner rows and columns,
+and the diagonals). Every pattern has several instances on the board, which are the images of the same squares under
+the board's symmetries, so they share a single table of weights. The content of an instance (empty, own or opponent
+disc on every square) is a base-3 index into the weights of its pattern, and the evaluation is the sum of the weights
+of all the instances: 46 table lookups.
+
+The indexes are computed over bitboards: the squares of an instance are gathered into a small binary number (by the
+rows of the board, of its mirrored and transposed forms, or by a multiplication that packs a diagonal into a single
+byte), which a precomputed conversion table turns into its base-3 value.
+
+The weights are split by game phase (by the number of discs). Until they are fitted from games, they are derived from
+the positional weights in use when they are first needed (see heuristics.positional_weights), spread over the
+instances that cover every square, where the X- and C-squares next to a corner that is already taken lose their
+penalty, and the discs count more near the end.
+"""
+import math
+import operator
+import bitboard
+
+PHASES = 4
+_BOARD_SIZE = 8
+_START_DISCS = 4
+_MAGIC_MULTIPLIER = 0x0101010101010101  # Packs the columns of a diagonal into the top byte (no carries).
+_DIAGONAL_MASKS = tuple(sum(1 << bitboard.square_index(row, row + offset) for row in range(_BOARD_SIZE - offset))
+                        for offset in range(5))
+_DISC_WEIGHTS = (0, 0, 2, 6)  # The weight of a disc in every phase, besides the weight of its square.
+_CORNERS = ((0, 0), (0, 7), (7, 0), (7, 7))
+
+# The images of a square (row, col) under the symmetries of the board.
+_IDENTITY = lambda row, col: (row, col)
+_MIRROR = lambda row, col: (row, 7 - col)
+_FLIP = lambda row, col: (7 - row, col)
+_ROTATE_180 = lambda row, col: (7 - row, 7 - col)
+_TRANSPOSE = lambda row, col: (col, row)
+_ROTATE_LEFT = lambda row, col: (7 - col, row)
+_ROTATE_RIGHT = lambda row, col: (col, 7 - row)
+_ANTI_TRANSPOSE = lambda row, col: (7 - col, 7 - row)
+
+# The patterns: their squares in the order of the bits that are gathered for them, and the symmetries that map them
+# to their instances, in the order of the instances that _gather returns.
+PATTERNS = (
+    ('edge_2x', [(0, col) for col in range(8)] + [(1, 1), (1, 6)], (_IDENTITY, _FLIP, _TRANSPOSE, _ROTATE_RIGHT)),
+    ('corner_3x3', [(row, col) for row in range(3) for col in range(3)], (_IDENTITY, _MIRROR, _FLIP, _ROTATE_180)),
+    ('corner_2x5', [(row, col) for row in range(2) for col in range(5)],
+     (_IDENTITY, _MIRROR, _FLIP, _ROTATE_180, _TRANSPOSE, _ROTATE_RIGHT, _ROTATE_LEFT, _ANTI_TRANSPOSE)),
+    ('line_2', [(1, col) for col in range(8)], (_IDENTITY, _FLIP, _TRANSPOSE, _ROTATE_RIGHT)),
+    ('line_3', [(2, col) for col in range(8)], (_IDENTITY, _FLIP, _TRANSPOSE, _ROTATE_RIGHT)),
+    ('line_4', [(3, col) for col in range(8)], (_IDENTITY, _FLIP, _TRANSPOSE, _ROTATE_RIGHT)),
+    ('diagonal_8', [(row, row) for row in range(8)], (_IDENTITY, _MIRROR)),
+    ('diagonal_7', [(row, row + 1) for row in range(7)], (_IDENTITY, _TRANSPOSE, _MIRROR, _FLIP)),
+    ('diagonal_6', [(row, row + 2) for row in range(6)], (_IDENTITY, _TRANSPOSE, _MIRROR, _FLIP)),
+    ('diagonal_5', [(row, row + 3) for row in range(5)], (_IDENTITY, _TRANSPOSE, _MIRROR, _FLIP)),
+    ('diagonal_4', [(row, row + 4) for row in range(4)], (_IDENTITY, _TRANSPOSE, _MIRROR, _FLIP)),
+)
+INSTANCES = sum(len(symmetries) for _, _, symmetries in PATTERNS)
+
+_weights = None  # The weights by phase: for every phase, the table of every instance (see _phase_tables).
+
+
+def _gather(own):
+    """
+    Returns the bits of the squares of every pattern instance, in the order of PATTERNS.
+    """
+    mirrored = bitboard.flip_horizontal(own)
+    transposed = bitboard.flip_diagonal(own)
+    rows = own.to_bytes(8, 'little')
+    m = mirrored.to_bytes(8, 'little')
+    t = transposed.to_bytes(8, 'little')
+    tm = bitboard.flip_horizontal(transposed).to_bytes(8, 'little')
+    flipped = bitboard.flip_vertical(own)
+
+    full, multiplier, (mask_8, mask_7, mask_6, mask_5, mask_4) = bitboard.FULL_MASK, _MAGIC_MULTIPLIER, _DIAGONAL_MASKS
+
+    return (
+        # edge_2x: the top, bottom, left and right edges
+        rows[0] | (rows[1] >> 1 & 1) << 8 | (rows[1] >> 6 & 1) << 9,
+        rows[7] | (rows[6] >> 1 & 1) << 8 | (rows[6] >> 6 & 1) << 9,
+        t[0] | (t[1] >> 1 & 1) << 8 | (t[1] >> 6 & 1) << 9,
+        t[7] | (t[6] >> 1 & 1) << 8 | (t[6] >> 6 & 1) << 9,
+        # corner_3x3: every corner
+        rows[0] & 7 | (rows[1] & 7) << 3 | (rows[2] & 7) << 6,
+        m[0] & 7 | (m[1] & 7) << 3 | (m[2] & 7) << 6,
+        rows[7] & 7 | (rows[6] & 7) << 3 | (rows[5] & 7) << 6,
+        m[7] & 7 | (m[6] & 7) << 3 | (m[5] & 7) << 6,
+        # corner_2x5: every corner, along the rows and along the columns
+        rows[0] & 31 | (rows[1] & 31) << 5,
+        m[0] & 31 | (m[1] & 31) << 5,
+        rows[7] & 31 | (rows[6] & 31) << 5,
+        m[7] & 31 | (m[6] & 31) << 5,
+        t[0] & 31 | (t[1] & 31) << 5,
+        t[7] & 31 | (t[6] & 31) << 5,
+        tm[0] & 31 | (tm[1] & 31) << 5,
+        tm[7] & 31 | (tm[6] & 31) << 5,
+        # line_2, line_3 and line_4: the rows and the columns
+        rows[1], rows[6], t[1], t[6],
+        rows[2], rows[5], t[2], t[5],
+        rows[3], rows[4], t[3], t[4],
+        # diagonal_8: both main diagonals
+        ((own & mask_8) * multiplier & full) >> 56, ((mirrored & mask_8) * multiplier & full) >> 56,
+        # diagonal_7 to diagonal_4: the diagonals above and below both main diagonals
+        ((own & mask_7) * multiplier & full) >> 57, ((transposed & mask_7) * multiplier & full) >> 57,
+        ((mirrored & mask_7) * multiplier & full) >> 57, ((flipped & mask_7) * multiplier & full) >> 57,
+        ((own & mask_6) * multiplier & full) >> 58, ((transposed & mask_6) * multiplier & full) >> 58,
+        ((mirrored & mask_6) * multiplier & full) >> 58, ((flipped & mask_6) * multiplier & full) >> 58,
+        ((own & mask_5) * multiplier & full) >> 59, ((transposed & mask_5) * multiplier & full) >> 59,
+        ((mirrored & mask_5) * multiplier & full) >> 59, ((flipped & mask_5) * multiplier & full) >> 59,
+        ((own & mask_4) * multiplier & full) >> 60, ((transposed & mask_4) * multiplier & full) >> 60,
+        ((mirrored & mask_4) * multiplier & full) >> 60, ((flipped & mask_4) * multiplier & full) >> 60,
+    )
+
+
+def _digit_orders():
+    """
+    The digit of every square of every pattern in its base-3 index: the corners are the most significant digits, so
+    the weights that depend on them are built last (see _pattern_weights).
+    """
+    orders = []
+    for _, squares, _ in PATTERNS:
+        corners = [square for square in squares if square in _CORNERS]
+        ordered = [square for square in squares if square not in _CORNERS] + corners
+        orders.append([ordered.index(square) for square in squares])
+    return orders
+
+
+def _conversion_table(digits):
+    """
+    Converts a binary number of the bits of a pattern to the base-3 number with a 1 digit for every set bit.
+    """
+    table = [0] * (1 << len(digits))
+    for bits in range(1, 1 << len(digits)):
+        lowest = (bits & -bits).bit_length() - 1
+        table[bits] = table[bits & (bits - 1)] + 3 ** digits[lowest]
+    return table
+
+
+_CONVERSION_TABLES = tuple(_conversion_table(digits) for digits in _digit_orders())
+# The conversion table of every instance, in the order of PATTERNS.
+_INSTANCE_CONVERSIONS = tuple(table for table, (_, _, symmetries) in zip(_CONVERSION_TABLES, PATTERNS)
+                              for _ in symmetries)
+# The same for the opponent's discs, whose digits are 2.
+_INSTANCE_OPP_CONVERSIONS = tuple(table for table, (_, _, symmetries) in
+                                  zip(tuple([2 * index for index in table] for table in _CONVERSION_TABLES), PATTERNS)
+                                  for _ in symmetries)
+
+
+def indexes(own, opp):
+    """
+    Returns the base-3 index of every pattern instance (0 - empty, 1 - own disc, 2 - opponent's disc on every square),
+    in the order of PATTERNS.
+    """
+    return tuple(_iter_indexes(own, opp))
+
+
+def instance_squares():
+    """
+    Returns the squares of every pattern instance (in the order of PATTERNS), as the list of the (bit index, digit)
+    pairs of its squares, where the digit is the place of the square in the base-3 index of the instance (see
+    indexes).
+    """
+    return [[(bitboard.square_index(*symmetry(*square)), digit) for square, digit in zip(squares, digits)]
+            for (_, squares, symmetries), digits in zip(PATTERNS, _digit_orders()) for symmetry in symmetries]
+
+
+def _iter_indexes(own, opp):
+    return map(operator.add, map(operator.getitem, _INSTANCE_CONVERSIONS, _gather(own)),
+               map(operator.getitem, _INSTANCE_OPP_CONVERSIONS, _gather(opp)))
+
+
+def phase(own, opp):
+    """
+    Returns the game phase of a position (0 to PHASES - 1), by its number of discs.
+    """
+    discs = bitboard.popcount(own | opp)
+    return min(PHASES - 1, (discs - _START_DISCS) * PHASES // (_BOARD_SIZE * _BOARD_SIZE - _START_DISCS))
+
+
+def evaluate(own, opp):
+    """
+    The pattern evaluation of the owner of `own`.
+    """
+    tables = (_weights or _default_weights())[phase(own, opp)]
+    return sum(map(operator.getitem, tables, _iter_indexes(own, opp)))
+
+
+def evaluate_position(position):
+    """
+    The pattern evaluation of the side to move of a Position (see the search module).
+    """
+    return evaluate(position.own, position.opp)
+
+
+def set_weights(weights):
+    """
+    Replaces the weights (e.g. by fitted ones).
+    :param weights: For every phase, the list of the weight tables of the patterns (in the order of PATTERNS), where
+        every table has 3 ** (number of squares) integers.
+    """
+    global _weights
+    if len(weights) != PHASES or any(len(tables) != len(PATTERNS) for tables in weights):
+        raise ValueError(f"Expected {PHASES} phases of {len(PATTERNS)} pattern tables")
+    for tables in weights:
+        for table, (name, squares, _) in zip(tables, PATTERNS):
+            if len(table) != 3 ** len(squares):
+                raise ValueError(f"The table of the pattern '{name}' must have {3 ** len(squares)} weights")
+    _weights = _phase_tables(weights)
+
+
+def _phase_tables(weights):
+    """
+    Repeats the table of every pattern for each of its instances, so an evaluation zips them with the indexes.
+    """
+    return tuple(tuple(table for table, (_, _, symmetries) in zip(tables, PATTERNS) for _ in symmetries)
+                 for tables in weights)
+
+
+def _default_weights():
+    """
+    Builds the weights that are derived from the positional weights (on first use).
+    """
+    global _weights
+    import heuristics  # Not at the top, since the heuristics module imports this one
+    positional_weights = heuristics.positional_weights()
+    coverage = {}  # The number of instances that cover every square of the board
+    for _, squares, symmetries in PATTERNS:
+        for symmetry in symmetries:
+            for square in squares:
+                coverage[symmetry(*square)] = coverage.get(symmetry(*square), 0) + 1
+    _weights = _phase_tables([[_pattern_weights(squares, digits, coverage, positional_weights,
+                                                _DISC_WEIGHTS[game_phase])
+                                for (_, squares, _), digits in zip(PATTERNS, _digit_orders())]
+                               for game_phase in range(PHASES)])
+    return _weights
+
+
+def _pattern_weights(squares, digits, coverage, positional_weights, disc_weight):
+    """
+    Builds the default table of a pattern, digit by digit (from the least significant one). The table of the squares
+    that aren't corners is built once for every combination of taken corners, and the corner digits then select the
+    table that matches them. The weights are summed as integers (in units of 1 / `scale`), so that symmetric
+    contents get the very same weight.
+    """
+    scale = math.lcm(*coverage.values())
+    ordered = sorted(squares, key=lambda square: digits[squares.index(square)])
+    corners = [square for square in ordered if square in _CORNERS]
+    others = ordered[:len(ordered) - len(corners)]
+
+    def square_weight(square, taken_corners):
+        row, col = square
+        weight = positional_weights[row][col]
+        if weight < 0 and any(max(abs(row - corner[0]), abs(col - corner[1])) == 1 for corner in taken_corners):
+            weight = 0  # The X- or C-square can't give the corner away anymore
+        return (weight + disc_weight) * (scale // coverage[square])
+
+    tables = {}
+    for taken in range(1 << len(corners)):
+        taken_corners = [corner for bit, corner in enumerate(corners) if taken >> bit & 1]
+        table = [0]
+        for square in others:
+            weight = square_weight(square, taken_corners)
+            table = table + [value + weight for value in table] + [value - weight for value in table]
+        tables[taken] = table
+
+    result = []
+    for corner_digits in range(3 ** len(corners)):
+        digits_of = [corner_digits // 3 ** bit % 3 for bit in range(len(corners))]
+        taken = sum(1 << bit for bit, digit in enumerate(digits_of) if digit)
+        corners_value = sum((1 if digit == 1 else -1) * square_weight(corner, []) for corner, digit
+                            in zip(corners, digits_of) if digit)
+        result.extend(value + corners_value for value in tables[taken])
+    return [round(value / scale) for value in result]
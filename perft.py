@@ -0,0 +1,219 @@
+"""
+Perft: exact counts of the leaves of the game tree to a given depth from the start position.
+
+Perft validates move generation: a faster move generator must produce exactly the reference counts below. A pass
+(when the side to move has no valid moves but its opponent has) counts as a ply, and a position where the game is over
+counts as a single leaf, whatever depth is left.
+
+The counts are computed over the bitboard engine. `perft_board` counts the same tree with the board functions of the
+heuristics module (get_valid_moves and simulate_move), which are much slower, so both can be checked against each
+other. Subtrees can be split across processes, and cached by position, since many positions are reached through
+different move orders (in a fixed-size table, see PerftCache).
+"""
+import multiprocessing
+import os
+import bitboard
+import heuristics
+from game_state import GameState
+
+# The perft counts of the start position for depths 1, 2, 3, ...
+REFERENCE_COUNTS = (4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288, 24571284, 212258800, 1939886636)
+
+_PASS = 'pass'
+_CACHE_MIN_DEPTH = 3  # Shallower subtrees are cheaper to count than to cache (and there are many more of them).
+_SPLIT_PLIES = 2  # The depth of the subtrees that are counted by the worker processes (when the depth allows it).
+_CACHE_SIZE_MB = 64
+_worker_cache = None  # The cache of a worker process, which is shared by all the subtrees it counts.
+
+
+def reference_count(depth):
+    """
+    Returns the known perft count of the start position, or None when it isn't known.
+    """
+    return REFERENCE_COUNTS[depth - 1] if 1 <= depth <= len(REFERENCE_COUNTS) else None
+
+
+class PerftCache:
+    """
+    A fixed-size hash table of the counts of subtrees, so that the memory of deep counts stays bounded.
+    - Like the buckets of the transposition table, every bucket holds two entries: a depth-preferred one, which is
+      replaced only by a subtree of at least the same depth (the deeper, the more it saves), and an always-replace one.
+    - An entry is a tuple: (own, opp, depth, count).
+    """
+    # Estimated memory of a single entry: the tuple, its integers and the slot that refers to it.
+    ENTRY_BYTES = 160
+
+    def __init__(self, size_mb=_CACHE_SIZE_MB):
+        buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_BYTES))
+        self.num_buckets = 1 << (buckets.bit_length() - 1)  # Round down to a power of 2, for masking.
+        self._index_mask = self.num_buckets - 1
+        self._entries = [None] * (2 * self.num_buckets)
+
+    def get(self, own, opp, depth):
+        """
+        Returns the count of the subtree, or None if it isn't in the table.
+        """
+        index = (hash((own, opp, depth)) & self._index_mask) << 1
+        for entry in self._entries[index:index + 2]:
+            if entry is not None and entry[0] == own and entry[1] == opp and entry[2] == depth:
+                return entry[3]
+        return None
+
+    def store(self, own, opp, depth, count):
+        """
+        Stores the count of the subtree.
+        """
+        index = (hash((own, opp, depth)) & self._index_mask) << 1
+        current = self._entries[index]
+        if current is None or depth >= current[2]:
+            if current is not None:
+                self._entries[index + 1] = current  # The replaced entry is still recent, so it moves to the other slot.
+            self._entries[index] = (own, opp, depth, count)
+        else:
+            self._entries[index + 1] = (own, opp, depth, count)
+
+    def __len__(self):
+        return sum(entry is not None for entry in self._entries)
+
+
+def perft(own, opp, depth, cache=None):
+    """
+    Counts the leaves of the tree of the given depth, in which the owner of `own` is to move.
+    :param cache: An optional PerftCache of the counts of subtrees, to reuse between transpositions (and between
+        calls).
+    """
+    if depth == 0:
+        return 1
+
+    moves = bitboard.legal_moves(own, opp)
+    if depth == 1:
+        return bitboard.popcount(moves) or 1  # A pass or the end of the game is a single leaf.
+    if not moves:
+        if not bitboard.legal_moves(opp, own):
+            return 1  # The game is over.
+        return perft(opp, own, depth - 1, cache)
+
+    if cache is not None and depth >= _CACHE_MIN_DEPTH:
+        count = cache.get(own, opp, depth)
+        if count is None:
+            count = _count_moves(own, opp, moves, depth, cache)
+            cache.store(own, opp, depth, count)
+        return count
+    return _count_moves(own, opp, moves, depth, cache)
+
+
+def _count_moves(own, opp, moves, depth, cache):
+    count = 0
+    while moves:
+        lowest = moves & -moves
+        new_own, new_opp = bitboard.apply_move(own, opp, lowest.bit_length() - 1)
+        count += perft(new_opp, new_own, depth - 1, cache)
+        moves ^= lowest
+    return count
+
+
+def perft_board(board, player, depth):
+    """
+    Counts the same tree as the perft function, with heuristics.get_valid_moves and heuristics.simulate_move.
+    """
+    if depth == 0:
+        return 1
+
+    valid_moves = heuristics.get_valid_moves(board, player)
+    if not valid_moves:
+        if not heuristics.get_valid_moves(board, 3 - player):
+            return 1
+        return perft_board(board, 3 - player, depth - 1)
+
+    return sum(perft_board(heuristics.simulate_move(heuristics.copy_board(board), row, col, player), 3 - player,
+                           depth - 1) for row, col in valid_moves)
+
+
+def _children(own, opp):
+    """
+    Returns the (move, own, opp) triples of the children of a position, from the point of view of the side to move
+    in every child. The move is a (row, col) cell, or 'pass'. There are no children when the game is over.
+    """
+    moves = bitboard.legal_moves(own, opp)
+    if not moves:
+        return [(_PASS, opp, own)] if bitboard.legal_moves(opp, own) else []
+    children = []
+    for square in bitboard.iter_squares(moves):
+        new_own, new_opp = bitboard.apply_move(own, opp, square)
+        children.append((bitboard.square_to_cell(square), new_opp, new_own))
+    return children
+
+
+def _split(own, opp, depth, plies):
+    """
+    Splits the tree into the subtrees after the given number of plies (fewer where the game ends earlier).
+    :return: List of (own, opp, depth) subtrees, whose counts sum up to the count of the tree.
+    """
+    if plies == 0 or depth <= 1:
+        return [(own, opp, depth)]
+    children = _children(own, opp)
+    if not children:
+        return [(own, opp, depth)]
+    return [subtree for _, child_own, child_opp in children
+            for subtree in _split(child_own, child_opp, depth - 1, plies - 1)]
+
+
+def _count_subtree(task):
+    global _worker_cache
+    own, opp, depth, cache_mb = task
+    if cache_mb is None:
+        return perft(own, opp, depth)
+    if _worker_cache is None:
+        _worker_cache = PerftCache(cache_mb)
+    return perft(own, opp, depth, _worker_cache)
+
+
+def divide(depth, workers=1, use_cache=False, own=None, opp=None, cache_mb=_CACHE_SIZE_MB):
+    """
+    Counts the leaves of the tree of every move of the root (the start position by default).
+    :param workers: The number of processes. The subtrees after the first plies are split between them.
+    :param use_cache: Whether to cache the counts of subtrees by position.
+    :param cache_mb: The size of the cache (of every process).
+    :return: Dictionary of the root moves ((row, col), or 'pass') to their counts, in row-major order. It's empty
+        when the depth is 0 or the game is over.
+    """
+    if own is None or opp is None:
+        own, opp = GameState().get_discs()
+    if depth == 0:
+        return {}
+
+    children = _children(own, opp)
+    if workers <= 1:
+        cache = PerftCache(cache_mb) if use_cache else None
+        return {move: perft(child_own, child_opp, depth - 1, cache) for move, child_own, child_opp in children}
+
+    tasks, owners = [], []
+    for move, child_own, child_opp in children:
+        for subtree in _split(child_own, child_opp, depth - 1, _SPLIT_PLIES - 1):
+            tasks.append((*subtree, cache_mb if use_cache else None))
+            owners.append(move)
+
+    counts = {move: 0 for move, _, _ in children}
+    with multiprocessing.Pool(workers) as pool:
+        for move, count in zip(owners, pool.map(_count_subtree, tasks)):
+            counts[move] += count
+    return counts
+
+
+def run_perft(depth, workers=None, use_cache=False, cache_mb=_CACHE_SIZE_MB):
+    """
+    Counts the leaves of the tree of the start position.
+    :param workers: The number of processes. Defaults to the number of CPUs.
+    :param cache_mb: The size of the cache of every process, when use_cache is set.
+    :return: The total count, and the divide counts (see the divide function).
+    """
+    counts = divide(depth, workers or os.cpu_count(), use_cache, cache_mb=cache_mb)
+    return (sum(counts.values()) if counts else 1), counts
+
+
+def format_divide(counts):
+    """
+    Returns the divide output: a line per root move, with the count of its subtree.
+    """
+    return "\n".join(f"{move if move == _PASS else chr(ord('a') + move[1]) + str(move[0] + 1)}: {count}"
+                     for move, count in counts.items())
@@ -0,0 +1,133 @@
+"""
+A mutable position for the search, with in-place make/unmake of moves.
+
+Instead of copying the board for every node, the search keeps a single Position: make_move applies a move in place
+and returns a compact undo record (the bitmask of the flipped discs), and unmake_move restores the position exactly.
+"""
+import bitboard
+from transposition_table import SIDE_KEY, hash_position, update_hash
+
+
+class Position:
+    """
+    A position from the point of view of the side to move.
+    - Attributes:
+        - own, opp: Bitboards of the discs of the side to move and of its opponent.
+        - own_count, opp_count: Number of discs of the side to move and of its opponent.
+        - player: The side to move (1 - red, 2 - white).
+        - key: The Zobrist hash of the position, which is updated incrementally. It is maintained only when the
+          position is created with hashed=True (e.g. for probing a transposition table), and is None otherwise.
+        - weights: Optional weight per square (indexed by bit index). When it's given, `score` holds the sum of the
+          weights of the side to move's discs minus the sum of the weights of the opponent's discs.
+        - geometry: The bitboard.Geometry of the board size, whose move generation the position uses.
+    The counters and the score are updated incrementally by make_move/unmake_move, from the placed and flipped discs.
+    """
+    __slots__ = ('own', 'opp', 'own_count', 'opp_count', 'player', 'key', 'weights', 'score', 'geometry')
+
+    def __init__(self, own, opp, player, hashed=False, weights=None, size=bitboard.BOARD_SIZE):
+        self.geometry = bitboard.geometry(size)
+        self.own = own
+        self.opp = opp
+        self.own_count = bitboard.popcount(own)
+        self.opp_count = bitboard.popcount(opp)
+        self.player = player
+        self.key = hash_position(*((own, opp) if player == 1 else (opp, own)), player) if hashed else None
+        self.weights = weights
+        self.score = None
+        if weights is not None:
+            self.score = sum(weights[square] for square in bitboard.iter_squares(own)) - \
+                sum(weights[square] for square in bitboard.iter_squares(opp))
+
+    @classmethod
+    def from_board(cls, board, player, hashed=False, weights=None):
+        """
+        Creates the position of a 2D array board (0 - empty, 1 - red, 2 - white) with `player` to move (the board
+        size is the number of rows of the board).
+        """
+        size = len(board)
+        return cls(*bitboard.geometry(size).split_board(board, player), player, hashed, weights, size)
+
+    def copy(self):
+        """
+        Returns an independent copy of the position.
+        """
+        position = Position.__new__(Position)
+        position.restore(self)
+        return position
+
+    def restore(self, other):
+        """
+        Sets the position to be the same as another one.
+        """
+        self.own, self.opp, self.player, self.key = other.own, other.opp, other.player, other.key
+        self.own_count, self.opp_count, self.weights, self.score = \
+            other.own_count, other.opp_count, other.weights, other.score
+        self.geometry = other.geometry
+
+    def legal_moves(self):
+        """
+        Returns the bitmask of the valid moves of the side to move.
+        """
+        return self.geometry.legal_moves(self.own, self.opp)
+
+    def make_move(self, square):
+        """
+        Places a disc of the side to move at an empty square, flips the captured discs and passes the turn.
+        :return: The undo record of the move: the bitmask of the flipped discs.
+        """
+        own = self.own
+        flips = self.geometry.flip_mask(own, self.opp, square)
+        flipped = bitboard.popcount(flips)
+        self.own, self.opp = self.opp & ~flips, own | (1 << square) | flips
+        self.own_count, self.opp_count = self.opp_count - flipped, self.own_count + flipped + 1
+        if self.key is not None:
+            self.key = update_hash(self.key, self.player, square, flips)
+        if self.weights is not None:
+            self.score = -self.score - _move_gain(self.weights, square, flips)
+        self.player = 3 - self.player
+        return flips
+
+    def unmake_move(self, square, flips):
+        """
+        Reverts a move that was made by make_move, given its square and its undo record.
+        """
+        flipped = bitboard.popcount(flips)
+        player = self.player = 3 - self.player
+        if self.key is not None:
+            self.key = update_hash(self.key, player, square, flips)
+        if self.weights is not None:
+            self.score = -self.score - _move_gain(self.weights, square, flips)
+        self.own, self.opp = self.opp & ~((1 << square) | flips), self.own | flips
+        self.own_count, self.opp_count = self.opp_count - flipped - 1, self.own_count + flipped
+
+    def make_pass(self):
+        """
+        Passes the turn to the opponent (reverted by calling it again).
+        """
+        self.own, self.opp = self.opp, self.own
+        self.own_count, self.opp_count = self.opp_count, self.own_count
+        if self.key is not None:
+            self.key ^= SIDE_KEY
+        if self.weights is not None:
+            self.score = -self.score
+        self.player = 3 - self.player
+
+    def mobility(self):
+        """
+        Returns the number of valid moves of the side to move minus the number of valid moves of its opponent.
+        """
+        legal_moves = self.geometry.legal_moves
+        return bitboard.popcount(legal_moves(self.own, self.opp)) - bitboard.popcount(legal_moves(self.opp, self.own))
+
+
+def _move_gain(weights, square, flips):
+    """
+    Returns the change in the score of the mover: the weight of the placed disc, plus twice the weight of every
+    flipped disc (which is added to the mover and subtracted from the opponent).
+    """
+    gain = weights[square]
+    while flips:
+        lowest = flips & -flips
+        gain += 2 * weights[lowest.bit_length() - 1]
+        flips ^= lowest
+    return gain
@@ -0,0 +1,130 @@
+"""
+Off-screen rendering of game states to PNG images.
+
+The board is drawn straight from a GameState (the same colours as the GUI: discs, empty cells, and the marked valid
+moves of the player to move), without any display. A step of the game history is rebuilt from the MovesTracker
+records, so every step can be rendered without undoing and redoing the moves on the GUI. The PNG encoding is pure
+Python (zlib and struct), and images are encoded and written by a pool of background threads.
+"""
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import colors
+from game_state import GameState
+from moves_tracker import MovesTracker
+
+_CELL_SIZE = 40  # In pixels, the grid lines included.
+_GRID_WIDTH = 2
+_WRITER_THREADS = 4
+
+
+def _rgb(color):
+    return bytes.fromhex(color[1:])
+
+
+def encode_png(width, height, scanlines):
+    """
+    Encodes an RGB image as a PNG file.
+    :param scanlines: The rows of the image from top to bottom, as bytes of 3 * width RGB values.
+    """
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    raw = b''.join(b'\x00' + line for line in scanlines)  # Filter type 0 (none) on every row
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) + \
+        chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b'')
+
+
+def render_state(state: GameState, cell_size=_CELL_SIZE):
+    """
+    Renders the board of a game state.
+    :return: The PNG image, as bytes.
+    """
+    cell_colors = (_rgb(colors.BASIC_COLOR), _rgb(colors.RED_COLOR), _rgb(colors.WHITE_COLOR), _rgb(colors.MARK_COLOR))
+    grid = _rgb(colors.GRID_COLOR)
+    valid_moves = state.get_valid_moves_mask()
+    board_size = state.size
+    size = board_size * cell_size + _GRID_WIDTH
+    grid_line = grid * size
+
+    scanlines = []
+    for row in range(board_size):
+        # All the rows of pixels inside a row of cells are the same, so a single one is built per row of cells
+        line = []
+        for col in range(board_size):
+            content = state.get_cell(row, col)
+            if content == 0 and valid_moves >> state.geometry.square_index(row, col) & 1:
+                content = 3
+            line.append(grid * _GRID_WIDTH + cell_colors[content] * (cell_size - _GRID_WIDTH))
+        line.append(grid * _GRID_WIDTH)
+        cells_line = b''.join(line)
+        scanlines.extend([grid_line] * _GRID_WIDTH + [cells_line] * (cell_size - _GRID_WIDTH))
+    scanlines.extend([grid_line] * _GRID_WIDTH)
+    return encode_png(size, size, scanlines)
+
+
+def history_states(moves_tracker: MovesTracker, last_step=None):
+    """
+    Rebuilds the game states of the steps of the history (including the steps that were undone), from the records of
+    the moves tracker.
+    :param last_step: The last step. Defaults to the last step of the history.
+    :return: Iterator of the game states, where the index is the number of moves that were made.
+    """
+    for red, white, current_player in moves_tracker.iter_states(last_step):
+        yield GameState.from_discs(red, white, current_player, moves_tracker.geometry.size)
+
+
+class StepWriter:
+    """
+    Renders game states and writes them as PNG files in a pool of background threads.
+    """
+    def __init__(self, workers=_WRITER_THREADS, cell_size=_CELL_SIZE):
+        self.cell_size = cell_size
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, path, state: GameState):
+        """
+        Schedules the rendering of a game state to a file (the state is copied, so it can change meanwhile).
+        :return: A future of the writing.
+        """
+        return self._executor.submit(self._write, path, state.copy())
+
+    def close(self):
+        """
+        Waits until all the scheduled images are written.
+        """
+        self._executor.shutdown(wait=True)
+
+    def _write(self, path, state):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        image = render_state(state, self.cell_size)
+        with open(path, 'wb') as image_file:
+            image_file.write(image)
+
+
+def save_history(moves_tracker: MovesTracker, folder_path, last_step=None, writer=None):
+    """
+    Writes an image of every step of the history, from the initial state to the last step, as step_<n>.png.
+    :param last_step: The last step to write. Defaults to the last step of the history.
+    :param writer: A StepWriter to schedule the images on. When it's not given, the images are written by a new one,
+        and all of them are written when it returns.
+    :return: The number of images.
+    """
+    own_writer = writer is None
+    writer = writer or StepWriter()
+    futures = [writer.submit(os.path.join(folder_path, f"step_{step}.png"), state)
+               for step, state in enumerate(history_states(moves_tracker, last_step))]
+    if own_writer:
+        for future in futures:
+            future.result()  # Raises the error of a failed image, if there was one
+        writer.close()
+    return len(futures)
@@ -0,0 +1,273 @@
+"""
+Alpha-beta (negamax) search over bitboards.
+
+The search runs over a single mutable Position (see the position module), making and unmaking moves in place.
+It is independent of the evaluation: `evaluate(position)` scores a position from the point of view of the side to
+move, and must return integers, so that the root can detect ties exactly (see AlphaBetaSearch.decide). Evaluations
+can read the terms that the position maintains incrementally (e.g. its positional score) in O(1).
+Like heuristics.minimax, a node in which the side to move has no valid moves is treated as a leaf.
+"""
+import time
+import bitboard
+from transposition_table import TranspositionTable
+
+_INFINITY = float('inf')
+_TIME_CHECK_INTERVAL = 1024  # Number of nodes between two checks of the clock.
+
+_order_masks_by_size = {}  # The masks of order_moves of every board size (see order_masks).
+
+
+def order_masks(geometry):
+    """
+    Returns the masks of the order in which the moves of a board size are tried: the corners, the other edge cells,
+    the inner cells, the C-squares (edge cells next to the corners) and the X-squares (cells diagonally next to the
+    corners).
+    """
+    masks = _order_masks_by_size.get(geometry.size)
+    if masks is None:
+        inner_mask = geometry.full_mask & ~(geometry.corners_mask | geometry.c_squares_mask | geometry.x_squares_mask |
+                                            geometry.edges_mask)
+        masks = _order_masks_by_size[geometry.size] = (geometry.corners_mask, geometry.edges_mask, inner_mask,
+                                                       geometry.c_squares_mask, geometry.x_squares_mask)
+    return masks
+
+
+_ORDER_MASKS = order_masks(bitboard.geometry())
+
+
+def order_moves(moves, first_square=None, masks=_ORDER_MASKS):
+    """
+    Orders the moves of a bitmask cheaply: the given first square (e.g. the best move of a previous iteration),
+    then the corners, the other edge cells, the inner cells, and finally the C-squares and the X-squares.
+    :param masks: The order masks of the board size (see order_masks). Defaults to the ones of 8x8 boards.
+    :return: List of bit indexes.
+    """
+    ordered = []
+    if first_square is not None and moves >> first_square & 1:
+        ordered.append(first_square)
+        moves ^= 1 << first_square
+
+    for mask in masks:
+        selected = moves & mask
+        while selected:
+            lowest = selected & -selected
+            ordered.append(lowest.bit_length() - 1)
+            selected ^= lowest
+
+    return ordered
+
+
+def allocate_move_time(remaining_time, empty_squares, reserve=0.05):
+    """
+    Allocates the time budget of a single move out of the remaining time of a player's game clock.
+    The remaining time is divided evenly between the moves that are left to the player (about half of the empty
+    squares), after keeping a small reserve for the overhead that isn't part of the search.
+    """
+    moves_left = max(1, (empty_squares + 1) // 2)
+    return max(0.0, remaining_time * (1 - reserve)) / moves_left
+
+
+class _SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget of the current iteration is over.
+    """
+
+
+class SearchCancelled(Exception):
+    """
+    Raised out of a search that was cancelled by its caller (see the cancel parameter of AlphaBetaSearch).
+    """
+
+
+class AlphaBetaSearch:
+    """
+    Fail-soft negamax search with alpha-beta pruning.
+    - Attributes:
+        - evaluate: The leaf evaluation function, evaluate(position) -> int.
+        - table: An optional TranspositionTable, which can be kept between searches (e.g. along a game).
+        - nodes: Number of nodes that were visited.
+        - leaves: Number of leaf evaluations.
+    """
+    def __init__(self, evaluate, table=None, cancel=None):
+        """
+        :param cancel: An optional threading.Event: once it's set, the search stops by raising SearchCancelled.
+        """
+        self.evaluate = evaluate
+        self.table = table
+        self.nodes = 0
+        self.leaves = 0
+        self._deadline = None
+        self._cancel = cancel
+        self._order_masks = _ORDER_MASKS
+
+    def iterative_deepening(self, position, root_squares, time_budget, max_depth=None):
+        """
+        Choose the best move of the side to move by searching 1, 2, 3, ... plies until the time budget is over.
+
+        The first iteration always completes, and every following iteration searches the best move of the previous
+        one first (the transposition table, if there is one, orders the inner nodes the same way). An iteration that
+        runs out of time is discarded, so the result is always the one of the deepest completed iteration.
+        :param time_budget: The time budget of the move, in seconds.
+        :param max_depth: The maximal depth to search. Defaults to the number of empty squares.
+        :return: The best square (None if there are no moves), its score, and the depth that was completed.
+        """
+        start = time.monotonic()
+        empty_squares = bitboard.popcount(~(position.own | position.opp) & position.geometry.full_mask)
+        max_depth = min(max_depth or empty_squares, empty_squares)
+        root = position.copy()
+
+        best_square, best_score, completed_depth = None, None, 0
+        for depth in range(1, max_depth + 1):
+            self._deadline = start + time_budget if depth > 1 else None
+            try:
+                best_square, best_score = self.decide(position, root_squares, depth, best_square)
+            except _SearchTimeout:
+                position.restore(root)  # The search was interrupted in the middle of a line.
+                break
+            finally:
+                self._deadline = None
+            completed_depth = depth
+
+            # The next iteration takes longer than all the previous ones together, so it won't complete in time.
+            if (time.monotonic() - start) * 2 > time_budget:
+                break
+
+        return best_square, best_score, completed_depth
+
+    def decide(self, position, root_squares, depth, first_square=None):
+        """
+        Choose the best move of the side to move by searching `depth` plies. The position is restored when it returns.
+
+        It returns the same move as a plain minimax over `root_squares` would: when several moves share the best
+        score, the one which appears first in `root_squares` is chosen. For that, moves that come before the current
+        best one in `root_squares` are searched with a window that is one point lower, so that a tie is resolved
+        exactly.
+        :param root_squares: The bit indexes of the moves to consider, in the caller's order.
+        :param first_square: A move to search first (e.g. the best move of a previous iteration).
+        :return: The best square (None if there are no moves), and its score.
+        """
+        self._order_masks = order_masks(position.geometry)
+        priority = {square: index for index, square in enumerate(root_squares)}
+        root_moves = 0
+        for square in root_squares:
+            root_moves |= 1 << square
+
+        best_square = None
+        best_index = len(root_squares)
+        best_score = -_INFINITY
+
+        for square in order_moves(root_moves, first_square, self._order_masks):
+            index = priority[square]
+            alpha = best_score - 1 if index < best_index else best_score
+
+            flips = position.make_move(square)
+            score = -self._negamax(position, depth - 1, -_INFINITY, -alpha)
+            position.unmake_move(square, flips)
+
+            if score > best_score or (score == best_score and index < best_index):
+                best_square, best_index, best_score = square, index, score
+
+        return best_square, best_score
+
+    def score_moves(self, position, root_squares, depth):
+        """
+        Scores every move of the side to move by a full-window search of `depth` plies (slower than decide, which
+        only proves which move is the best). The position is restored when it returns.
+        :return: List of the scores of the moves, in the order of `root_squares`.
+        """
+        return [self.score_move(position, square, depth) for square in root_squares]
+
+    def score_move(self, position, square, depth, alpha=-_INFINITY):
+        """
+        Scores a single move of the side to move by a search of `depth` plies. The position is restored when it
+        returns.
+        :param alpha: A lower bound of interest: the score is exact when it's above alpha, and otherwise it's only an
+            upper bound (which is enough to know that the move isn't better than alpha).
+        """
+        self._order_masks = order_masks(position.geometry)
+        flips = position.make_move(square)
+        score = -self._negamax(position, depth - 1, -_INFINITY, -alpha)
+        position.unmake_move(square, flips)
+        return score
+
+    def principal_variation(self, position, first_square, max_length):
+        """
+        Returns the expected line of play from the position, starting with the given move: the next moves are the
+        best moves that are stored in the transposition table (so without a table, it's only the first move).
+        The position is restored when it returns.
+        :return: List of bit indexes.
+        """
+        line = []
+        undo = []
+        square = first_square
+        while square is not None and len(line) < max_length and position.legal_moves() >> square & 1:
+            line.append(square)
+            undo.append((square, position.make_move(square)))
+            entry = self.table.peek(position.key) if self.table is not None else None
+            square = entry[4] if entry is not None else None
+
+        for square, flips in reversed(undo):
+            position.unmake_move(square, flips)
+        return line
+
+    def _negamax(self, position, depth, alpha, beta):
+        """
+        Returns the score of the position from the point of view of the side to move.
+        """
+        self.nodes += 1
+        if (self._deadline is not None or self._cancel is not None) and not self.nodes % _TIME_CHECK_INTERVAL:
+            if self._cancel is not None and self._cancel.is_set():
+                raise SearchCancelled()
+            if self._deadline is not None and time.monotonic() > self._deadline:
+                raise _SearchTimeout()
+
+        if depth <= 0:
+            self.leaves += 1
+            return self.evaluate(position)
+
+        moves = position.geometry.legal_moves(position.own, position.opp)
+        if not moves:
+            self.leaves += 1
+            return self.evaluate(position)
+
+        table = self.table
+        table_square = None
+        if table is not None:
+            entry = table.probe(position.key)
+            if entry is not None:
+                _, entry_depth, bound, entry_score, table_square = entry
+                if entry_depth >= depth:
+                    if bound == TranspositionTable.EXACT:
+                        return entry_score
+                    if bound == TranspositionTable.LOWER_BOUND:
+                        if entry_score >= beta:
+                            return entry_score
+                    elif entry_score <= alpha:
+                        return entry_score
+
+        original_alpha = alpha
+        best_score = -_INFINITY
+        best_square = None
+        for square in order_moves(moves, table_square, self._order_masks):
+            flips = position.make_move(square)
+            score = -self._negamax(position, depth - 1, -beta, -alpha)
+            position.unmake_move(square, flips)
+
+            if score > best_score:
+                best_score = score
+                best_square = square
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if table is not None:
+            if best_score <= original_alpha:
+                bound = TranspositionTable.UPPER_BOUND
+            elif best_score >= beta:
+                bound = TranspositionTable.LOWER_BOUND
+            else:
+                bound = TranspositionTable.EXACT
+            table.store(position.key, depth, bound, best_score, best_square)
+
+        return best_score
@@ -0,0 +1,65 @@
+"""
+Telemetry of the AI players' decisions, as a stream of JSON lines (one record per decision).
+
+Every record holds the decision itself (ply, player, mode, move, and the time it took in seconds), the statistics
+that the heuristics module reports (algorithm, depth reached, nodes, leaf evaluations, best score, principal
+variation and transposition table hits/misses), and the derived effective branching factor and cache hit rate.
+Records are flushed one by one, so the stream can be followed (or analysed) while a long run goes on.
+"""
+import json
+
+
+class TelemetrySink:
+    """
+    Appends telemetry records to a JSON-lines file.
+    - Attributes:
+        - path: The path of the file.
+        - records: Number of records that were written.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "a")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def emit(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self.records += 1
+
+    def close(self):
+        self._file.close()
+
+
+def open_sink(path):
+    """
+    Returns a sink which appends to the path, or None when there is no path (telemetry is off).
+    """
+    return TelemetrySink(path) if path else None
+
+
+def decision_record(ply, player, mode, move, elapsed, search_info):
+    """
+    Builds the record of a single decision.
+    :param ply: The number of moves that were made before the decision.
+    :param player: The player that decided (1 - red, 2 - white).
+    :param mode: The mode of the player (e.g. 'H1').
+    :param move: The chosen (row, col) move.
+    :param elapsed: The time that the decision took, in seconds.
+    :param search_info: The statistics of the decision, as filled by the heuristics module (may be empty, e.g. for a
+        book move).
+    """
+    record = {'ply': ply, 'player': player, 'mode': mode, 'move': move, 'time': elapsed}
+    record.update(search_info)
+
+    depth, nodes = record.get('depth'), record.get('nodes')
+    record['branching_factor'] = nodes ** (1 / depth) if depth and nodes else None
+    hits, misses = record.get('cache_hits'), record.get('cache_misses')
+    record['cache_hit_rate'] = hits / (hits + misses) if hits is not None and misses is not None and hits + misses \
+        else None
+    return record
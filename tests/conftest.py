@@ -0,0 +1,7 @@
+"""
+The modules of the repository are flat top-level modules, so the tests import them from the repository directory.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+"""
+The AI worker, with a minimal stand-in for the Tk root (its `after` callbacks are run by the test).
+"""
+import threading
+
+from ai_worker import AIWorker
+from search import SearchCancelled
+
+
+class _Master:
+    def __init__(self):
+        self.scheduled = {}
+        self._next_id = 0
+
+    def after(self, _delay_ms, callback, *args):
+        self._next_id += 1
+        self.scheduled[self._next_id] = (callback, args)
+        return self._next_id
+
+    def after_cancel(self, callback_id):
+        self.scheduled.pop(callback_id, None)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, {}
+        for callback, args in scheduled.values():
+            callback(*args)
+
+
+def _wait_for_cancel(cancel):
+    cancel.wait(5)
+    raise SearchCancelled()
+
+
+def test_cancelled_job_stops_the_polling():
+    master = _Master()
+    worker = AIWorker(master)
+    results = []
+    job = worker.submit(_wait_for_cancel, results.append)
+    worker.cancel(job)
+    assert job.cancelled
+    for _ in range(3):
+        master.run_pending()
+    assert not master.scheduled and not results
+    worker.close()
+
+
+def test_results_are_delivered_in_the_tk_thread():
+    master = _Master()
+    worker = AIWorker(master)
+    results, finished = [], threading.Event()
+
+    def decide(_cancel):
+        finished.set()
+        return 42
+
+    job = worker.submit(decide, results.append)
+    assert finished.wait(5)
+    while not job.done:
+        master.run_pending()
+    assert results == [42] and job.result == 42
+    master.run_pending()
+    assert not master.scheduled
+    worker.close()
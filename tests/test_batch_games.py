@@ -0,0 +1,102 @@
+"""
+The NumPy batch engine against scalar playouts over GameState with the one-ply heuristics: the same final boards and
+results, game by game.
+"""
+import random
+
+import pytest
+
+import bitboard
+import heuristics
+from game_state import GameState, player_number
+from moves_tracker import Operator
+
+np = pytest.importorskip('numpy')
+import batch_games  # Needs NumPy
+
+_SCALAR_STRATEGIES = {'H1': heuristics.choose_move_with_best_mobility,
+                      'H2': heuristics.choose_move_with_best_positional_heuristic}
+
+
+def _random_openings(count, seed):
+    """
+    Returns the GameStates after a few seeded random plies (including passes), which aren't over yet.
+    """
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        state = GameState()
+        for _ in range(rng.randint(0, 40)):
+            valid_moves = state.get_valid_moves()
+            if valid_moves:
+                state.make_move(*rng.choice(valid_moves))
+            elif not state.is_game_over():
+                state.pass_turn()
+        if not state.is_game_over():
+            openings.append(state)
+    return openings
+
+
+def _play_scalar(state, red_strategy, white_strategy):
+    """
+    Plays the game to its end with the heuristics functions.
+    :return: The final (red, white) discs, and the number of passes.
+    """
+    state, passes = state.copy(), 0
+    strategies = {Operator.RED: _SCALAR_STRATEGIES[red_strategy], Operator.WHITE: _SCALAR_STRATEGIES[white_strategy]}
+    while not state.is_game_over():
+        valid_moves = state.get_valid_moves()
+        if not valid_moves:
+            state.pass_turn()
+            passes += 1
+            continue
+        player = state.current_player
+        state.make_move(*strategies[player](state.to_array(), valid_moves, player_number(player)))
+    return (state.red, state.white), passes
+
+
+def _batch_of(openings):
+    batch = batch_games.GameBatch(len(openings))
+    for game, state in enumerate(openings):
+        batch.own[game], batch.opp[game] = state.get_discs()
+        batch.red_to_move[game] = state.current_player == Operator.RED
+    return batch
+
+
+@pytest.mark.parametrize('seed, red_strategy, white_strategy',
+                         [(0, 'H1', 'H2'), (1, 'H2', 'H1'), (2, 'H1', 'H1'), (3, 'H2', 'H2')])
+def test_batch_matches_scalar_playouts(seed, red_strategy, white_strategy):
+    openings = _random_openings(30, seed)
+    expected = [_play_scalar(state, red_strategy, white_strategy) for state in openings]
+    assert sum(passes for _, passes in expected) > 0
+
+    batch = _batch_of(openings)
+    batch.play(red_strategy, white_strategy, np.random.default_rng(0))
+    red, white = batch.discs()
+    assert [(int(red[game]), int(white[game])) for game in range(len(openings))] == [discs for discs, _ in expected]
+    assert batch.done.all()
+
+
+@pytest.mark.parametrize('red_strategy, white_strategy', [('H1', 'H2'), ('H2', 'H1')])
+def test_simulate_matches_a_scalar_game(red_strategy, white_strategy):
+    # The strategies are deterministic, so every game from the start position is the same one
+    (red, white), _ = _play_scalar(GameState(), red_strategy, white_strategy)
+    red_counts, white_counts = batch_games.simulate(5, red_strategy, white_strategy, seed=3, batch_size=2)
+    assert red_counts.tolist() == [bitboard.popcount(red)] * 5
+    assert white_counts.tolist() == [bitboard.popcount(white)] * 5
+    results = batch_games.simulate_match(red_strategy, white_strategy, 4, seed=3)
+    diff = bitboard.popcount(red) - bitboard.popcount(white)
+    assert results[:2] == [(1.0 if diff > 0 else 0.5 if diff == 0 else 0.0, diff)] * 2
+
+
+def test_random_games_are_reproducible_and_finished():
+    first = batch_games.simulate(200, 'random', 'H2', seed=7, batch_size=64)
+    second = batch_games.simulate(200, 'random', 'H2', seed=7, batch_size=64)
+    assert all((a == b).all() for a, b in zip(first, second))
+
+    batch = batch_games.GameBatch(200)
+    batch.play('random', 'random', np.random.default_rng(7))
+    red, white = batch.discs()
+    for game in range(200):
+        state = GameState.from_discs(int(red[game]), int(white[game]), Operator.RED)
+        assert state.is_game_over() and not int(red[game]) & int(white[game])
@@ -0,0 +1,21 @@
+"""
+The benchmark suite's search metrics and the comparison of results.
+"""
+import benchmark
+
+
+def test_search_reports_nodes_per_second():
+    positions = benchmark.build_corpus(games_per_phase=2)['midgame']
+    seconds, nodes_per_second = benchmark.benchmark_search(positions, 2)
+    assert seconds > 0 and nodes_per_second > 0
+
+
+def test_compare_flags_slower_times_and_lower_rates():
+    def results(seconds, nodes_per_second):
+        return {'metrics': {'search': {'value': seconds, 'unit': benchmark.TIME_UNIT},
+                            'search.nodes': {'value': nodes_per_second, 'unit': benchmark.NODE_RATE_UNIT}}}
+
+    regressions = benchmark.compare(results(1.5, 50000), results(1.0, 100000))
+    assert [(name, round(slowdown, 2)) for name, _, _, slowdown in regressions] == [('search', 0.5),
+                                                                                    ('search.nodes', 1.0)]
+    assert benchmark.compare(results(1.0, 100000), results(1.05, 95000)) == []
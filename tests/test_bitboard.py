@@ -0,0 +1,145 @@
+"""
+The bitboard engine against the original list-based move generation, and the board symmetries.
+"""
+import random
+
+import pytest
+
+import bitboard
+import perft
+from game_state import GameState
+
+_DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def _flipped_cells(board, player, row, col):
+    """
+    The discs that a move flips, by walking every direction over the 2D board (as the original list-based code).
+    """
+    size = len(board)
+    flipped = []
+    for delta_row, delta_col in _DIRECTIONS:
+        r, c = row + delta_row, col + delta_col
+        line = []
+        while 0 <= r < size and 0 <= c < size and board[r][c] == 3 - player:
+            line.append((r, c))
+            r, c = r + delta_row, c + delta_col
+        if line and 0 <= r < size and 0 <= c < size and board[r][c] == player:
+            flipped.extend(line)
+    return flipped
+
+
+def _valid_moves(board, player):
+    size = len(board)
+    return [(row, col) for row in range(size) for col in range(size)
+            if board[row][col] == 0 and _flipped_cells(board, player, row, col)]
+
+
+def _random_boards(size, games, seed):
+    """
+    Yields the (board, player) of every position of seeded random games played with the list-based rules.
+    """
+    rng = random.Random(seed)
+    for _ in range(games):
+        red, white = bitboard.geometry(size).start_discs()
+        board, player = bitboard.geometry(size).to_board(red, white), 1
+        while True:
+            moves = _valid_moves(board, player)
+            if not moves:
+                player = 3 - player
+                moves = _valid_moves(board, player)
+                if not moves:
+                    break
+            yield board, player
+            row, col = rng.choice(moves)
+            board = [board_row[:] for board_row in board]
+            for r, c in _flipped_cells(board, player, row, col) + [(row, col)]:
+                board[r][c] = player
+            player = 3 - player
+
+
+def test_moves_and_flips_match_the_list_based_rules():
+    for board, player in _random_boards(bitboard.BOARD_SIZE, 60, seed=1):
+        own, opp = bitboard.split_board(board, player)
+        moves = bitboard.legal_moves(own, opp)
+        assert bitboard.mask_to_cells(moves) == _valid_moves(board, player)
+        for row, col in bitboard.mask_to_cells(moves):
+            square = bitboard.square_index(row, col)
+            flips = bitboard.flip_mask(own, opp, square)
+            assert sorted(bitboard.mask_to_cells(flips)) == sorted(_flipped_cells(board, player, row, col))
+            new_own, new_opp = bitboard.apply_move(own, opp, square)
+            assert new_own == own | flips | (1 << square) and new_opp == opp & ~flips
+        # Every other empty square flips nothing
+        for square in bitboard.iter_squares(~(own | opp | moves) & bitboard.FULL_MASK):
+            assert bitboard.flip_mask(own, opp, square) == 0
+
+
+@pytest.mark.parametrize('size', [4, 6, 10])
+def test_other_sizes_match_the_list_based_rules(size):
+    geometry = bitboard.geometry(size)
+    for board, player in _random_boards(size, 20, seed=size):
+        own, opp = geometry.split_board(board, player)
+        assert geometry.to_board(*((own, opp) if player == 1 else (opp, own))) == board
+        moves = geometry.legal_moves(own, opp)
+        assert moves & ~geometry.full_mask == 0
+        assert geometry.mask_to_cells(moves) == _valid_moves(board, player)
+        for row, col in geometry.mask_to_cells(moves):
+            square = geometry.square_index(row, col)
+            flips = geometry.flip_mask(own, opp, square)
+            assert sorted(geometry.mask_to_cells(flips)) == sorted(_flipped_cells(board, player, row, col))
+            assert geometry.apply_move(own, opp, square) == (own | flips | (1 << square), opp & ~flips)
+
+
+def _geometry_perft(geometry, own, opp, depth):
+    """
+    Perft over the moves of a board size (see the perft module): a pass counts as a ply, a finished game as a leaf.
+    """
+    if depth == 0:
+        return 1
+    moves = geometry.legal_moves(own, opp)
+    if not moves:
+        if not geometry.legal_moves(opp, own):
+            return 1
+        return _geometry_perft(geometry, opp, own, depth - 1)
+    return sum(_geometry_perft(geometry, *reversed(geometry.apply_move(own, opp, square)), depth - 1)
+               for square in bitboard.iter_squares(moves))
+
+
+@pytest.mark.parametrize('size, depth', [(4, 8), (6, 6), (8, 5), (10, 5)])
+def test_perft_of_other_sizes_matches_the_list_based_count(size, depth):
+    geometry = bitboard.geometry(size)
+    red, white = geometry.start_discs()
+    for plies in range(1, depth + 1):
+        assert _geometry_perft(geometry, red, white, plies) == perft.perft_board(geometry.to_board(red, white), 1,
+                                                                                  plies)
+    if size == 8:
+        assert _geometry_perft(geometry, red, white, depth) == perft.reference_count(depth)
+
+
+@pytest.mark.parametrize('symmetry', range(8))
+def test_inverse_symmetry_reverts_the_transform(symmetry):
+    rng = random.Random(symmetry)
+    for mask in [0, bitboard.FULL_MASK, 1, 1 << 63] + [rng.getrandbits(64) for _ in range(200)]:
+        transformed = bitboard.transform(mask, symmetry)
+        assert bitboard.popcount(transformed) == bitboard.popcount(mask)
+        assert bitboard.transform(transformed, bitboard.inverse_symmetry(symmetry)) == mask
+
+
+@pytest.mark.parametrize('symmetry', range(8))
+def test_symmetries_preserve_the_moves(symmetry):
+    for board, player in _random_boards(bitboard.BOARD_SIZE, 5, seed=2):
+        own, opp = bitboard.split_board(board, player)
+        moved_own, moved_opp = bitboard.transform(own, symmetry), bitboard.transform(opp, symmetry)
+        assert bitboard.legal_moves(moved_own, moved_opp) == bitboard.transform(bitboard.legal_moves(own, opp),
+                                                                                symmetry)
+
+
+def test_canonical_is_the_same_for_all_symmetries():
+    own, opp = GameState().get_discs()
+    own, opp = bitboard.apply_move(own, opp, bitboard.square_index(2, 3))
+    expected = bitboard.canonical(own, opp)
+    for symmetry in range(8):
+        moved_own, moved_opp = bitboard.transform(own, symmetry), bitboard.transform(opp, symmetry)
+        canonical_own, canonical_opp, found = bitboard.canonical(moved_own, moved_opp)
+        assert (canonical_own, canonical_opp) == expected[:2]
+        assert (bitboard.transform(moved_own, found), bitboard.transform(moved_opp, found)) == expected[:2]
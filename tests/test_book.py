@@ -0,0 +1,81 @@
+"""
+The opening book: the same move for the 8 symmetric versions of a position, and no move out of the book.
+"""
+import pytest
+
+import bitboard
+import book
+import heuristics
+from game_state import GameState
+
+
+@pytest.fixture(scope='module')
+def book_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('book') / "book.bin")
+    assert book.build_book(path, plies=2, depth=1) > 1
+    return path
+
+
+def _book_positions():
+    """
+    Returns the (state, player) of the start position and of the positions after its first move.
+    """
+    start = GameState()
+    positions = [start]
+    for move in start.get_valid_moves():
+        child = start.copy()
+        child.make_move(*move)
+        positions.append(child)
+    return positions
+
+
+def _symmetric_board(state, symmetry):
+    own, opp = (bitboard.transform(mask, symmetry) for mask in state.get_discs())
+    board = bitboard.to_board(own, opp)  # The side to move plays red
+    return board, heuristics.get_valid_moves(board, 1)
+
+
+def _child(board, move):
+    """
+    Returns the canonical form of the position after the move of red (the side to move).
+    """
+    own, opp = bitboard.apply_move(*bitboard.split_board(board, 1), bitboard.square_index(*move))
+    return bitboard.canonical(opp, own)[:2]
+
+
+def test_symmetric_positions_share_the_book_move(book_path):
+    with book.open_book(book_path) as opening_book:
+        for state in _book_positions():
+            board, valid_moves = _symmetric_board(state, 0)
+            move = opening_book.choose_move(board, valid_moves, 1)
+            assert move in valid_moves
+            # When a symmetry maps the position to itself, its moves have symmetric equivalents which are as good
+            self_symmetric = any(_symmetric_board(state, symmetry)[0] == board for symmetry in range(1, 8))
+            for symmetry in range(1, 8):
+                symmetric_board, symmetric_moves = _symmetric_board(state, symmetry)
+                symmetric_move = opening_book.choose_move(symmetric_board, symmetric_moves, 1)
+                assert _child(symmetric_board, symmetric_move) == _child(board, move)
+                if not self_symmetric:
+                    expected = bitboard.transform(1 << bitboard.square_index(*move), symmetry).bit_length() - 1
+                    assert symmetric_move == bitboard.square_to_cell(expected)
+
+
+def test_book_moves_from_either_side(book_path):
+    with book.open_book(book_path) as opening_book:
+        for state in _book_positions():
+            board, player = state.to_array(), 1 if state.red_counter + state.white_counter == 4 else 2
+            assert opening_book.choose_move(board, state.get_valid_moves(), player) in state.get_valid_moves()
+
+
+def test_positions_out_of_the_book(book_path):
+    state = _book_positions()[1]
+    state.make_move(*state.get_valid_moves()[0])
+    state.make_move(*state.get_valid_moves()[0])  # Past the 2 plies of the book
+    with book.open_book(book_path) as opening_book:
+        assert opening_book.choose_move(state.to_array(), state.get_valid_moves(), 2) is None
+        assert opening_book.probe(*state.get_discs()) is None
+
+
+def test_open_book_without_a_file(tmp_path):
+    assert book.open_book(None) is None
+    assert book.open_book(str(tmp_path / "missing.bin")) is None
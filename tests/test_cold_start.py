@@ -0,0 +1,54 @@
+"""
+The headless modes start without loading the GUI (Tkinter, the GUI modules and pyautogui), or the modules of the
+other modes.
+"""
+import os
+import subprocess
+import sys
+import time
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_GUI_MODULES = ('tkinter', 'main', 'board_view', 'pyautogui')
+_MAX_START_SECONDS = 2.0  # Generous, so a loaded machine doesn't fail the test: the start takes about 0.1s.
+_TOOL_MODULES = ('analysis', 'batch_games', 'benchmark', 'book', 'enumeration', 'perft', 'tournament', 'training')
+_REPORT = "import sys; print(' '.join(name for name in {!r} if name in sys.modules))".format(_GUI_MODULES)
+_TOOLS_REPORT = "import sys; print(' '.join(name for name in {!r} if name in sys.modules))".format(_TOOL_MODULES)
+
+
+def _run(code, *args, cwd=_REPO_DIR):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code, *args], cwd=cwd, capture_output=True, text=True,
+                            check=True).stdout
+    return output, time.perf_counter() - start
+
+
+def test_import_doesnt_load_the_gui():
+    output, seconds = _run(f"import Reversi; {_REPORT}")
+    assert output.split() == []
+    assert seconds < _MAX_START_SECONDS
+
+
+def test_import_doesnt_load_the_modes():
+    output, _ = _run(f"import Reversi; {_TOOLS_REPORT}")
+    assert output.split() == []
+
+
+def test_analyse_doesnt_load_the_gui():
+    code = ("import runpy, sys; sys.argv = ['Reversi.py', '-analyse', 'f4f5c6', '-depth', '2']; "
+            f"runpy.run_path('Reversi.py', run_name='__main__'); {_REPORT}; {_TOOLS_REPORT}")
+    output, seconds = _run(code)
+    lines = output.splitlines()
+    assert lines[0] == "White to move, depth 2:"
+    assert lines[-2].split() == []
+    assert lines[-1].split() == ['analysis']  # Only the module of the mode
+    assert seconds < _MAX_START_SECONDS
+
+
+def test_analyse_uses_the_configured_board_size(tmp_path):
+    (tmp_path / 'config.json').write_text('{"board_size": 6}')
+    code = (f"import runpy, sys; sys.path.insert(0, {_REPO_DIR!r}); "
+            "sys.argv = ['Reversi.py', '-analyse', '-depth', '1']; "
+            f"runpy.run_path({os.path.join(_REPO_DIR, 'Reversi.py')!r}, run_name='__main__')")
+    output, _ = _run(code, cwd=tmp_path)
+    # The 4 symmetric first moves of a 6x6 board
+    assert sorted(line.split(':')[0] for line in output.splitlines()[1:]) == ['b4', 'c5', 'd2', 'e3']
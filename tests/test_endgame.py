@@ -0,0 +1,112 @@
+"""
+The endgame solver against a brute-force negamax over every line to the end of the game, and the solution of the
+4x4 board.
+"""
+import random
+
+import pytest
+
+import bitboard
+import endgame
+from position import Position
+from transposition_table import TranspositionTable
+
+
+def _brute_force(geometry, own, opp, passed=False):
+    """
+    Returns the exact final disc differential of the side to move (the empty squares count for the winner), by
+    searching every line, and the number of passes that were played on the way.
+    """
+    moves = geometry.legal_moves(own, opp)
+    if not moves:
+        if passed:
+            own_count, opp_count = bitboard.popcount(own), bitboard.popcount(opp)
+            return endgame.final_score(own_count, opp_count, geometry.squares), 0
+        score, passes = _brute_force(geometry, opp, own, True)
+        return -score, passes + 1
+    best_score, total_passes = None, 0
+    for square in bitboard.iter_squares(moves):
+        score, passes = _brute_force(geometry, *reversed(geometry.apply_move(own, opp, square)))
+        best_score = -score if best_score is None else max(best_score, -score)
+        total_passes += passes
+    return best_score, total_passes
+
+
+def _endgame_positions(count, empties, seed, size=bitboard.BOARD_SIZE):
+    """
+    Returns `count` (own, opp) positions of seeded random games with at most `empties` empty squares, which aren't
+    over yet (the side to move may have to pass).
+    """
+    geometry = bitboard.geometry(size)
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        own, opp = geometry.start_discs()
+        while bitboard.popcount(~(own | opp) & geometry.full_mask) > empties:
+            moves = list(bitboard.iter_squares(geometry.legal_moves(own, opp)))
+            if moves:
+                own, opp = geometry.apply_move(own, opp, rng.choice(moves))
+            elif not geometry.legal_moves(opp, own):
+                break
+            opp, own = own, opp
+        else:
+            if geometry.legal_moves(own, opp) or geometry.legal_moves(opp, own):
+                positions.append((own, opp))
+    return positions
+
+
+def test_solve_matches_brute_force():
+    geometry = bitboard.geometry()
+    passes = 0
+    for own, opp in _endgame_positions(24, 8, seed=0):
+        expected, position_passes = _brute_force(geometry, own, opp)
+        passes += position_passes
+        for mode, result in ((endgame.EXACT, expected), (endgame.WIN_LOSS_DRAW, (expected > 0) - (expected < 0))):
+            for table in (None, TranspositionTable(1)):
+                position = Position(own, opp, 1, hashed=table is not None)
+                assert endgame.EndgameSolver(mode, table=table).solve(position) == result
+                assert (position.own, position.opp) == (own, opp)
+    assert passes > 0
+
+
+def test_solve_matches_brute_force_on_other_sizes():
+    for size in (4, 6, 10):
+        geometry = bitboard.geometry(size)
+        for own, opp in _endgame_positions(6, 7, seed=size, size=size):
+            expected = _brute_force(geometry, own, opp)[0]
+            for table in (None, TranspositionTable(1)):
+                position = Position(own, opp, 1, hashed=table is not None, size=size)
+                assert endgame.EndgameSolver(endgame.EXACT, table=table).solve(position) == expected
+
+
+def test_decide_chooses_a_best_move():
+    geometry = bitboard.geometry()
+    for own, opp in _endgame_positions(20, 7, seed=2):
+        moves = list(bitboard.iter_squares(geometry.legal_moves(own, opp)))
+        if not moves:
+            continue
+        results = [-_brute_force(geometry, *reversed(geometry.apply_move(own, opp, square)))[0] for square in moves]
+        for mode in (endgame.EXACT, endgame.WIN_LOSS_DRAW):
+            square, result = endgame.EndgameSolver(mode).decide(Position(own, opp, 1), moves)
+            if mode == endgame.EXACT:
+                assert result == max(results)
+                assert square == moves[results.index(result)]  # Ties go to the first move
+            else:
+                assert result == (max(results) > 0) - (max(results) < 0)
+                assert (results[moves.index(square)] > 0) - (results[moves.index(square)] < 0) == result
+
+
+def test_final_score_counts_the_empty_squares_for_the_winner():
+    assert endgame.final_score(40, 20) == 24
+    assert endgame.final_score(20, 40) == -24
+    assert endgame.final_score(30, 30, 64) == 0
+    assert endgame.final_score(3, 11, 16) == -10
+
+
+def test_solve_start_4x4():
+    # White wins 11-3 with perfect play, and the 2 empty squares count for the winner
+    for table_size_mb in (None, 1):
+        assert endgame.solve_start(4, endgame.EXACT, table_size_mb)['result'] == -10
+        assert endgame.solve_start(4, endgame.WIN_LOSS_DRAW, table_size_mb)['result'] == -1
+    geometry = bitboard.geometry(4)
+    assert _brute_force(geometry, *geometry.start_discs())[0] == -10
@@ -0,0 +1,37 @@
+"""
+The enumeration of the distinct positions with N discs, against a plain in-memory enumeration.
+"""
+import bitboard
+import enumeration
+from game_state import GameState
+
+_DISCS = 9
+
+
+def _expected_counts(num_of_discs):
+    own, opp = GameState().get_discs()
+    level = {(*bitboard.canonical(own, opp)[:2], 1)}
+    counts = [1]
+    for _ in range(4, num_of_discs):
+        level = {child for parent in level for child in enumeration.children(*parent)}
+        counts.append(len(level))
+    return counts, level
+
+
+def test_enumeration_matches_in_memory_levels(tmp_path):
+    path = tmp_path / 'positions.bin'
+    counts = enumeration.enumerate_positions(_DISCS, str(path), workers=2, spill_threshold=500, chunk_size=300)
+    expected_counts, expected_positions = _expected_counts(_DISCS)
+    assert counts == expected_counts
+    assert enumeration.read_header(str(path)) == (_DISCS, expected_counts[-1])
+    assert list(enumeration.iter_positions(str(path))) == sorted(expected_positions)
+
+
+def test_side_to_move_is_a_part_of_the_position():
+    # A position where red must pass: white's discs are reached with white to move
+    red = bitboard.cells_to_mask([(0, 1)])
+    white = bitboard.cells_to_mask([(0, 0)])
+    assert not bitboard.legal_moves(red, white)
+    # White plays after red's pass, so red is to move again (and has no discs left)
+    child = bitboard.canonical(0, bitboard.cells_to_mask([(0, 0), (0, 1), (0, 2)]))[:2]
+    assert enumeration.children(red, white, 1) == [(*child, 1)]
@@ -0,0 +1,68 @@
+"""
+Game records: the serial and the batched replays, and the records of a resumed tournament.
+"""
+import random
+
+import pytest
+
+import bitboard
+import game_records
+import tournament
+from game_state import GameState
+
+
+def _random_records(count, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        state, moves = GameState(), []
+        while not state.is_game_over():
+            valid_moves = state.get_valid_moves()
+            if not valid_moves:
+                state.pass_turn()
+                moves.append(game_records.PASS)
+                continue
+            move = rng.choice(valid_moves)
+            state.make_move(*move)
+            moves.append(bitboard.square_index(*move))
+        records.append(bytes(moves))
+    return records
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / 'games.rvg')
+    records = _random_records(20)
+    with game_records.GameRecordWriter(path) as writer:
+        for moves in records:
+            writer.write(moves)
+    assert list(game_records.read_games(path)) == [(moves, game_records.final_result(moves)) for moves in records]
+
+
+def test_batched_replay_matches_the_serial_one():
+    pytest.importorskip('numpy')
+    import batch_games
+    records = _random_records(200)
+    replayer = game_records.BulkReplayer()
+    for plies in (None, 0, 7, 40):
+        red, white, red_to_move = batch_games.replay_records(records, plies)
+        for index, moves in enumerate(records):
+            end = len(moves) if plies is None else min(plies, len(moves))
+            expected = game_records.replay(moves, end)
+            assert (int(red[index]), int(white[index]), 1 if red_to_move[index] else 2) == expected
+            assert replayer.replay(moves, end) == expected
+
+
+def test_resumed_tournament_drops_the_records_after_the_checkpoint(tmp_path):
+    checkpoint_path, records_path = str(tmp_path / 'checkpoint.json'), str(tmp_path / 'games.rvg')
+    tournament.run_tournament('random', 'H1', 4, workers=1, checkpoint_path=checkpoint_path,
+                              records_path=records_path)
+    # Games that were recorded after the last checkpoint, before the tournament was interrupted
+    with game_records.GameRecordWriter(records_path, append=True) as writer:
+        for moves in _random_records(3, seed=1):
+            writer.write(moves)
+
+    tournament.run_tournament('random', 'H1', 8, workers=1, checkpoint_path=checkpoint_path,
+                              records_path=records_path)
+    games = list(game_records.read_games(records_path))
+    assert len(games) == 8
+    assert not set(_random_records(3, seed=1)) & {moves for moves, _ in games}
@@ -0,0 +1,102 @@
+"""
+GameState against the list-based rules of the heuristics module: the valid moves, the flips, the passes, the end of
+the game, and undoing and redoing moves.
+"""
+import random
+
+import pytest
+
+import heuristics
+from game_state import GameState, opponent_of, player_number
+from moves_tracker import Operator
+
+
+def _random_games(games, seed, size=8):
+    """
+    Yields the state before every turn of seeded random games, and the move (None for a pass) that follows it.
+    """
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = GameState(size)
+        while not state.is_game_over():
+            valid_moves = state.get_valid_moves()
+            move = rng.choice(valid_moves) if valid_moves else None
+            yield state.copy(), move
+            if move is None:
+                state.pass_turn()
+            else:
+                state.make_move(*move)
+
+
+def test_start_position():
+    state = GameState()
+    assert (state.red_counter, state.white_counter, state.current_player) == (2, 2, Operator.RED)
+    assert state.get_cell(3, 3) == state.get_cell(4, 4) == 1 and state.get_cell(3, 4) == state.get_cell(4, 3) == 2
+    assert state.get_valid_moves() == [(2, 4), (3, 5), (4, 2), (5, 3)]
+    assert (state.is_valid_move(3, 3), state.is_valid_move(0, 0), state.is_valid_move(2, 4)) == (1, 2, 0)
+
+
+def test_moves_and_passes_follow_the_list_based_rules():
+    passes = 0
+    for state, move in _random_games(20, seed=0):
+        board, player = state.to_array(), player_number(state.current_player)
+        assert state.get_valid_moves() == heuristics.get_valid_moves(board, player)
+        if move is None:
+            passes += 1
+            assert heuristics.get_valid_moves(board, 3 - player)  # Otherwise the game would be over
+            state.pass_turn()
+            assert state.to_array() == board and player_number(state.current_player) == 3 - player
+            continue
+        expected = heuristics.simulate_move(heuristics.copy_board(board), *move, player)
+        flipped = state.make_move(*move)
+        assert state.to_array() == expected
+        assert player_number(state.current_player) == 3 - player
+        assert state.red_counter + state.white_counter == sum(cell != 0 for row in expected for cell in row)
+        assert sorted(flipped) == sorted((row, col) for row in range(8) for col in range(8)
+                                         if board[row][col] == 3 - player and expected[row][col] == player)
+    assert passes > 0
+
+
+def test_game_over_only_when_no_player_can_move():
+    for seed in range(5):
+        *_, (state, move) = _random_games(1, seed)
+        state.make_move(*move)
+        board = state.to_array()
+        assert state.is_game_over()
+        assert not heuristics.get_valid_moves(board, 1) and not heuristics.get_valid_moves(board, 2)
+    assert not GameState().is_game_over()
+
+
+def test_invalid_moves_and_passes_raise():
+    state = GameState()
+    with pytest.raises(ValueError):
+        state.make_move(3, 3)
+    with pytest.raises(ValueError):
+        state.make_move(0, 0)
+    with pytest.raises(ValueError):
+        state.pass_turn()
+    assert state.to_array() == GameState().to_array() and state.current_player == Operator.RED
+
+
+def test_undo_and_redo_restore_the_states():
+    for state, move in _random_games(5, seed=1):
+        if move is None:
+            continue
+        before, operator = state.copy(), state.current_player
+        flipped = state.make_move(*move)
+        after = state.copy()
+        state.undo_move(move, flipped, operator)
+        assert (state.red, state.white, state.current_player) == (before.red, before.white, operator)
+        state.redo_move(move, flipped, operator)
+        assert (state.red, state.white, state.current_player) == (after.red, after.white, opponent_of(operator))
+
+
+@pytest.mark.parametrize('size', [4, 6, 10])
+def test_other_board_sizes(size):
+    for state, move in _random_games(5, seed=size, size=size):
+        board, player = state.to_array(), player_number(state.current_player)
+        assert len(board) == size
+        assert state.get_valid_moves() == heuristics.get_valid_moves(board, player)
+        if move is not None:
+            state.make_move(*move)
+            assert state.to_array() == heuristics.simulate_move(heuristics.copy_board(board), *move, player)
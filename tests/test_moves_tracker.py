@@ -0,0 +1,114 @@
+"""
+Random access to the history of the moves tracker (seek, state_at and iter_states) against a full replay of the
+game, across the snapshots of the board and after passes.
+"""
+import random
+
+import pytest
+
+import moves_tracker
+from game_state import GameState
+from moves_tracker import MovesTracker, Operator
+
+
+def _tracked_game(seed, size=8):
+    """
+    Plays a seeded random game to its end, recorded like the GUI does (including the passes).
+    :return: The moves tracker, the (red, white, player to move) of every step, and the number of passes.
+    """
+    rng = random.Random(seed)
+    tracker, state = MovesTracker(size), GameState(size)
+    center = size // 2
+    for cell in ((center - 1, center - 1), (center - 1, center), (center, center - 1), (center, center)):
+        tracker.add_item(cell, None, Operator.INITIAL, None)
+    tracker.add_item(None, None, state.current_player, state.get_valid_moves())
+
+    states, passes = [], 0
+    while True:
+        if not state.get_valid_moves_mask() and not state.is_game_over():
+            state.pass_turn()
+            tracker.set_pass(state.current_player, state.get_valid_moves())
+            passes += 1
+        states.append((state.red, state.white, state.current_player))
+        if state.is_game_over():
+            return tracker, states, passes
+        move = rng.choice(state.get_valid_moves())
+        tracker.set_move(move, state.make_move(*move))
+        tracker.add_item(None, None, state.current_player, state.get_valid_moves())
+
+
+def _games_with_passes():
+    games = [_tracked_game(seed) for seed in range(40)]
+    assert sum(passes for _, _, passes in games) > 0
+    return [(tracker, states) for tracker, states, passes in games if passes] + [games[0][:2]]
+
+
+@pytest.fixture(scope='module')
+def games():
+    return _games_with_passes()
+
+
+def test_iter_states_matches_the_replay(games):
+    for tracker, states in games:
+        assert tracker.total_steps == len(states) - 1 > moves_tracker._CHECKPOINT_INTERVAL
+        assert list(tracker.iter_states()) == states
+        assert list(tracker.iter_states(13)) == states[:14]
+
+
+def test_snapshots_match_the_replay(games):
+    interval = moves_tracker._CHECKPOINT_INTERVAL
+    for tracker, states in games:
+        assert len(tracker.checkpoints) == tracker.total_steps // interval + 1
+        assert tracker.checkpoints == [states[step][:2] for step in range(0, len(states), interval)]
+
+
+def test_state_at_matches_the_replay(games):
+    rng = random.Random(0)
+    for tracker, states in games:
+        steps = list(range(len(states)))
+        rng.shuffle(steps)
+        for step in steps:
+            assert tracker.state_at(step) == states[step]
+
+
+def test_seek_matches_the_replay(games):
+    rng = random.Random(1)
+    for tracker, states in games:
+        last = len(states) - 1
+        # Jumps back and forth, to the steps around the snapshots and to random ones
+        steps = [0, last, 7, 8, 9, 16, 15, last - 1] + [rng.randint(0, last) for _ in range(30)] + [last]
+        for step in steps:
+            assert tracker.seek(step) == states[step]
+            assert tracker.displayed_step == step and tracker.is_board_active() == (step == last)
+            assert len(tracker.main_stack) + len(tracker.redo_stack) == moves_tracker._INITIAL_ITEMS + last + 1
+            # The player to move of the displayed step, as the GUI reads it after a redo
+            assert tracker.main_stack[-1].operator == states[step][2]
+            assert list(tracker.iter_states()) == states  # The undone moves are still part of the history
+
+
+def test_seek_and_undo_redo_agree(games):
+    tracker, states = games[0]
+    tracker.seek(len(states) - 1)
+    for step in range(len(states) - 2, 4, -1):
+        tracker.undo()
+        assert tracker.displayed_step == step and tracker.state_at(step) == states[step]
+    tracker.seek(2)
+    for step in range(3, 12):
+        tracker.redo()
+        assert tracker.displayed_step == step and tracker.main_stack[-1].operator == states[step][2]
+    tracker.seek(len(states) - 1)
+
+
+def test_seek_out_of_the_history(games):
+    tracker, states = games[0]
+    for step in (-1, len(states)):
+        with pytest.raises(ValueError):
+            tracker.seek(step)
+
+
+@pytest.mark.parametrize('size', [4, 6, 10])
+def test_other_board_sizes(size):
+    tracker, states, _ = _tracked_game(size, size)
+    assert list(tracker.iter_states()) == states
+    for step in range(len(states) - 1, -1, -3):
+        assert tracker.seek(step) == states[step]
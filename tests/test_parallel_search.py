@@ -0,0 +1,42 @@
+"""
+The root-parallel search: its decisions are the serial ones, and closing it stops a running decision.
+"""
+import threading
+
+import heuristics
+from game_state import GameState, player_number
+from search import SearchCancelled
+
+
+def test_decisions_match_the_serial_search():
+    state = GameState()
+    with heuristics.create_parallel_search(2) as parallel:
+        for _ in range(12):
+            moves = state.get_valid_moves()
+            board, player = state.to_array(), player_number(state.current_player)
+            expected = heuristics.minimax_decision(board, moves, 3, player, endgame_empties=None)
+            assert heuristics.minimax_decision(board, moves, 3, player, endgame_empties=None,
+                                               parallel=parallel) == expected
+            state.make_move(*expected)
+
+
+def test_close_cancels_a_running_decision():
+    parallel = heuristics.create_parallel_search(2)
+    state = GameState()
+    errors = []
+
+    def decide():
+        try:
+            heuristics.minimax_decision(state.to_array(), state.get_valid_moves(), 12, 1, endgame_empties=None,
+                                        parallel=parallel)
+        except SearchCancelled as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=decide)
+    thread.start()
+    thread.join(0.5)
+    assert thread.is_alive()
+    parallel.close()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert len(errors) == 1
@@ -0,0 +1,95 @@
+"""
+The pattern evaluation (H3): the indexes of the pattern instances, their symmetries, and the evaluation as the sum of
+the table lookups.
+"""
+import random
+
+import bitboard
+import heuristics
+import patterns
+
+
+def _random_positions(count, seed):
+    """
+    Returns (own, opp) positions of seeded random games, from the side to move, at every stage of the game.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        own, opp = bitboard.geometry().start_discs()
+        for _ in range(rng.randint(0, 60)):
+            moves = list(bitboard.iter_squares(bitboard.legal_moves(own, opp)))
+            if moves:
+                own, opp = bitboard.apply_move(own, opp, rng.choice(moves))
+            elif not bitboard.legal_moves(opp, own):
+                break
+            own, opp = opp, own
+        positions.append((own, opp))
+    return positions
+
+
+def _reference_index(own, opp, squares):
+    return sum(3 ** digit * (1 if own >> square & 1 else 2 if opp >> square & 1 else 0) for square, digit in squares)
+
+
+def _transform(square, symmetry):
+    return bitboard.transform(1 << square, symmetry).bit_length() - 1
+
+
+def test_indexes_match_the_squares_of_the_instances():
+    instances = patterns.instance_squares()
+    assert len(instances) == patterns.INSTANCES == 46
+    for own, opp in _random_positions(50, seed=0):
+        assert patterns.indexes(own, opp) == tuple(_reference_index(own, opp, squares) for squares in instances)
+
+
+def test_indexes_under_the_board_symmetries():
+    instances = patterns.instance_squares()
+    instance_patterns = [name for name, _, symmetries in patterns.PATTERNS for _ in symmetries]
+    by_squares = {frozenset(square for square, _ in squares): index for index, squares in enumerate(instances)}
+    for own, opp in _random_positions(20, seed=1):
+        indexes = patterns.indexes(own, opp)
+        for symmetry in range(8):
+            image_indexes = patterns.indexes(bitboard.transform(own, symmetry), bitboard.transform(opp, symmetry))
+            for index, squares in enumerate(instances):
+                # The image of every instance is an instance of the same pattern, which holds the same discs
+                image = by_squares[frozenset(_transform(square, symmetry) for square, _ in squares)]
+                assert instance_patterns[image] == instance_patterns[index]
+                digits = dict(instances[image])
+                read_as_image = [(square, digits[_transform(square, symmetry)]) for square, _ in squares]
+                assert image_indexes[image] == _reference_index(own, opp, read_as_image)
+                if digits == {_transform(square, symmetry): digit for square, digit in squares}:
+                    assert image_indexes[image] == indexes[index]  # The same reading order: the very same index
+            corner_indexes = [indexes[index] for index, name in enumerate(instance_patterns) if name == 'corner_2x5']
+            assert sorted(image_indexes[index] for index, name in enumerate(instance_patterns)
+                          if name == 'corner_2x5') == sorted(corner_indexes)
+
+
+def test_default_evaluation_is_symmetric():
+    for own, opp in _random_positions(30, seed=2):
+        score = patterns.evaluate(own, opp)
+        for symmetry in range(1, 8):
+            assert patterns.evaluate(bitboard.transform(own, symmetry), bitboard.transform(opp, symmetry)) == score
+
+
+def test_evaluation_is_the_sum_of_the_table_lookups(monkeypatch):
+    rng = random.Random(3)
+    weights = [[[rng.randint(-100, 100) for _ in range(3 ** len(squares))] for _, squares, _ in patterns.PATTERNS]
+               for _ in range(patterns.PHASES)]
+    monkeypatch.setattr(patterns, '_weights', None)
+    patterns.set_weights(weights)
+    instance_patterns = [pattern for pattern, (_, _, symmetries) in enumerate(patterns.PATTERNS) for _ in symmetries]
+    for own, opp in _random_positions(30, seed=4):
+        tables = weights[patterns.phase(own, opp)]
+        expected = sum(tables[pattern][index] for pattern, index in zip(instance_patterns, patterns.indexes(own, opp)))
+        assert patterns.evaluate(own, opp) == expected
+        assert heuristics.pattern_heuristic(bitboard.to_board(own, opp), 1) == expected
+
+
+def test_default_weights_follow_the_positional_weights(monkeypatch):
+    # Without square weights, the discs weigh nothing in the first phases
+    monkeypatch.setattr(heuristics, '_POSITIONAL_WEIGHTS', [[0] * 8 for _ in range(8)])
+    monkeypatch.setattr(patterns, '_weights', None)
+    for own, opp in _random_positions(20, seed=5):
+        if patterns.phase(own, opp) < 2:
+            assert patterns.evaluate(own, opp) == 0
@@ -0,0 +1,101 @@
+"""
+Perft of the start position against the known counts, and the agreement of all the ways to count it.
+"""
+import random
+
+import pytest
+
+import bitboard
+import perft
+from game_state import GameState
+
+_ENDGAME_EMPTIES = 7
+
+
+def _start():
+    return GameState().get_discs()
+
+
+def _endgame_positions(count):
+    """
+    Plays seeded random games to a few empty squares, and returns the (own, opp) positions where a pass occurs
+    within the rest of the game.
+    """
+    rng = random.Random(0)
+    positions = []
+    while len(positions) < count:
+        own, opp = _start()
+        while bitboard.popcount(own | opp) < 64 - _ENDGAME_EMPTIES:
+            moves = list(bitboard.iter_squares(bitboard.legal_moves(own, opp)))
+            if not moves:
+                own, opp = opp, own
+                if not bitboard.legal_moves(own, opp):
+                    break
+                continue
+            new_own, new_opp = bitboard.apply_move(own, opp, rng.choice(moves))
+            own, opp = new_opp, new_own
+        if bitboard.popcount(own | opp) == 64 - _ENDGAME_EMPTIES and _has_pass(own, opp, _ENDGAME_EMPTIES):
+            positions.append((own, opp))
+    return positions
+
+
+def _has_pass(own, opp, depth):
+    if depth == 0:
+        return False
+    return any(move == perft._PASS or _has_pass(child_own, child_opp, depth - 1)
+               for move, child_own, child_opp in perft._children(own, opp))
+
+
+@pytest.mark.parametrize('depth', range(1, 9))
+def test_reference_counts(depth):
+    assert perft.perft(*_start(), depth) == perft.reference_count(depth)
+
+
+def test_reference_count_with_passes():
+    # Depth 9 is the first depth whose tree has passes and finished games.
+    assert perft.perft(*_start(), 9, perft.PerftCache()) == perft.reference_count(9)
+
+
+def test_board_perft_agrees():
+    assert perft.perft_board(GameState().to_array(), 1, 6) == perft.reference_count(6)
+
+
+@pytest.mark.parametrize('depth', [1, 2, 5, 7])
+def test_divide_agrees(depth):
+    expected = perft.divide(depth)
+    assert sum(expected.values()) == perft.reference_count(depth)
+    assert perft.divide(depth, use_cache=True) == expected
+    assert perft.divide(depth, workers=2) == expected
+    assert perft.divide(depth, workers=2, use_cache=True) == expected
+
+
+def test_endgame_counts_agree():
+    for own, opp in _endgame_positions(3):
+        board = bitboard.to_board(own, opp)
+        count = perft.perft(own, opp, _ENDGAME_EMPTIES + 2)
+        assert perft.perft(own, opp, _ENDGAME_EMPTIES + 2, perft.PerftCache()) == count
+        assert perft.perft_board(board, 1, _ENDGAME_EMPTIES + 2) == count
+        assert sum(perft.divide(_ENDGAME_EMPTIES + 2, workers=2, own=own, opp=opp).values()) == count
+
+
+def test_cache_stays_bounded():
+    cache = perft.PerftCache(size_mb=0)  # A single bucket, so almost every subtree is replaced
+    assert cache.num_buckets == 1
+    assert perft.perft(*_start(), 7, cache) == perft.reference_count(7)
+    assert len(cache) == 2
+    small = perft.PerftCache(size_mb=0.01)
+    assert perft.perft(*_start(), 8, small) == perft.reference_count(8)
+    assert len(small) <= 2 * small.num_buckets == 64
+
+
+def test_cache_replacement():
+    cache = perft.PerftCache(size_mb=0)
+    cache.store(3, 4, 3, 200)
+    cache.store(1, 2, 5, 100)  # Into the empty depth-preferred slot
+    assert (cache.get(1, 2, 5), cache.get(3, 4, 3)) == (100, 200)
+    cache = perft.PerftCache(size_mb=0)
+    cache.store(1, 2, 5, 100)
+    cache.store(3, 4, 3, 200)  # Shallower: goes to the always-replace slot
+    assert (cache.get(1, 2, 5), cache.get(3, 4, 3), cache.get(1, 2, 3)) == (100, 200, None)
+    cache.store(5, 6, 6, 300)  # Deeper: takes the depth-preferred slot, which moves to the other one
+    assert (cache.get(5, 6, 6), cache.get(1, 2, 5), cache.get(3, 4, 3)) == (300, 100, None)
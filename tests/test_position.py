@@ -0,0 +1,61 @@
+"""
+The incremental terms of Position (score, disc counts and mobility) must always equal the board heuristics.
+"""
+import random
+
+import pytest
+
+import bitboard
+import heuristics
+from position import Position
+
+_GAMES = 40
+
+
+def _assert_matches_board(position):
+    red, white = (position.own, position.opp) if position.player == 1 else (position.opp, position.own)
+    board = position.geometry.to_board(red, white)
+    assert position.score == heuristics.positional_heuristic(board, position.player)
+    assert position.mobility() == heuristics.mobility_heuristic(board, position.player)
+    assert position.own_count == bitboard.popcount(position.own)
+    assert position.opp_count == bitboard.popcount(position.opp)
+    assert position.own & position.opp == 0
+
+
+@pytest.mark.parametrize('size', [6, 8, 10])
+def test_make_unmake_matches_heuristics(size):
+    rng = random.Random(size)
+    geometry = bitboard.geometry(size)
+    for _ in range(_GAMES):
+        position = Position(*geometry.start_discs(), 1, hashed=True, weights=heuristics._square_weights(size),
+                            size=size)
+        start = position.copy()
+        undo = []
+        while True:
+            moves = list(bitboard.iter_squares(position.legal_moves()))
+            if not moves:
+                position.make_pass()
+                if not position.legal_moves():
+                    position.make_pass()
+                    break
+                undo.append(None)
+                _assert_matches_board(position)
+                continue
+            square = rng.choice(moves)
+            before = (position.own, position.opp, position.score, position.key)
+            flips = position.make_move(square)
+            _assert_matches_board(position)
+            position.unmake_move(square, flips)
+            _assert_matches_board(position)
+            assert (position.own, position.opp, position.score, position.key) == before
+            undo.append((square, position.make_move(square)))
+
+        # Unwinds the whole game back to the start position
+        for record in reversed(undo):
+            if record is None:
+                position.make_pass()
+            else:
+                position.unmake_move(*record)
+            _assert_matches_board(position)
+        assert (position.own, position.opp, position.player, position.score, position.key) == \
+            (start.own, start.opp, start.player, start.score, start.key)
@@ -0,0 +1,99 @@
+"""
+The PNG renderer: the image has the dimensions of the board, and every cell has the colour of its content.
+"""
+import os
+import random
+import struct
+import zlib
+
+import pytest
+
+import colors
+import renderer
+from game_state import GameState
+from moves_tracker import MovesTracker, Operator
+
+
+def _decode_png(image):
+    """
+    Decodes an 8-bit RGB PNG without filters, as written by renderer.encode_png.
+    :return: The width, the height, and the rows of pixels as lists of (r, g, b) tuples.
+    """
+    assert image[:8] == b'\x89PNG\r\n\x1a\n'
+    offset, chunks = 8, {}
+    while offset < len(image):
+        length, kind = struct.unpack_from('>I4s', image, offset)
+        data = image[offset + 8:offset + 8 + length]
+        assert struct.unpack_from('>I', image, offset + 8 + length)[0] == zlib.crc32(kind + data)
+        chunks[kind] = chunks.get(kind, b'') + data
+        offset += 12 + length
+    width, height, bit_depth, color_type = struct.unpack_from('>IIBB', chunks[b'IHDR'])
+    assert (bit_depth, color_type) == (8, 2)
+    raw = zlib.decompress(chunks[b'IDAT'])
+    stride = 1 + 3 * width
+    rows = []
+    for y in range(height):
+        line = raw[y * stride:(y + 1) * stride]
+        assert line[0] == 0
+        rows.append([tuple(line[1 + 3 * x:4 + 3 * x]) for x in range(width)])
+    return width, height, rows
+
+
+def _rgb(color):
+    return tuple(bytes.fromhex(color[1:]))
+
+
+def _random_state(size, plies, seed):
+    rng = random.Random(seed)
+    state = GameState(size)
+    for _ in range(plies):
+        valid_moves = state.get_valid_moves()
+        if not valid_moves:
+            break
+        state.make_move(*rng.choice(valid_moves))
+    return state
+
+
+def _assert_cells(state, rows, cell_size):
+    cell_colors = [_rgb(colors.BASIC_COLOR), _rgb(colors.RED_COLOR), _rgb(colors.WHITE_COLOR)]
+    valid_moves = state.get_valid_moves()
+    grid = _rgb(colors.GRID_COLOR)
+    for row in range(state.size):
+        for col in range(state.size):
+            expected = _rgb(colors.MARK_COLOR) if (row, col) in valid_moves else cell_colors[state.get_cell(row, col)]
+            top, left = row * cell_size, col * cell_size
+            assert rows[top][left] == grid and rows[top + 1][left + 1] == grid  # The grid lines
+            for y, x in ((top + 2, left + 2), (top + cell_size // 2, left + cell_size // 2),
+                         (top + cell_size - 1, left + cell_size - 1)):
+                assert rows[y][x] == expected
+
+
+@pytest.mark.parametrize('size, plies', [(8, 0), (8, 20), (6, 12), (4, 5), (10, 30)])
+def test_render_state(size, plies):
+    state = _random_state(size, plies, seed=size + plies)
+    for cell_size in (40, 11):
+        width, height, rows = _decode_png(renderer.render_state(state, cell_size))
+        assert width == height == size * cell_size + 2
+        _assert_cells(state, rows, cell_size)
+        assert rows[-1] == [_rgb(colors.GRID_COLOR)] * width and {row[-1] for row in rows} == {_rgb(colors.GRID_COLOR)}
+
+
+def test_save_history(tmp_path):
+    # The moves tracker of a game, recorded like the GUI does
+    tracker, state, states = MovesTracker(), GameState(), []
+    for row, col in ((3, 3), (3, 4), (4, 3), (4, 4)):
+        tracker.add_item((row, col), None, Operator.INITIAL, None)
+    tracker.add_item(None, None, state.current_player, state.get_valid_moves())
+    rng = random.Random(0)
+    for _ in range(10):
+        states.append(state.copy())
+        move = rng.choice(state.get_valid_moves())
+        tracker.set_move(move, state.make_move(*move))
+        tracker.add_item(None, None, state.current_player, state.get_valid_moves())
+    states.append(state)
+
+    assert renderer.save_history(tracker, str(tmp_path / "steps")) == 11
+    for step, expected in enumerate(states):
+        with open(os.path.join(tmp_path, "steps", f"step_{step}.png"), 'rb') as image_file:
+            _, _, rows = _decode_png(image_file.read())
+        _assert_cells(expected, rows, 40)
@@ -0,0 +1,108 @@
+"""
+The alpha-beta search against the plain minimax: the same move (the first of the best ones) and the same score.
+"""
+import random
+
+import pytest
+
+import heuristics
+import search
+from game_state import GameState, player_number
+from position import Position
+
+
+def _random_positions(count, seed):
+    """
+    Returns the (board, player, valid moves) of positions of seeded random games, where the player has moves.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        for _ in range(rng.randint(0, 50)):
+            if state.is_game_over():
+                break
+            valid_moves = state.get_valid_moves()
+            if valid_moves:
+                state.make_move(*rng.choice(valid_moves))
+            else:
+                state.pass_turn()
+        if state.get_valid_moves():
+            positions.append((state.to_array(), player_number(state.current_player), state.get_valid_moves()))
+    return positions
+
+
+def _reference_decision(board, valid_moves, depth, player):
+    """
+    The plain minimax decision: the first move with the best minimax value.
+    """
+    best_move, best_score = None, float('-inf')
+    for row, col in valid_moves:
+        new_board = heuristics.simulate_move(heuristics.copy_board(board), row, col, player)
+        score, _ = heuristics.minimax(heuristics.get_valid_moves(new_board, 3 - player), depth - 1, False, new_board,
+                                      player)
+        if score > best_score:
+            best_move, best_score = (row, col), score
+    return best_move, best_score
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_same_move_and_score_as_minimax(depth):
+    for board, player, valid_moves in _random_positions(12 if depth < 4 else 6, seed=depth):
+        expected_move, expected_score = _reference_decision(board, valid_moves, depth, player)
+        position = Position.from_board(board, player, weights=heuristics._square_weights(len(board)))
+        squares = [position.geometry.square_index(row, col) for row, col in valid_moves]
+        square, score = search.AlphaBetaSearch(heuristics._evaluate_position).decide(position, squares, depth)
+        assert (valid_moves[squares.index(square)], score) == (expected_move, expected_score)
+        assert heuristics.minimax_decision(board, valid_moves, depth, player, endgame_empties=None) == expected_move
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3])
+def test_ties_go_to_the_first_move_in_the_callers_order(depth):
+    # The 4 first moves are symmetric, so they all have the same score
+    state = GameState()
+    board, valid_moves = state.to_array(), state.get_valid_moves()
+    scores = {_reference_decision(board, [move], depth, 1)[1] for move in valid_moves}
+    assert len(scores) == 1
+    for order in (valid_moves, valid_moves[::-1], valid_moves[1:] + valid_moves[:1]):
+        assert heuristics.minimax_decision(board, order, depth, 1, endgame_empties=None) == order[0]
+        assert _reference_decision(board, order, depth, 1)[0] == order[0]
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_iterative_deepening_to_a_fixed_depth_matches_decide(depth):
+    for board, player, valid_moves in _random_positions(6, seed=10 + depth):
+        position = Position.from_board(board, player, weights=heuristics._square_weights(len(board)))
+        squares = [position.geometry.square_index(row, col) for row, col in valid_moves]
+        expected = search.AlphaBetaSearch(heuristics._evaluate_position).decide(position, squares, depth)
+        searcher = search.AlphaBetaSearch(heuristics._evaluate_position)
+        square, score, completed_depth = searcher.iterative_deepening(position, squares, 1e9, max_depth=depth)
+        assert (square, score) == expected and completed_depth == depth
+        assert heuristics.iterative_deepening_decision(board, valid_moves, 1e9, player, max_depth=depth,
+                                                       endgame_empties=None) == valid_moves[squares.index(square)]
+
+
+def test_iterative_deepening_completes_the_first_depth_without_time():
+    board, player, valid_moves = _random_positions(1, seed=0)[0]
+    position = Position.from_board(board, player, weights=heuristics._square_weights(len(board)))
+    squares = [position.geometry.square_index(row, col) for row, col in valid_moves]
+    key = position.own, position.opp
+    square, score, completed_depth = search.AlphaBetaSearch(heuristics._evaluate_position).iterative_deepening(
+        position, squares, 0)
+    assert completed_depth == 1 and square in squares
+    assert (position.own, position.opp) == key
+
+
+@pytest.mark.parametrize('remaining_time', [0.0, 0.5, 60.0, 300.0])
+def test_move_times_fit_in_the_clock(remaining_time):
+    # A whole game of the player's moves, each one taking all of its budget, stays within the clock
+    for reserve in (0.0, 0.05, 0.2):
+        clock = remaining_time
+        for empty_squares in range(60, 0, -2):
+            budget = search.allocate_move_time(clock, empty_squares, reserve)
+            assert 0 <= budget <= clock * (1 - reserve) + 1e-12
+            clock -= budget
+        assert clock >= -1e-9
+    assert search.allocate_move_time(-1.0, 20) == 0.0
+    assert search.allocate_move_time(10.0, 1, reserve=0.0) == 10.0  # The last move may use the whole clock
+    assert search.allocate_move_time(10.0, 20, reserve=0.0) == 1.0
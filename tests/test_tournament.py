@@ -0,0 +1,65 @@
+"""
+The tournament statistics (the Elo estimate and its interval, the SPRT) against hand-computed values, and resuming a
+tournament from its checkpoint.
+"""
+import json
+import math
+
+import pytest
+
+import tournament
+
+
+def test_elo_and_expected_score():
+    assert tournament.expected_score(0) == 0.5
+    assert tournament.expected_score(400) == pytest.approx(10 / 11)
+    assert tournament.score_to_elo(10 / 11) == pytest.approx(400)
+    assert tournament.score_to_elo(1 / 11) == pytest.approx(-400)
+    assert tournament.score_to_elo(0.75) == pytest.approx(400 * math.log10(3))
+
+
+def test_sprt_bounds():
+    lower, upper = tournament.sprt_bounds(0.05, 0.05)
+    assert (lower, upper) == (pytest.approx(-math.log(19)), pytest.approx(math.log(19)))  # ±2.944
+    lower, upper = tournament.sprt_bounds(0.05, 0.1)
+    assert (lower, upper) == (pytest.approx(math.log(0.1 / 0.95)), pytest.approx(math.log(18)))
+
+
+def test_sprt_llr():
+    # 100 * (10/11 - 1/2) * (2 * 0.6 - 1/2 - 10/11) / (2 * 0.2) = 100 * (9/22) * (-23/110) / 0.4
+    assert tournament.sprt_llr(100, 0.6, 0.2, 0, 400) == pytest.approx(-21.3843, abs=1e-4)
+    # A mean at the midpoint of the hypotheses gives no evidence either way
+    midpoint = (tournament.expected_score(0) + tournament.expected_score(10)) / 2
+    assert tournament.sprt_llr(500, midpoint, 0.2, 0, 10) == pytest.approx(0)
+    assert tournament.sprt_llr(1, 1.0, 0.2, 0, 10) == 0.0 and tournament.sprt_llr(50, 1.0, 0, 0, 10) == 0.0
+
+
+def test_summary():
+    results = [(1.0, 10)] * 10 + [(0.0, -6)] * 10 + [(0.5, 0)] * 20
+    summary = tournament.summarize(results, elo0=0, elo1=10)
+    assert (summary['games'], summary['wins'], summary['draws'], summary['losses']) == (40, 10, 20, 10)
+    assert summary['disc_differential'] == 1.0
+    assert summary['score'] == 0.5 and summary['elo'] == pytest.approx(0)
+    # Variance 0.125, margin 1.96 * sqrt(0.125 / 40) = 0.1096 around the score 0.5
+    assert summary['elo_interval'] == (pytest.approx(-77.390, abs=1e-3), pytest.approx(77.390, abs=1e-3))
+    # 40 * (s1 - 1/2) * (1 - 1/2 - s1) / 0.25 with s1 = expected_score(10) = 0.514386
+    assert summary['sprt']['llr'] == pytest.approx(-0.033119, abs=1e-5) and summary['sprt']['result'] is None
+
+
+def test_sprt_decision():
+    assert tournament.summarize([(1.0, 4)] * 30 + [(0.0, -4)] * 10, 0, 200)['sprt']['result'] == 'H1'
+    assert tournament.summarize([(1.0, 4)] * 10 + [(0.0, -4)] * 30, 0, 200)['sprt']['result'] == 'H0'
+
+
+def test_resumed_tournament_matches_an_uninterrupted_one(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    expected = tournament.run_tournament('random', 'H2', 8, workers=1)
+    tournament.run_tournament('random', 'H2', 4, workers=1, checkpoint_path=checkpoint_path)
+    with open(checkpoint_path) as checkpoint_file:
+        assert sorted(json.load(checkpoint_file)['results']) == ['0', '1', '2', '3']
+    assert tournament.run_tournament('random', 'H2', 8, workers=1, checkpoint_path=checkpoint_path) == expected
+    with open(checkpoint_path) as checkpoint_file:
+        assert len(json.load(checkpoint_file)['results']) == 8
+
+    with pytest.raises(ValueError):
+        tournament.run_tournament('random', 'H2', 8, workers=1, seed=1, checkpoint_path=checkpoint_path)
@@ -0,0 +1,89 @@
+"""
+The transposition table: the Zobrist hashes, the replacement scheme of its buckets and its counters, and a search
+with a fresh table against the search without one.
+"""
+import random
+
+import heuristics
+import search
+from game_state import GameState, player_number
+from position import Position
+from transposition_table import TranspositionTable, hash_position
+
+_EXACT = TranspositionTable.EXACT
+
+
+def _table():
+    table = TranspositionTable(size_mb=0)  # A single bucket, so every key shares it
+    assert table.num_buckets == 1
+    return table
+
+
+def test_depth_preferred_entry_is_replaced_only_by_a_deeper_search():
+    table = _table()
+    table.store(1, 5, _EXACT, 10, 3)
+    table.store(2, 3, _EXACT, 20, 4)  # Shallower: goes to the always-replace slot
+    assert table.probe(1)[1] == 5 and table.probe(2)[1] == 3
+    table.store(3, 4, _EXACT, 30, 5)  # Still shallower: replaces the always-replace entry
+    assert table.probe(1) is not None and table.probe(2) is None and table.probe(3) is not None
+    table.store(4, 6, _EXACT, 40, 6)  # Deeper: takes the depth-preferred slot, which moves to the other one
+    assert table.peek(4)[1] == 6 and table.peek(1)[1] == 5 and table.peek(3) is None
+    assert table.replacements == 2
+
+
+def test_same_position_keeps_a_single_entry():
+    table = _table()
+    table.store(1, 5, _EXACT, 10, 3)
+    table.store(2, 2, _EXACT, 20, 4)
+    table.store(2, 7, TranspositionTable.LOWER_BOUND, 25, 8)  # Deeper result of the same position
+    assert table.peek(2) == (2, 7, TranspositionTable.LOWER_BOUND, 25, 8)
+    assert table.peek(1) == (1, 5, _EXACT, 10, 3)
+    assert table.stats()['fill_rate'] == 1.0 and table.replacements == 0
+
+
+def test_counters():
+    table = _table()
+    assert table.probe(1) is None  # A miss in an empty bucket
+    table.store(1, 1, _EXACT, 0, None)
+    table.store(1, 2, _EXACT, 0, None)
+    assert table.probe(1) is not None and table.probe(2) is None  # A hit, and a miss that collides
+    table.peek(1)  # Not counted
+    assert (table.hits, table.misses, table.collisions, table.stores) == (1, 2, 1, 2)
+    assert table.stats()['hit_rate'] == 1 / 3
+    table.clear()
+    assert (table.hits, table.misses, table.stores) == (0, 0, 0) and table.peek(1) is None
+
+
+def test_incremental_hash_matches_the_full_hash():
+    rng = random.Random(0)
+    state = GameState()
+    position = Position(*state.get_discs(), 1, hashed=True)
+    while not state.is_game_over():
+        valid_moves = state.get_valid_moves()
+        if not valid_moves:
+            state.pass_turn()
+            position.make_pass()
+        else:
+            row, col = rng.choice(valid_moves)
+            state.make_move(row, col)
+            position.make_move(state.geometry.square_index(row, col))
+        assert position.key == hash_position(state.red, state.white, player_number(state.current_player))
+
+
+def test_search_with_a_fresh_table_matches_the_search_without_one():
+    rng = random.Random(1)
+    state = GameState()
+    for _ in range(30):
+        valid_moves = state.get_valid_moves()
+        if not valid_moves:
+            break
+        board, player = state.to_array(), player_number(state.current_player)
+        for depth in (3, 4):
+            table = TranspositionTable(1)
+            position = Position.from_board(board, player, hashed=True, weights=heuristics._square_weights(8))
+            squares = [position.geometry.square_index(*move) for move in valid_moves]
+            expected = search.AlphaBetaSearch(heuristics._evaluate_position).decide(position, squares, depth)
+            assert search.AlphaBetaSearch(heuristics._evaluate_position, table).decide(position, squares,
+                                                                                      depth) == expected
+            assert table.stores > 0
+        state.make_move(*rng.choice(valid_moves))
@@ -0,0 +1,39 @@
+"""
+The weights file: its round trip, and its loading at startup.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import heuristics
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / 'weights.bin')
+    positional = [[row * 8 + col - 32 for col in range(8)] for row in range(8)]
+    heuristics.write_weights(path, positional)
+    assert heuristics.read_weights(path) == (positional, None)
+
+
+def test_weights_path_is_next_to_the_program():
+    assert heuristics.WEIGHTS_PATH == os.path.join(_REPO_DIR, 'weights.bin')
+
+
+def test_unreadable_startup_weights_keep_the_built_in_ones(tmp_path, monkeypatch):
+    path = tmp_path / 'weights.bin'
+    path.write_bytes(b'not a weights file')
+    monkeypatch.setattr(heuristics, 'WEIGHTS_PATH', str(path))
+    weights = heuristics.positional_weight_masks()
+    with pytest.warns(UserWarning, match='built-in weights'):
+        heuristics._load_startup_weights()
+    assert heuristics.positional_weight_masks() == weights
+
+
+def test_weights_in_the_working_directory_are_ignored(tmp_path):
+    (tmp_path / 'weights.bin').write_bytes(b'not a weights file')
+    code = "import sys, warnings; warnings.simplefilter('error'); sys.path.insert(0, sys.argv[1]); import heuristics"
+    subprocess.run([sys.executable, '-c', code, _REPO_DIR], cwd=tmp_path, check=True)
@@ -0,0 +1,361 @@
+"""
+Headless self-play tournaments between two strategies.
+
+Games are played without any GUI over the GameState model, across a process pool. Every opening of a balanced set
+(all the distinct positions after a few plies) is played twice, with the colours swapped, so neither strategy profits
+from a lucky opening or from the colour it plays. Results are checkpointed to a JSON file, so a long tournament can
+be resumed, and an optional SPRT (sequential probability ratio test) stops it as soon as the result is conclusive.
+
+Strategies: 'random', 'H1' (best mobility), 'H2' (best positional score), 'H3' (best pattern evaluation, see the
+patterns module), 'minimaxN' (alpha-beta search to depth N, e.g. 'minimax4') and 'patternN' (the same search with the
+pattern evaluation). With an opening book (see the book module), all the strategies but 'random' play its moves until
+they leave the book.
+"""
+import json
+import math
+import multiprocessing
+import os
+import random
+import bitboard
+import book
+import game_records
+import heuristics
+from game_state import GameState, player_number
+from moves_tracker import Operator
+from transposition_table import TranspositionTable
+
+_BASIC_STRATEGIES = ('random', 'H1', 'H2', 'H3')
+# The prefixes of the searching strategies, and their leaf evaluations.
+SEARCH_EVALUATIONS = {'minimax': heuristics.POSITIONAL, 'pattern': heuristics.PATTERNS}
+_CHECKPOINT_INTERVAL = 50  # Number of games between two checkpoint writes.
+_TABLE_SIZE_MB = 4
+_open_books = {}  # The opening books of the worker process, by path (a memory map can't be sent to another process).
+
+
+def parse_strategy(strategy):
+    """
+    Validates a strategy name, and returns its (name, depth) pair (depth is None for the non-searching strategies).
+    """
+    if strategy in _BASIC_STRATEGIES:
+        return strategy, None
+    for prefix in SEARCH_EVALUATIONS:
+        if strategy.startswith(prefix) and strategy[len(prefix):].isdigit():
+            depth = int(strategy[len(prefix):])
+            if depth >= 1:
+                return prefix, depth
+    raise ValueError(f"Unknown strategy '{strategy}' (expected one of {', '.join(_BASIC_STRATEGIES)}, minimaxN or "
+                     f"patternN)")
+
+
+def choose_move(strategy, state: GameState, rng, table=None, opening_book=None):
+    """
+    Chooses a move of the player to move, according to the strategy. The player must have valid moves.
+    :param opening_book: An optional OpeningBook, whose moves are played by the non-random strategies.
+    """
+    name, depth = parse_strategy(strategy)
+    valid_moves = state.get_valid_moves()
+    player = player_number(state.current_player)
+
+    if name == 'random':
+        return rng.choice(valid_moves)
+    if opening_book is not None:
+        book_move = opening_book.choose_move(state.to_array(), valid_moves, player)
+        if book_move is not None:
+            return book_move
+    if name == 'H1':
+        return heuristics.choose_move_with_best_mobility(state.to_array(), valid_moves, player)
+    if name == 'H2':
+        return heuristics.choose_move_with_best_positional_heuristic(state.to_array(), valid_moves, player)
+    if name == 'H3':
+        return heuristics.choose_move_with_best_pattern_score(state.to_array(), valid_moves, player)
+    return heuristics.minimax_decision(state.to_array(), valid_moves, depth, player, table,
+                                       evaluation=SEARCH_EVALUATIONS[name])
+
+
+def generate_openings(plies):
+    """
+    Returns all the distinct positions after the given number of plies from the start position, as lists of moves.
+    """
+    openings = [[]]
+    for _ in range(plies):
+        seen = set()
+        next_openings = []
+        for moves in openings:
+            state = replay_opening(moves)
+            for move in state.get_valid_moves():
+                child = state.copy()
+                child.make_move(*move)
+                key = (child.red, child.white, child.current_player)
+                if key not in seen:
+                    seen.add(key)
+                    next_openings.append(moves + [move])
+        openings = next_openings
+    return openings
+
+
+def replay_opening(moves):
+    """
+    Returns the game state after playing the moves from the start position.
+    """
+    state = GameState()
+    for move in moves:
+        state.make_move(*move)
+    return state
+
+
+def play_game(red_strategy, white_strategy, opening, seed, book_path=None):
+    """
+    Plays a full game from the opening position.
+    :param book_path: An optional opening book file (see the choose_move function).
+    :return: The numbers of red and white discs at the end of the game, and the moves of the game (a record of the
+        game_records module).
+    """
+    rng = random.Random(seed)
+    opening_book = _get_book(book_path)
+    state = replay_opening(opening)
+    strategies = {Operator.RED: red_strategy, Operator.WHITE: white_strategy}
+    tables = {operator: TranspositionTable(_TABLE_SIZE_MB) if parse_strategy(strategy)[1] else None
+              for operator, strategy in strategies.items()}
+
+    moves = [bitboard.square_index(*move) for move in opening]
+    while not state.is_game_over():
+        if not state.get_valid_moves_mask():
+            state.pass_turn()
+            moves.append(game_records.PASS)
+            continue
+        operator = state.current_player
+        move = choose_move(strategies[operator], state, rng, tables[operator], opening_book)
+        state.make_move(*move)
+        moves.append(bitboard.square_index(*move))
+
+    return state.red_counter, state.white_counter, moves
+
+
+def _get_book(path):
+    """
+    Returns the opening book of the path (None if there is no path), which is opened once per process.
+    """
+    if not path:
+        return None
+    if path not in _open_books:
+        _open_books[path] = book.OpeningBook(path)
+    return _open_books[path]
+
+
+def _play_indexed_game(task):
+    """
+    Plays the game of the given index in a worker process. Even games give the red discs to the first strategy, and
+    odd games swap the colours of the same opening.
+    :return: The game index, the result from the point of view of the first strategy: (score, disc differential), and
+        the moves of the game.
+    """
+    index, strategy_a, strategy_b, opening, seed, book_path = task
+    if index % 2 == 0:
+        a_discs, b_discs, moves = play_game(strategy_a, strategy_b, opening, seed, book_path)
+    else:
+        b_discs, a_discs, moves = play_game(strategy_b, strategy_a, opening, seed, book_path)
+    score = 1.0 if a_discs > b_discs else 0.5 if a_discs == b_discs else 0.0
+    return index, score, a_discs - b_discs, moves
+
+
+def expected_score(elo):
+    """
+    Returns the expected score of a player which is `elo` points stronger than its opponent.
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    """
+    Returns the Elo difference that corresponds to an expected score (clipped away from 0 and 1).
+    """
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def sprt_llr(count, mean, variance, elo0, elo1):
+    """
+    Returns the log-likelihood ratio of H1 (the Elo difference is elo1) against H0 (it is elo0), using the normal
+    approximation of the game scores, given their count, mean and variance.
+    """
+    if count < 2 or variance == 0:
+        return 0.0
+    score0, score1 = expected_score(elo0), expected_score(elo1)
+    return count * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    """
+    Returns the (lower, upper) log-likelihood ratio bounds, which accept H0 / H1 respectively.
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def summarize(results, elo0=None, elo1=None, alpha=0.05, beta=0.05):
+    """
+    Summarizes the results of the first strategy: win/draw/loss counts, average disc differential, and the Elo
+    difference with a 95% confidence interval (and the SPRT state, if elo0 and elo1 are given).
+    """
+    count = len(results)
+    wins = sum(1 for score, _ in results if score == 1.0)
+    draws = sum(1 for score, _ in results if score == 0.5)
+    mean = (wins + draws / 2) / count if count else 0.0
+    variance = sum((score - mean) ** 2 for score, _ in results) / count if count else 0.0
+    summary = {
+        'games': count,
+        'wins': wins,
+        'draws': draws,
+        'losses': count - wins - draws,
+        'disc_differential': sum(diff for _, diff in results) / count if count else 0.0,
+    }
+    if count:
+        margin = 1.96 * math.sqrt(variance / count)
+        summary['score'] = mean
+        summary['elo'] = score_to_elo(mean)
+        summary['elo_interval'] = (score_to_elo(mean - margin), score_to_elo(mean + margin))
+
+    if elo0 is not None and elo1 is not None:
+        llr = sprt_llr(count, mean, variance, elo0, elo1)
+        lower, upper = sprt_bounds(alpha, beta)
+        summary['sprt'] = {'llr': llr, 'lower': lower, 'upper': upper,
+                           'result': 'H1' if llr >= upper else 'H0' if llr <= lower else None}
+    return summary
+
+
+class _ScoreMoments:
+    """
+    Running count, sum and sum of squares of the game scores, for checking the SPRT after every game in O(1).
+    """
+    def __init__(self, results):
+        self.count = self.total = self.total_squares = 0
+        for score, _ in results:
+            self.add(score)
+
+    def add(self, score):
+        self.count += 1
+        self.total += score
+        self.total_squares += score * score
+
+    def is_sprt_decided(self, elo0, elo1, alpha, beta):
+        if elo0 is None or elo1 is None or not self.count:
+            return False
+        mean = self.total / self.count
+        variance = self.total_squares / self.count - mean * mean
+        lower, upper = sprt_bounds(alpha, beta)
+        llr = sprt_llr(self.count, mean, variance, elo0, elo1)
+        return llr <= lower or llr >= upper
+
+
+def _load_checkpoint(path, config):
+    """
+    Returns the saved results of a tournament with the same configuration ({} if there is none), and the saved state
+    of its records file (see _save_checkpoint).
+    """
+    if not path or not os.path.exists(path):
+        return {}, None
+    with open(path, "r") as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint.get('config') != config:
+        raise ValueError(f"The checkpoint {path} belongs to a tournament with a different configuration")
+    return {int(index): tuple(result) for index, result in checkpoint['results'].items()}, checkpoint.get('records')
+
+
+def _save_checkpoint(path, config, results, records=None):
+    """
+    Atomically writes the results so far, so that an interrupted write never corrupts the checkpoint.
+    :param records: The state of the records file: a dictionary of its absolute path and its size when the games of
+        the results are recorded, so a resumed tournament can drop the games that were recorded after the checkpoint.
+    """
+    temp_path = path + ".tmp"
+    checkpoint = {'config': config, 'results': {str(index): result for index, result in results.items()}}
+    if records is not None:
+        checkpoint['records'] = records
+    with open(temp_path, "w") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    os.replace(temp_path, path)
+
+
+def _records_state(records_path, records):
+    """
+    Returns the state of the records file for a checkpoint (see _save_checkpoint), after flushing it.
+    """
+    records.flush()
+    return {'path': os.path.abspath(records_path), 'size': records.tell()}
+
+
+def run_tournament(strategy_a, strategy_b, num_of_games, workers=None, opening_plies=4, seed=0, checkpoint_path=None,
+                   sprt=None, alpha=0.05, beta=0.05, book_path=None, records_path=None):
+    """
+    Plays a tournament between two strategies and summarizes it from the point of view of the first one.
+    :param num_of_games: The number of games (rounded up to an even number, so that every opening is played with
+        both colours).
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :param opening_plies: The number of plies of the balanced openings.
+    :param checkpoint_path: A JSON file to save the results to, and to resume from if it already exists.
+    :param sprt: An optional (elo0, elo1) pair. The tournament stops as soon as the SPRT accepts one of them.
+    :param book_path: An optional opening book file, whose moves are played by the non-random strategies.
+    :param records_path: An optional file to append the records of the played games to (see the game_records module).
+    :return: The summary (see the summarize function).
+    """
+    parse_strategy(strategy_a)
+    parse_strategy(strategy_b)
+    num_of_games += num_of_games % 2
+    config = {'strategies': [strategy_a, strategy_b], 'opening_plies': opening_plies, 'seed': seed}
+    if book_path:
+        config['book'] = book_path
+        book.OpeningBook(book_path).close()  # Fail early on a missing or invalid book, before starting the workers
+    elo0, elo1 = sprt if sprt else (None, None)
+
+    openings = generate_openings(opening_plies)
+    random.Random(seed).shuffle(openings)
+    results, records_state = _load_checkpoint(checkpoint_path, config)
+    moments = _ScoreMoments(results.values())
+    tasks = [(index, strategy_a, strategy_b, openings[(index // 2) % len(openings)], f"{seed}-{index}",
+              book_path)
+             for index in range(num_of_games) if index not in results]
+
+    if tasks and not moments.is_sprt_decided(elo0, elo1, alpha, beta):
+        records = game_records.GameRecordWriter(records_path, append=True) if records_path else None
+        if records is not None and checkpoint_path:
+            if records_state is not None and records_state['path'] == os.path.abspath(records_path):
+                # The games that were recorded after the checkpoint are played again
+                records.truncate(records_state['size'])
+            records_state = _records_state(records_path, records)
+            _save_checkpoint(checkpoint_path, config, results, records_state)
+        with multiprocessing.Pool(workers or os.cpu_count()) as pool:
+            for completed, (index, score, diff, moves) in enumerate(pool.imap_unordered(_play_indexed_game, tasks), 1):
+                results[index] = (score, diff)
+                moments.add(score)
+                if records is not None:
+                    records.write(moves)
+                if checkpoint_path and completed % _CHECKPOINT_INTERVAL == 0:
+                    if records is not None:
+                        records_state = _records_state(records_path, records)  # The checkpointed games are recorded
+                    _save_checkpoint(checkpoint_path, config, results, records_state)
+                if moments.is_sprt_decided(elo0, elo1, alpha, beta):
+                    pool.terminate()
+                    break
+        if records is not None:
+            records_state = _records_state(records_path, records)
+            records.close()
+
+    if checkpoint_path:
+        _save_checkpoint(checkpoint_path, config, results, records_state)
+    return summarize(list(results.values()), elo0, elo1, alpha, beta)
+
+
+def format_summary(strategy_a, strategy_b, summary):
+    """
+    Returns a human readable report of a tournament summary.
+    """
+    lines = [f"{strategy_a} vs {strategy_b}: {summary['games']} games",
+             f"W/D/L: {summary['wins']}/{summary['draws']}/{summary['losses']}\t|\t"
+             f"Disc differential: {summary['disc_differential']:+.2f}"]
+    if summary['games']:
+        low, high = summary['elo_interval']
+        lines.append(f"Score: {summary['score']:.3f}\t|\tElo: {summary['elo']:+.1f} (95% CI {low:+.1f} .. {high:+.1f})")
+    if 'sprt' in summary:
+        sprt = summary['sprt']
+        lines.append(f"SPRT: LLR {sprt['llr']:.2f} ({sprt['lower']:.2f}, {sprt['upper']:.2f}) -> "
+                     f"{sprt['result'] or 'inconclusive'}")
+    return "\n".join(lines)
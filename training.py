@@ -0,0 +1,384 @@
+"""
+Fitting the evaluation weights from positions.
+
+The pipeline has two steps:
+- Generation: positions are labeled by the final disc differential of the side to move (the empty squares count for
+  the winner), and streamed to a dataset file in chunks. They come from self-play games (labeled by the result of
+  the game), from random games that are stopped near the end and solved exactly by the endgame solver, or from game
+  records files (see the game_records module). The games are played across a process pool, and every task returns
+  its packed records, so the memory doesn't grow with the dataset.
+- Fitting: the dataset file is memory-mapped, and read in chunks of fixed size with NumPy. The positional weights (a
+  weight per class of symmetric squares) are fitted by least squares, whose normal equations are summed chunk by
+  chunk, or by gradient descent; the pattern tables (a table per pattern and game phase, see the patterns module)
+  are fitted by gradient descent. Either way the memory is bounded by the chunk size and the number of weights, so
+  datasets of tens of millions of positions are fitted in a fixed amount of RAM.
+
+The fitted weights are written to the weights file that the heuristics module loads at startup (see
+heuristics.WEIGHTS_PATH), in integer units of 1 / WEIGHT_SCALE discs.
+
+Dataset file format (little-endian): a header (magic, number of positions), followed by fixed-size records:
+- own, opp (uint64): The discs of the side to move and of its opponent.
+- score (int8): The final disc differential of the side to move.
+"""
+import itertools
+import multiprocessing
+import os
+import random
+import struct
+import numpy as np
+import bitboard
+import endgame
+import game_records
+import heuristics
+import patterns
+import tournament
+from game_state import GameState, player_number
+from position import Position
+
+SELF_PLAY = 'selfplay'
+SOLVED = 'solved'
+RECORDS = 'records'
+POSITIONAL = heuristics.POSITIONAL
+PATTERNS = heuristics.PATTERNS
+LEAST_SQUARES = 'lstsq'
+GRADIENT_DESCENT = 'gd'
+WEIGHT_SCALE = 16  # Units of the integer weights per disc.
+
+_MAGIC = b'RVDATA01'
+_HEADER = struct.Struct('<8sQ')
+_RECORD = struct.Struct('<QQb')
+_DTYPE = np.dtype([('own', '<u8'), ('opp', '<u8'), ('score', 'i1')])
+_BOARD_SIZE = 8
+_START_DISCS = 4
+_BUFFER_SIZE = 1 << 16
+_GAMES_PER_TASK = 16  # Number of games (or solved positions) in every task of the process pool.
+_CHUNK_SIZE = 1 << 15  # Number of positions that are fitted at a time.
+_RIDGE = 1e-3  # Regularization of the least squares, for the classes of squares that are rarely taken.
+_PRIOR_COUNT = 20  # Damps the steps of the pattern contents that are seen in few positions, which would overfit.
+_SHIFTS = np.arange(_BOARD_SIZE * _BOARD_SIZE, dtype=np.uint64)
+
+
+class DatasetWriter:
+    """
+    Writes positions to a dataset file (see the module's documentation for the format).
+    - Attributes:
+        - count: Number of positions that were written.
+    """
+    def __init__(self, path):
+        self.count = 0
+        self._file = open(path, 'wb', buffering=_BUFFER_SIZE)
+        self._file.write(_HEADER.pack(_MAGIC, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_packed(self, records, count):
+        """
+        Writes `count` records that were packed already (see _pack).
+        """
+        self._file.write(records)
+        self.count += count
+
+    def close(self):
+        self._file.seek(0)  # The count is known only at the end
+        self._file.write(_HEADER.pack(_MAGIC, self.count))
+        self._file.close()
+
+
+def read_header(path):
+    """
+    Returns the number of positions of a dataset file.
+    """
+    with open(path, 'rb') as dataset_file:
+        header = dataset_file.read(_HEADER.size)
+    magic, count = _HEADER.unpack(header) if len(header) == _HEADER.size else (None, 0)
+    if magic != _MAGIC or os.path.getsize(path) != _HEADER.size + count * _RECORD.size:
+        raise ValueError(f"{path} is not a dataset file")
+    return count
+
+
+def open_dataset(path):
+    """
+    Memory-maps a dataset file.
+    :return: A read-only NumPy array of records with the fields own, opp and score.
+    """
+    count = read_header(path)
+    if count == 0:
+        return np.zeros(0, dtype=_DTYPE)
+    return np.memmap(path, dtype=_DTYPE, mode='r', offset=_HEADER.size, shape=(count,))
+
+
+def _pack(positions):
+    """
+    Packs (own, opp, score) positions to the records of a dataset file.
+    :return: The packed records and their number.
+    """
+    pack = _RECORD.pack
+    records = [pack(own, opp, score) for own, opp, score in positions]
+    return b''.join(records), len(records)
+
+
+# --- Generation ----
+def game_positions(moves):
+    """
+    Returns the positions of a game record in which the side to move has a move, labeled by the final disc
+    differential of the side to move.
+    :param moves: The moves of the record (see the game_records module).
+    :return: List of (own, opp, score).
+    """
+    red, white = GameState().get_discs()
+    positions = []
+    for ply, square in enumerate(moves):
+        own, opp = (red, white) if ply % 2 == 0 else (white, red)
+        if square != game_records.PASS:
+            positions.append((own, opp, ply % 2))
+            flips = bitboard.flip_mask(own, opp, square)
+            own |= flips | (1 << square)
+            opp &= ~flips
+        red, white = (own, opp) if ply % 2 == 0 else (opp, own)
+
+    red_score = endgame.final_score(bitboard.popcount(red), bitboard.popcount(white))
+    return [(own, opp, -red_score if white_to_move else red_score) for own, opp, white_to_move in positions]
+
+
+def _random_opening(rng, plies):
+    """
+    Returns the moves of a random opening of (up to) the given number of plies.
+    """
+    state = GameState()
+    moves = []
+    for _ in range(plies):
+        valid_moves = state.get_valid_moves()
+        if not valid_moves:
+            break
+        moves.append(rng.choice(valid_moves))
+        state.make_move(*moves[-1])
+    return moves
+
+
+def _self_play_task(task):
+    """
+    Plays self-play games in a worker process, from random openings.
+    :return: The packed records of their positions and their number.
+    """
+    first_game, num_of_games, strategy, opening_plies, seed = task
+    positions = []
+    for index in range(first_game, first_game + num_of_games):
+        rng = random.Random(f"{seed}-{index}")
+        _, _, moves = tournament.play_game(strategy, strategy, _random_opening(rng, opening_plies), f"{seed}-{index}")
+        positions.extend(game_positions(moves))
+    return _pack(positions)
+
+
+def _solved_task(task):
+    """
+    Solves random positions with the given number of empty squares in a worker process.
+    :return: The packed records of the positions and their number.
+    """
+    first_position, num_of_positions, empties, seed = task
+    positions = []
+    solver = endgame.EndgameSolver(endgame.EXACT)
+    for index in range(first_position, first_position + num_of_positions):
+        rng = random.Random(f"{seed}-{index}")
+        while True:  # Random games may end before they get to the number of empty squares
+            state = GameState()
+            while not state.is_game_over() and _BOARD_SIZE * _BOARD_SIZE - state.red_counter - state.white_counter > \
+                    empties:
+                valid_moves = state.get_valid_moves()
+                if valid_moves:
+                    state.make_move(*rng.choice(valid_moves))
+                else:
+                    state.pass_turn()
+            if not state.is_game_over():
+                break
+        if not state.get_valid_moves_mask():
+            state.pass_turn()
+        own, opp = state.get_discs()
+        positions.append((own, opp, solver.solve(Position(own, opp, player_number(state.current_player)))))
+    return _pack(positions)
+
+
+def generate_dataset(path, source, count, workers=None, strategy='H2', opening_plies=8, empties=10, records_path=None,
+                     seed=0, progress=None):
+    """
+    Streams labeled positions to a dataset file.
+    :param source: SELF_PLAY (games of `strategy` against itself, from random openings of `opening_plies` plies),
+        SOLVED (random positions with `empties` empty squares, solved exactly) or RECORDS (the games of the records
+        file at `records_path`).
+    :param count: The number of games (SELF_PLAY) or of positions (SOLVED). Ignored for RECORDS.
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :param progress: An optional function, which is called with the number of positions written so far.
+    :return: The number of positions that were written.
+    """
+    if source == RECORDS:
+        tasks = None
+    elif source == SELF_PLAY:
+        tournament.parse_strategy(strategy)
+        tasks = [(first, min(_GAMES_PER_TASK, count - first), strategy, opening_plies, seed)
+                 for first in range(0, count, _GAMES_PER_TASK)]
+    elif source == SOLVED:
+        tasks = [(first, min(_GAMES_PER_TASK, count - first), empties, seed)
+                 for first in range(0, count, _GAMES_PER_TASK)]
+    else:
+        raise ValueError(f"Unknown source '{source}' (expected '{SELF_PLAY}', '{SOLVED}' or '{RECORDS}')")
+
+    with DatasetWriter(path) as writer:
+        if tasks is None:
+            games = game_records.read_games(records_path)
+            for batch in iter(lambda: list(itertools.islice(games, _GAMES_PER_TASK)), []):
+                writer.write_packed(*_pack(position for moves, _ in batch for position in game_positions(moves)))
+                if progress is not None:
+                    progress(writer.count)
+        else:
+            task_function = _self_play_task if source == SELF_PLAY else _solved_task
+            with multiprocessing.Pool(workers or os.cpu_count()) as pool:
+                for records, records_count in pool.imap_unordered(task_function, tasks):
+                    writer.write_packed(records, records_count)
+                    if progress is not None:
+                        progress(writer.count)
+        return writer.count
+
+
+# --- Fitting ----
+def _iter_chunks(dataset, chunk_size):
+    """
+    Reads a memory-mapped dataset in chunks.
+    :return: Iterator of (squares, scores), where squares is an (n, 64) array of the content of every square by bit
+        index (0 - empty, 1 - own disc, 2 - opponent's disc), and scores are the labels as float64.
+    """
+    for start in range(0, len(dataset), chunk_size):
+        chunk = dataset[start:start + chunk_size]
+        own = (chunk['own'][:, None] >> _SHIFTS) & np.uint64(1)
+        opp = (chunk['opp'][:, None] >> _SHIFTS) & np.uint64(1)
+        yield (own + 2 * opp).astype(np.int8), chunk['score'].astype(np.float64)
+
+
+def _square_classes():
+    """
+    Groups the squares by the symmetries of the board.
+    :return: The class of every square by bit index, and the number of classes.
+    """
+    representatives = {}
+    classes = []
+    for square in range(_BOARD_SIZE * _BOARD_SIZE):
+        mask = 1 << square
+        representative = min(bitboard.transform(mask, symmetry) for symmetry in range(8))
+        classes.append(representatives.setdefault(representative, len(representatives)))
+    return np.array(classes), len(representatives)
+
+
+def _positional_features(squares, classes, num_of_classes):
+    """
+    Returns the features of the positional weights: for every class of squares, the number of own discs minus the
+    number of opponent's discs in it.
+    """
+    signs = (squares == 1).astype(np.float64) - (squares == 2)
+    features = np.zeros((len(squares), num_of_classes))
+    for square_class in range(num_of_classes):
+        features[:, square_class] = signs[:, classes == square_class].sum(axis=1)
+    return features
+
+
+def fit_positional(dataset_path, method=LEAST_SQUARES, epochs=10, learning_rate=0.5, chunk_size=_CHUNK_SIZE):
+    """
+    Fits the weights of the positional heuristic, a weight per class of symmetric squares.
+    :param method: LEAST_SQUARES (the normal equations are summed over the chunks and solved once) or
+        GRADIENT_DESCENT (`epochs` passes, a step per chunk).
+    :return: The 8x8 weights by (row, col), in units of 1 / WEIGHT_SCALE discs.
+    """
+    dataset = open_dataset(dataset_path)
+    classes, num_of_classes = _square_classes()
+    weights = np.zeros(num_of_classes)
+    if method == LEAST_SQUARES:
+        normal_matrix = _RIDGE * len(dataset) * np.eye(num_of_classes)
+        normal_vector = np.zeros(num_of_classes)
+        for squares, scores in _iter_chunks(dataset, chunk_size):
+            features = _positional_features(squares, classes, num_of_classes)
+            normal_matrix += features.T @ features
+            normal_vector += features.T @ scores
+        weights = np.linalg.solve(normal_matrix, normal_vector)
+    elif method == GRADIENT_DESCENT:
+        for _ in range(epochs):
+            for squares, scores in _iter_chunks(dataset, chunk_size):
+                features = _positional_features(squares, classes, num_of_classes)
+                errors = features @ weights - scores
+                # Every weight is scaled by its own curvature, since the classes have different numbers of squares
+                weights -= learning_rate * (features.T @ errors) / (np.square(features).sum(axis=0) + 1)
+    else:
+        raise ValueError(f"Unknown method '{method}' (expected '{LEAST_SQUARES}' or '{GRADIENT_DESCENT}')")
+
+    square_weights = np.rint(weights[classes] * WEIGHT_SCALE).astype(int).tolist()
+    return [square_weights[row * _BOARD_SIZE:(row + 1) * _BOARD_SIZE] for row in range(_BOARD_SIZE)]
+
+
+def _phases(squares):
+    """
+    Returns the game phase of every position (see patterns.phase).
+    """
+    discs = np.count_nonzero(squares, axis=1)
+    num_of_squares = _BOARD_SIZE * _BOARD_SIZE
+    return np.minimum(patterns.PHASES - 1, (discs - _START_DISCS) * patterns.PHASES // (num_of_squares - _START_DISCS))
+
+
+def fit_patterns(dataset_path, epochs=20, learning_rate=0.5, chunk_size=_CHUNK_SIZE):
+    """
+    Fits the pattern tables of every phase by gradient descent, a step per chunk. The step of every weight is about the
+    mean error of the positions that use it in the chunk (times the learning rate, divided among the instances), so
+    rare pattern contents converge as fast as common ones (unless they are too rare, see _PRIOR_COUNT).
+    :return: For every phase, the list of the tables of the patterns (see patterns.set_weights), in units of
+        1 / WEIGHT_SCALE discs.
+    """
+    dataset = open_dataset(dataset_path)
+    sizes = [3 ** len(squares) for _, squares, _ in patterns.PATTERNS]
+    instance_patterns = [pattern for pattern, (_, _, symmetries) in enumerate(patterns.PATTERNS) for _ in symmetries]
+    instances = [(np.array([square for square, _ in squares]), np.array([3 ** digit for _, digit in squares]))
+                 for squares in patterns.instance_squares()]
+    # The tables of every pattern, with the phases one after the other
+    tables = [np.zeros(patterns.PHASES * size) for size in sizes]
+    step = learning_rate / patterns.INSTANCES
+
+    for _ in range(epochs):
+        for squares, scores in _iter_chunks(dataset, chunk_size):
+            phases = _phases(squares)
+            indexes = [phases * sizes[pattern] + squares[:, instance_squares] @ powers
+                       for pattern, (instance_squares, powers) in zip(instance_patterns, instances)]
+            errors = scores - sum(tables[pattern][index] for pattern, index in zip(instance_patterns, indexes))
+
+            gradients = [np.zeros_like(table) for table in tables]
+            counts = [np.zeros_like(table) for table in tables]
+            for pattern, index in zip(instance_patterns, indexes):
+                gradients[pattern] += np.bincount(index, weights=errors, minlength=len(tables[pattern]))
+                counts[pattern] += np.bincount(index, minlength=len(tables[pattern]))
+            for table, gradient, count in zip(tables, gradients, counts):
+                table += step * gradient / (count + _PRIOR_COUNT)
+
+    return [[np.rint(table[game_phase * size:(game_phase + 1) * size] * WEIGHT_SCALE).astype(int).tolist()
+             for table, size in zip(tables, sizes)] for game_phase in range(patterns.PHASES)]
+
+
+def fit_weights(dataset_path, weights_path=None, evaluations=(POSITIONAL, PATTERNS), method=LEAST_SQUARES,
+                epochs=None):
+    """
+    Fits the weights of the evaluations, and writes them to the weights file (the weights of the other evaluations
+    that are already in the file are kept).
+    :param weights_path: The weights file. Defaults to the one that is loaded at startup (heuristics.WEIGHTS_PATH).
+    :param evaluations: The evaluations to fit: POSITIONAL and/or PATTERNS.
+    :param method: The method of the positional weights (see fit_positional). The pattern tables are always fitted
+        by gradient descent.
+    :param epochs: The number of passes of the gradient descents. Defaults to the ones of fit_positional and
+        fit_patterns.
+    :return: The (positional weights, pattern tables) of the file.
+    """
+    weights_path = weights_path or heuristics.WEIGHTS_PATH
+    positional, pattern_tables = heuristics.read_weights(weights_path) if os.path.exists(weights_path) \
+        else (None, None)
+    epochs_arguments = {} if epochs is None else {'epochs': epochs}
+    if POSITIONAL in evaluations:
+        positional = fit_positional(dataset_path, method, **epochs_arguments)
+    if PATTERNS in evaluations:
+        pattern_tables = fit_patterns(dataset_path, **epochs_arguments)
+    heuristics.write_weights(weights_path, positional, pattern_tables)
+    return positional, pattern_tables
@@ -0,0 +1,160 @@
+"""
+Zobrist hashing and a transposition table for the search.
+
+The same position is reached through many move orders, so the search stores the result of every node it completes,
+keyed by the Zobrist hash of the position, and reuses it whenever the position is reached again.
+"""
+import random
+import bitboard
+
+_BOARD_CELLS = bitboard.MAX_BOARD_SIZE * bitboard.MAX_BOARD_SIZE  # Keys for the squares of every board size
+_ZOBRIST_SEED = 20551  # A fixed seed, so the hashes are the same in every process and every run.
+
+
+def _generate_keys():
+    """
+    Generates a random 64-bit key for every (player, square) pair, and a key for the side to move.
+    """
+    rng = random.Random(_ZOBRIST_SEED)
+    discs = [None] + [[rng.getrandbits(64) for _ in range(_BOARD_CELLS)] for _ in (1, 2)]
+    return discs, rng.getrandbits(64)
+
+
+# DISC_KEYS[player][square] (players are 1 and 2), and the key that is toggled whenever the side to move changes.
+DISC_KEYS, SIDE_KEY = _generate_keys()
+# Toggling both colour keys of a square turns a disc of one player into a disc of the other one.
+FLIP_KEYS = [DISC_KEYS[1][square] ^ DISC_KEYS[2][square] for square in range(_BOARD_CELLS)]
+
+
+def hash_position(red, white, player):
+    """
+    Computes the Zobrist hash of a (red, white) pair of bitboards with `player` to move.
+    """
+    key = SIDE_KEY if player == 2 else 0
+    for player_discs, keys in ((red, DISC_KEYS[1]), (white, DISC_KEYS[2])):
+        while player_discs:
+            lowest = player_discs & -player_discs
+            key ^= keys[lowest.bit_length() - 1]
+            player_discs ^= lowest
+    return key
+
+
+def update_hash(key, player, square, flips):
+    """
+    Incrementally updates a hash after `player` places a disc at `square` and flips the discs of the `flips` mask,
+    and the turn passes to the opponent.
+    """
+    key ^= DISC_KEYS[player][square] ^ SIDE_KEY
+    while flips:
+        lowest = flips & -flips
+        key ^= FLIP_KEYS[lowest.bit_length() - 1]
+        flips ^= lowest
+    return key
+
+
+class TranspositionTable:
+    """
+    A fixed-size hash table of search results.
+    - Every bucket holds two entries: a depth-preferred one, which is replaced only by a search of at least the same
+      depth, and an always-replace one, which keeps the most recent result that didn't fit in the first.
+    - An entry is a tuple: (key, depth, bound type, score, best square).
+    - Attributes:
+        - hits, misses: Number of probes that found / didn't find the position.
+        - collisions: Number of missed probes, in which the bucket was occupied by other positions.
+        - stores, replacements: Number of stored entries, and how many of them overwrote another position.
+    """
+    EXACT = 0
+    LOWER_BOUND = 1  # The score is at least the stored score (the search failed high).
+    UPPER_BOUND = 2  # The score is at most the stored score (the search failed low).
+
+    # Estimated memory of a single entry: the tuple, its integers and the slot that refers to it.
+    ENTRY_BYTES = 160
+
+    def __init__(self, size_mb=16):
+        buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_BYTES))
+        self.num_buckets = 1 << (buckets.bit_length() - 1)  # Round down to a power of 2, for masking.
+        self._index_mask = self.num_buckets - 1
+        self._entries = [None] * (2 * self.num_buckets)
+        self.hits = self.misses = self.collisions = self.stores = self.replacements = 0
+
+    def probe(self, key):
+        """
+        Returns the entry of the position, or None if it isn't in the table.
+        """
+        index = (key & self._index_mask) << 1
+        entries = self._entries
+        entry = entries[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = entries[index + 1]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+
+        self.misses += 1
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def peek(self, key):
+        """
+        Returns the entry of the position, or None if it isn't in the table, without counting it as a probe.
+        """
+        index = (key & self._index_mask) << 1
+        for entry in self._entries[index:index + 2]:
+            if entry is not None and entry[0] == key:
+                return entry
+        return None
+
+    def store(self, key, depth, bound, score, best_square):
+        """
+        Stores the result of a search of the position to the given depth.
+        """
+        index = (key & self._index_mask) << 1
+        entries = self._entries
+        new_entry = (key, depth, bound, score, best_square)
+        self.stores += 1
+
+        current = entries[index]
+        if current is None or current[0] == key or depth >= current[1]:
+            if current is not None and current[0] != key:
+                # The replaced entry is still the most recent one of its position, so it moves to the other slot.
+                evicted = entries[index + 1]
+                entries[index + 1] = current
+            else:
+                evicted = None
+                if entries[index + 1] is not None and entries[index + 1][0] == key:
+                    entries[index + 1] = None  # Don't keep an older copy of the same position.
+            entries[index] = new_entry
+        else:
+            evicted = entries[index + 1]
+            entries[index + 1] = new_entry
+
+        if evicted is not None and evicted[0] != key:
+            self.replacements += 1
+
+    def clear(self):
+        """
+        Removes all the entries and resets the counters.
+        """
+        self._entries = [None] * (2 * self.num_buckets)
+        self.hits = self.misses = self.collisions = self.stores = self.replacements = 0
+
+    def stats(self):
+        """
+        Returns the counters of the table, and its hit rate and fill rate.
+        """
+        probes = self.hits + self.misses
+        used = sum(1 for entry in self._entries if entry is not None)
+        return {
+            'size_mb': round(self.num_buckets * 2 * self.ENTRY_BYTES / (1024 * 1024), 2),
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'fill_rate': used / len(self._entries),
+        }